@@ -0,0 +1,54 @@
+"""
+Compare the NumPy .bob decoder against the previous per-vertex struct loop.
+`tests/test_bob_codec.py` checks that both decode the same arrays.
+
+	blender --background --factory-startup --python benchmarks/bob_deserialize.py
+"""
+
+import io
+import os
+import sys
+import struct
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common  # noqa: E402
+
+
+def legacy_deserialize(file):
+	def readstruct(s):
+		tup = struct.unpack(s, file.read(struct.calcsize(s)))
+		return tup[0] if len(tup) == 1 else tup
+
+	assert readstruct("<I") == 45623
+	meshFormat = readstruct("<I")
+	vertexCount = readstruct("<I")
+	faceCount = readstruct("<I")
+
+	vertices = []
+	faces = []
+	for i in range(vertexCount):
+		pos = readstruct("<fff")
+		uv = readstruct("<HH")
+		norm = readstruct("<hhh")
+		readstruct("xx")
+		vertices.append({"pos": pos, "uv": uv, "norm": norm})
+	index_format = {0: "<BBB", 1: "<HHH", 2: "<III"}[meshFormat]
+	for i in range(faceCount):
+		faces.append({"indices": readstruct(index_format)})
+	return {"vertices": vertices, "faces": faces}
+
+
+def main():
+	codec = common.load_module('codec')
+
+	print(f"{'vertices':>10} {'faces':>10} {'format':>6} {'legacy (s)':>12} {'numpy (s)':>12} {'speedup':>9}")
+	for vertex_count, face_count, mesh_format in ((250, 500, 0), (10_000, 20_000, 1), (200_000, 400_000, 2)):
+		payload = common.make_bob_bytes(vertex_count, face_count, mesh_format=mesh_format)
+
+		legacy_time = common.timeit(lambda: legacy_deserialize(io.BytesIO(payload)), repeat=3)
+		numpy_time = common.timeit(lambda: codec.deserialize_bob(io.BytesIO(payload)))
+		print(f"{vertex_count:>10} {face_count:>10} {mesh_format:>6} {legacy_time:>12.5f} {numpy_time:>12.5f} {legacy_time / numpy_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+	main()
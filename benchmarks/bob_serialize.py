@@ -0,0 +1,61 @@
+"""
+Compare the single buffer .bob encoder against the previous per-vertex
+struct loop. `tests/test_bob_codec.py` checks that both produce
+byte-identical files.
+
+	blender --background --factory-startup --python benchmarks/bob_serialize.py
+"""
+
+import io
+import os
+import sys
+import struct
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common  # noqa: E402
+
+
+def legacy_serialize(data, file):
+	def writestruct(s, *args):
+		file.write(struct.pack(s, *args))
+
+	vertexCount = len(data.positions)
+	faceCount = len(data.indices)
+	meshFormat = 1 if vertexCount < 65536 else 2
+
+	writestruct('<I', 45623)
+	writestruct('<I', meshFormat)
+	writestruct('<I', vertexCount)
+	writestruct('<I', faceCount)
+
+	for pos, uv, norm in zip(data.positions.tolist(), data.uvs.tolist(), data.normals.tolist()):
+		writestruct('<fff', pos[0], pos[1], pos[2])
+		writestruct('<HH', uv[0], uv[1])
+		writestruct('<hhh', norm[0], norm[1], norm[2])
+		writestruct('xx')
+
+	for indices in data.indices.tolist():
+		writestruct('<HHH' if meshFormat == 1 else '<III', indices[0], indices[1], indices[2])
+
+
+def encode(serializer, data):
+	file = io.BytesIO()
+	serializer(data, file)
+	return file.getvalue()
+
+
+def main():
+	codec = common.load_module('codec')
+
+	print(f"{'vertices':>10} {'faces':>10} {'legacy (s)':>12} {'numpy (s)':>12} {'speedup':>9}")
+	for vertex_count, face_count in ((1_000, 2_000), (65_535, 120_000), (100_000, 200_000)):
+		payload = common.make_bob_bytes(vertex_count, face_count)
+		data = codec.deserialize_bob(io.BytesIO(payload))
+
+		legacy_time = common.timeit(encode, legacy_serialize, data, repeat=3)
+		numpy_time = common.timeit(encode, codec.serialize_bob, data)
+		print(f"{vertex_count:>10} {face_count:>10} {legacy_time:>12.5f} {numpy_time:>12.5f} {legacy_time / numpy_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+	main()
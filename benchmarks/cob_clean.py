@@ -0,0 +1,58 @@
+"""
+Time the collision cleanup done by `mesh_to_cob` on a triangle soup like
+the one an unwelded visual mesh gives: every face has its own vertices,
+copies are jittered below the weld distance, and some faces are
+degenerate or duplicated.
+
+	blender --background --factory-startup --python benchmarks/cob_clean.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common  # noqa: E402
+
+
+def triangle_soup(size, jitter, seed=0):
+	rng = np.random.default_rng(seed)
+	grid = np.linspace(-10, 10, size + 1)
+	x, z = np.meshgrid(grid, grid)
+	points = np.stack((x.ravel(), 0.1 * np.sin(x.ravel()) * np.cos(z.ravel()), z.ravel()), axis=1)
+	index = np.arange((size + 1) ** 2).reshape(size + 1, size + 1)
+	a, b = index[:-1, :-1].ravel(), index[:-1, 1:].ravel()
+	c, d = index[1:, 1:].ravel(), index[1:, :-1].ravel()
+	triangles = np.concatenate((np.stack((a, d, c), axis=1), np.stack((a, c, b), axis=1)))
+
+	# one in 20 faces is repeated, one in 20 collapses onto an edge
+	duplicates = triangles[rng.random(len(triangles)) < 0.05]
+	degenerate = triangles[rng.random(len(triangles)) < 0.05][:, [0, 1, 1]]
+	triangles = np.concatenate((triangles, duplicates, degenerate))
+
+	positions = points[triangles.ravel()] + rng.normal(0, jitter, (triangles.size, 3))
+	return positions, np.arange(triangles.size).reshape(-1, 3)
+
+
+def main():
+	collision = common.load_module('collision')
+	meshdata = common.load_module('meshdata')
+
+	print(f"{'vertices':>10} {'faces':>10} {'time (s)':>9} {'vertices removed':>17} {'degenerate':>11} {'duplicates':>11} {'Mvert/s':>8}")
+	for size in (30, 100, 300, 600):
+		positions, indices = triangle_soup(size, jitter=collision.DEFAULT_WELD_DISTANCE / 10)
+		cob_mesh = meshdata.CobMesh(positions=positions, indices=indices)
+
+		start = time.perf_counter()
+		cleaned, stats = collision.clean_collision(cob_mesh)
+		elapsed = time.perf_counter() - start
+
+		assert cleaned.vertex_count == (size + 1) ** 2
+		assert cleaned.face_count == 2 * size * size
+		print(f"{cob_mesh.vertex_count:>10} {cob_mesh.face_count:>10} {elapsed:>9.2f} {stats['vertices_removed']:>17} {stats['degenerate_removed']:>11} {stats['duplicates_removed']:>11} {cob_mesh.vertex_count / elapsed / 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,73 @@
+"""
+Compare the NumPy .cob codec against the previous per-element struct
+loops. `tests/test_cob_codec.py` checks that the new writer is
+byte-identical to the old one.
+
+	blender --background --factory-startup --python benchmarks/cob_codec.py
+"""
+
+import io
+import os
+import sys
+import struct
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common  # noqa: E402
+
+
+def legacy_serialize(data, file):
+	def writestruct(s, *args):
+		file.write(struct.pack(s, *args))
+
+	writestruct('<I', 13466)
+	writestruct('<I', len(data.positions))
+	writestruct('<I', len(data.indices))
+	for pos in data.positions.tolist():
+		writestruct('<fff', pos[0], pos[1], pos[2])
+	for indices in data.indices.tolist():
+		writestruct('<III', indices[0], indices[1], indices[2])
+	for normal in data.normals.tolist():
+		writestruct('<fff', normal[0], normal[1], normal[2])
+
+
+def legacy_deserialize(file):
+	def readstruct(s):
+		tup = struct.unpack(s, file.read(struct.calcsize(s)))
+		return tup[0] if len(tup) == 1 else tup
+
+	assert readstruct("<I") == 13466
+	vertexCount = readstruct("<I")
+	faceCount = readstruct("<I")
+	vertices = [{"pos": readstruct("<fff")} for i in range(vertexCount)]
+	faces = [{"indices": readstruct("<III")} for i in range(faceCount)]
+	normals = [{"dir": readstruct("<fff")} for i in range(faceCount)]
+	return {"vertices": vertices, "faces": faces, "normals": normals}
+
+
+def encode(serializer, data):
+	file = io.BytesIO()
+	serializer(data, file)
+	return file.getvalue()
+
+
+def main():
+	codec = common.load_module('codec')
+
+	print(f"{'vertices':>10} {'faces':>10} {'step':>24} {'legacy (s)':>12} {'numpy (s)':>12} {'speedup':>9}")
+	for vertex_count, face_count in ((1_000, 2_000), (50_000, 100_000), (150_000, 300_000)):
+		payload = common.make_cob_bytes(vertex_count, face_count)
+		data = codec.deserialize_cob(io.BytesIO(payload))
+
+		rows = (
+			("deserialize", lambda: legacy_deserialize(io.BytesIO(payload)), lambda: codec.deserialize_cob(io.BytesIO(payload))),
+			("deserialize (no normals)", lambda: legacy_deserialize(io.BytesIO(payload)), lambda: codec.deserialize_cob(io.BytesIO(payload), read_normals=False)),
+			("serialize", lambda: encode(legacy_serialize, data), lambda: encode(codec.serialize_cob, data)),
+		)
+		for step, legacy_func, numpy_func in rows:
+			legacy_time = common.timeit(legacy_func, repeat=3)
+			numpy_time = common.timeit(numpy_func)
+			print(f"{vertex_count:>10} {face_count:>10} {step:>24} {legacy_time:>12.5f} {numpy_time:>12.5f} {legacy_time / numpy_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,61 @@
+"""
+Time and measure building a Blender mesh from a decoded .cob file with the
+direct `foreach_set` path, compared to the previous from_pydata + bmesh
+round trip. Requires blender:
+
+	blender --background --factory-startup --python benchmarks/cob_import.py
+
+Peak memory is read from the process high water mark, which only grows,
+so the new path is measured first.
+"""
+
+import io
+import os
+import sys
+import time
+import resource
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common  # noqa: E402
+
+import bpy  # noqa: E402
+import bpy_extras  # noqa: E402
+import bmesh  # noqa: E402
+
+
+def legacy_cob_to_mesh(cob_data, cob_name):
+	mesh = bpy.data.meshes.new(name=cob_name)
+	mesh.from_pydata(cob_data.positions.tolist(), [], cob_data.indices.tolist())
+	bm = bmesh.new()
+	bm.from_mesh(mesh)
+	bm.transform(bpy_extras.io_utils.axis_conversion(from_forward='-Z', from_up='Y').to_4x4())
+	bm.to_mesh(mesh)
+	bm.free()
+	mesh.validate()
+	mesh.update()
+	return mesh
+
+
+def measure(label, func):
+	before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	start = time.perf_counter()
+	mesh = func()
+	elapsed = time.perf_counter() - start
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+	bpy.data.meshes.remove(mesh)
+	print(f"{label:>10} {elapsed:>10.3f}s  peak +{peak / 1024:.1f} MiB")
+
+
+def main():
+	codec = common.load_module('codec')
+	cob = common.load_module('cob')
+
+	payload = common.make_cob_bytes(150_000, 300_000)
+	cob_data = codec.deserialize_cob(io.BytesIO(payload), read_normals=False)
+
+	measure("direct", lambda: cob.cob_to_mesh(cob_data, "direct"))
+	measure("legacy", lambda: legacy_cob_to_mesh(cob_data, "legacy"))
+
+
+if __name__ == "__main__":
+	main()
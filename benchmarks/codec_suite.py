@@ -0,0 +1,267 @@
+"""
+Micro benchmarks of the .bob/.cob codec on synthetic payloads, for
+catching slowdowns between releases.
+
+Every step is timed on its own: decoding and encoding .bob for all three
+meshFormat index widths, decoding and encoding .cob, welding (export
+corners and collision positions) and uv/normal quantization, at 1k to
+1M vertices. Each case records the best time, the throughput and the
+peak memory allocated while it runs (tracemalloc, NumPy allocations
+included). Save the results as JSON and pass them back as a baseline
+to fail when a case got slower or uses more memory than the threshold
+(and by more than 0.1 ms or 1 MiB, below that the differences are noise):
+
+	python benchmarks/codec_suite.py --output baseline.json
+	python benchmarks/codec_suite.py --baseline baseline.json --threshold 0.2
+
+The codec does not need blender, but the script also runs inside it:
+
+	blender --background --factory-startup --python benchmarks/codec_suite.py -- --output results.json
+
+meshFormat 0 stores 8 bit indices and meshFormat 1 16 bit indices, so
+their payloads are capped at 256 and 65536 vertices; the face count
+still grows with the size, so the index block is always the full size.
+Baselines only compare well on the same machine.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common  # noqa: E402
+
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+MESH_FORMAT_VERTEX_LIMITS = {0: 2**8, 1: 2**16, 2: 2**32}
+
+# each measurement repeats the step until it ran this long, so small cases are not just timer noise
+MIN_MEASURE_TIME = 0.05
+# slowdowns smaller than this per call are timer and scheduler noise, not regressions
+MIN_TIME_REGRESSION = 1e-4
+# memory regressions smaller than this are noise from small allocations
+MIN_MEMORY_REGRESSION = 2**20
+
+
+def measure(func, repeat):
+	"""Best seconds per call over `repeat` measurements, and the peak traced memory of one call in bytes."""
+	loops = 1
+	while True:
+		start = time.perf_counter()
+		for _ in range(loops):
+			func()
+		elapsed = time.perf_counter() - start
+		if elapsed >= MIN_MEASURE_TIME:
+			break
+		loops *= 10
+
+	best = elapsed / loops
+	for _ in range(repeat - 1):
+		start = time.perf_counter()
+		for _ in range(loops):
+			func()
+		best = min(best, (time.perf_counter() - start) / loops)
+
+	tracemalloc.start()
+	try:
+		func()
+		_, peak = tracemalloc.get_traced_memory()
+	finally:
+		tracemalloc.stop()
+	return best, peak
+
+
+def encode(serializer, data):
+	file = io.BytesIO()
+	serializer(data, file)
+	return file.getvalue()
+
+
+def make_corners(bob_data, corner_count, seed=0):
+	"""Face corners in the form `codec.corners_to_bob` takes, drawn from the vertices of `bob_data`."""
+	quantize = common.load_module('quantize')
+	corners = np.random.default_rng(seed).integers(0, bob_data.vertex_count, corner_count)
+	return (
+		bob_data.positions[corners],
+		quantize.decode_normals(bob_data.normals)[corners],
+		quantize.decode_uvs(bob_data.uvs)[corners],
+	)
+
+
+def cases(size):
+	"""Yield `(name, step, vertex count, bytes processed, function)` for one size."""
+	codec = common.load_module('codec')
+	quantize = common.load_module('quantize')
+	weld = common.load_module('weld')
+
+	for mesh_format, limit in MESH_FORMAT_VERTEX_LIMITS.items():
+		vertex_count = min(size, limit)
+		payload = common.make_bob_bytes(vertex_count, 2 * size, mesh_format=mesh_format)
+		bob_data = codec.deserialize_bob(io.BytesIO(payload))
+		yield f"bob.deserialize/format{mesh_format}/{size}", 'deserialize', vertex_count, len(payload), lambda: codec.deserialize_bob(io.BytesIO(payload))
+		# the encoder picks the smallest meshFormat for the vertex count, 8 bit indices are never written
+		yield f"bob.serialize/format{mesh_format}/{size}", 'serialize', vertex_count, len(encode(codec.serialize_bob, bob_data)), lambda: encode(codec.serialize_bob, bob_data)
+
+	payload = common.make_cob_bytes(size, 2 * size)
+	cob_data = codec.deserialize_cob(io.BytesIO(payload))
+	yield f"cob.deserialize/{size}", 'deserialize', size, len(payload), lambda: codec.deserialize_cob(io.BytesIO(payload))
+	yield f"cob.serialize/{size}", 'serialize', size, len(payload), lambda: encode(codec.serialize_cob, cob_data)
+
+	# every vertex is shared by about 6 corners, like on a closed mesh
+	bob_data = codec.deserialize_bob(io.BytesIO(common.make_bob_bytes(max(size // 6, 1), 0, mesh_format=2)))
+	positions, normals, uvs = make_corners(bob_data, size)
+	yield f"weld.vertices/{size}", 'weld', size, positions.nbytes + normals.nbytes + uvs.nbytes, lambda: weld.weld_vertices(positions, normals, uvs)
+	yield f"weld.positions/{size}", 'weld', size, positions.nbytes, lambda: weld.weld_positions(positions, 1e-4)
+
+	encoded_uvs = quantize.encode_uvs(uvs)
+	encoded_normals = quantize.encode_normals(normals)
+	yield f"quantize.encode/{size}", 'quantize', size, uvs.nbytes + normals.nbytes, lambda: (quantize.encode_uvs(uvs), quantize.encode_normals(normals))
+	yield f"quantize.decode/{size}", 'quantize', size, encoded_uvs.nbytes + encoded_normals.nbytes, lambda: (quantize.decode_uvs(encoded_uvs), quantize.decode_normals(encoded_normals))
+
+
+def run(sizes, repeat, names=None):
+	"""Measure every case of `sizes`, or only the cases in `names`, and return their results."""
+	results = []
+	print(f"{'case':>32} {'vertices':>10} {'time (s)':>10} {'Mvert/s':>9} {'MiB/s':>9} {'peak (MiB)':>11}")
+	for size in sizes:
+		for name, step, vertex_count, nbytes, func in cases(size):
+			if names is not None and name not in names:
+				continue
+			seconds, peak = measure(func, repeat)
+			results.append(make_result(name, step, size, vertex_count, nbytes, seconds, peak))
+			print(f"{name:>32} {vertex_count:>10} {seconds:>10.5f} {vertex_count / seconds / 1e6:>9.2f} {nbytes / seconds / 2**20:>9.1f} {peak / 2**20:>11.2f}")
+	return results
+
+
+def make_result(name, step, size, vertex_count, nbytes, seconds, peak):
+	return {
+		'name': name,
+		'step': step,
+		'size': size,
+		'vertices': vertex_count,
+		'bytes': nbytes,
+		'seconds': seconds,
+		'vertices_per_second': vertex_count / seconds,
+		'bytes_per_second': nbytes / seconds,
+		'peak_bytes': peak,
+	}
+
+
+def is_regression(result, previous, threshold):
+	slower = (
+		result['seconds'] > previous['seconds'] * (1 + threshold)
+		and result['seconds'] - previous['seconds'] > MIN_TIME_REGRESSION
+	)
+	larger = (
+		result['peak_bytes'] > previous['peak_bytes'] * (1 + threshold)
+		and result['peak_bytes'] - previous['peak_bytes'] > MIN_MEMORY_REGRESSION
+	)
+	return slower or larger
+
+
+def remeasure(results, baseline, threshold, repeat):
+	"""
+	Measure the cases that look like regressions once more and keep the
+	better of both measurements, so a single noisy measurement does not
+	fail the comparison.
+	"""
+	suspects = {
+		result['name'] for result in results
+		if result['name'] in baseline and is_regression(result, baseline[result['name']], threshold)
+	}
+	if not suspects:
+		return results
+
+	print(f"Measuring {len(suspects)} cases again that look slower than the baseline")
+	sizes = sorted({result['size'] for result in results if result['name'] in suspects})
+	again = {result['name']: result for result in run(sizes, repeat, names=suspects)}
+	merged = []
+	for result in results:
+		other = again.get(result['name'])
+		if other is not None:
+			result = make_result(
+				result['name'], result['step'], result['size'], result['vertices'], result['bytes'],
+				min(result['seconds'], other['seconds']),
+				min(result['peak_bytes'], other['peak_bytes']),
+			)
+		merged.append(result)
+	return merged
+
+
+def compare(results, baseline, threshold):
+	"""Print the change against `baseline` per case and return the names of the cases that regressed."""
+	regressions = []
+	print(f"{'case':>32} {'time':>8} {'memory':>8}")
+	for result in results:
+		previous = baseline.get(result['name'])
+		if previous is None:
+			print(f"{result['name']:>32} {'new':>8}")
+			continue
+		regressed = is_regression(result, previous, threshold)
+		flag = "  REGRESSION" if regressed else ""
+		print(f"{result['name']:>32} {result['seconds'] / previous['seconds'] - 1:>+8.1%} {result['peak_bytes'] / max(previous['peak_bytes'], 1) - 1:>+8.1%}{flag}")
+		if regressed:
+			regressions.append(result['name'])
+	return regressions
+
+
+def parse_args(argv):
+	parser = argparse.ArgumentParser(description="Benchmark the .bob/.cob codec on synthetic payloads.")
+	parser.add_argument('-o', '--output', help="write the results as JSON to this file")
+	parser.add_argument('-b', '--baseline', help="JSON results to compare against")
+	parser.add_argument('-t', '--threshold', type=float, default=0.2, help="allowed slowdown and memory growth against the baseline (default: 0.2, 20%%)")
+	parser.add_argument('-s', '--sizes', type=int, nargs='+', default=SIZES, help="vertex counts to benchmark")
+	parser.add_argument('-r', '--repeat', type=int, default=5, help="measurements per case, the best is kept")
+	return parser.parse_args(argv)
+
+
+def main(argv=None):
+	if argv is None:
+		argv = sys.argv[1:]
+		# blender passes the arguments of the script after `--`
+		if '--' in sys.argv:
+			argv = sys.argv[sys.argv.index('--') + 1:]
+	args = parse_args(argv)
+
+	results = run(args.sizes, args.repeat)
+
+	baseline = None
+	if args.baseline:
+		with open(args.baseline) as file:
+			baseline = json.load(file)
+		baseline_results = {result['name']: result for result in baseline['results']}
+		results = remeasure(results, baseline_results, args.threshold, args.repeat)
+
+	if args.output:
+		report = {
+			'addon_version': common.addon_version(),
+			'python': platform.python_version(),
+			'numpy': np.__version__,
+			'machine': platform.machine(),
+			'processor': platform.processor(),
+			'cpu_count': os.cpu_count(),
+			'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+			'results': results,
+		}
+		with open(args.output, 'w') as file:
+			json.dump(report, file, indent='\t')
+		print(f"Wrote {len(results)} results to `{args.output}`")
+
+	if baseline is not None:
+		regressions = compare(results, baseline_results, args.threshold)
+		if regressions:
+			print(f"{len(regressions)} of {len(results)} cases regressed by more than {args.threshold:.0%} against `{args.baseline}` ({baseline.get('addon_version')})")
+			return 1
+		print(f"No regressions against `{args.baseline}` ({baseline.get('addon_version')})")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
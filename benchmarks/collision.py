@@ -0,0 +1,69 @@
+"""
+Collision derivation on a synthetic map: a noisy floor, a smooth hill and
+small props. Prints run time and the triangle reduction for triangle
+budgets and error tolerances.
+
+	blender --background --factory-startup --python benchmarks/collision.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common  # noqa: E402
+
+
+def height_grid(size, extent, height):
+	grid = np.linspace(-extent, extent, size + 1)
+	x, z = np.meshgrid(grid, grid)
+	positions = np.stack((x.ravel(), height(x, z).ravel(), z.ravel()), axis=1)
+	index = np.arange((size + 1) ** 2).reshape(size + 1, size + 1)
+	a, b = index[:-1, :-1].ravel(), index[:-1, 1:].ravel()
+	c, d = index[1:, 1:].ravel(), index[1:, :-1].ravel()
+	return positions, np.concatenate((np.stack((a, d, c), axis=1), np.stack((a, c, b), axis=1)))
+
+
+def box(center, half_size):
+	corners = np.array([(x, y, z) for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)], dtype=np.float64) * half_size + center
+	quads = ((0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3))
+	return corners, np.array([triangle for a, b, c, d in quads for triangle in ((a, b, c), (a, c, d))])
+
+
+def map_scene(size, props, seed=0):
+	rng = np.random.default_rng(seed)
+	parts = [
+		height_grid(size, 10, lambda x, z: rng.normal(0, 0.002, x.shape)),
+		height_grid(size // 2, 3, lambda x, z: 0.8 * np.exp(-(x ** 2 + z ** 2)) + 0.01),
+	]
+	parts += [box(rng.uniform(-9, 9, 3) * (1, 0, 1) + (0, 0.05, 0), 0.03) for _ in range(props)]
+
+	offsets = np.cumsum([0] + [len(positions) for positions, _ in parts[:-1]])
+	positions = np.concatenate([positions for positions, _ in parts])
+	indices = np.concatenate([indices + offset for (_, indices), offset in zip(parts, offsets)])
+	return positions, indices
+
+
+def main():
+	collision = common.load_module('collision')
+	meshdata = common.load_module('meshdata')
+
+	print(f"{'faces':>8} {'target':>14} {'time (s)':>9} {'faces after':>12} {'reduction':>10} {'error':>8} {'parts dropped':>14}")
+	for size in (100, 200, 400):
+		positions, indices = map_scene(size, props=50)
+		cob_mesh = meshdata.CobMesh(positions=positions, indices=indices)
+		for target, options in (
+			('budget 2000', dict(max_triangles=2000, flatten_tolerance=0.02)),
+			('error 0.02', dict(max_error=0.02)),
+		):
+			start = time.perf_counter()
+			derived, stats = collision.derive_collision(cob_mesh, min_size=0.2, **options)
+			elapsed = time.perf_counter() - start
+			reduction = 1 - stats['faces_after'] / stats['faces_before']
+			print(f"{stats['faces_before']:>8} {target:>14} {elapsed:>9.2f} {stats['faces_after']:>12} {reduction:>10.1%} {stats['error']:>8.4f} {stats['parts_dropped']:>14}")
+
+
+if __name__ == "__main__":
+	main()
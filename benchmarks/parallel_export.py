@@ -0,0 +1,98 @@
+"""
+Time the worker part of a collection export, `encode_for_export` of
+.bob and .cob, for a collection of objects one after another against
+`parallel.map_ordered`, as the export operators do. Evaluating the
+objects and reading their arrays stays on the main thread and is left out.
+
+	blender --background --factory-startup --python benchmarks/parallel_export.py
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common  # noqa: E402
+
+
+OBJECT_COUNT = 16
+
+BOB_OPTIONS = {
+	'optimize_vertex_cache': True,
+	'optimize_overdraw': False,
+	'lod_count': 0,
+	'lod_target': 'RATIO',
+	'lod_ratio': 0.5,
+	'lod_error': 0.01,
+	'lod_suffix': '_lod',
+}
+
+COB_OPTIONS = {
+	'weld_distance': 1e-4,
+	'simplify_collision': False,
+	'collision_target': 'ERROR',
+	'collision_budget': 1000,
+	'collision_error': 0.05,
+	'collision_coplanar_angle': np.radians(5),
+	'collision_min_size': 0.0,
+}
+
+
+def grid_corners(size, seed):
+	"""Triangle corners of a bumpy grid with per face uvs, like `bob.extract_corners` returns them."""
+	rng = np.random.default_rng(seed)
+	grid = np.linspace(-10, 10, size + 1)
+	x, z = np.meshgrid(grid, grid)
+	points = np.stack((x.ravel(), rng.normal(0, 0.1, x.size), z.ravel()), axis=1).astype(np.float32)
+	index = np.arange((size + 1) ** 2).reshape(size + 1, size + 1)
+	a, b = index[:-1, :-1].ravel(), index[:-1, 1:].ravel()
+	c, d = index[1:, 1:].ravel(), index[1:, :-1].ravel()
+	corners = np.concatenate((np.stack((a, d, c), axis=1), np.stack((a, c, b), axis=1))).ravel()
+
+	normals = np.zeros((len(corners), 3), dtype=np.float32)
+	normals[:, 1] = 1
+	uvs = (points[corners][:, [0, 2]] / 20 + 0.5).astype(np.float32)
+	return points, corners, (points[corners], normals, uvs)
+
+
+def main():
+	bob = common.load_module('bob')
+	cob = common.load_module('cob')
+	meshdata = common.load_module('meshdata')
+	parallel = common.load_module('parallel')
+
+	print(f"workers: {parallel.worker_count(OBJECT_COUNT)}")
+	print(f"{'format':>6} {'faces':>8} {'objects':>8} {'serial (s)':>11} {'pool (s)':>9} {'speedup':>8}")
+	with tempfile.TemporaryDirectory() as directory:
+		for size in (50, 100, 150):
+			bob_jobs, cob_jobs = [], []
+			for i in range(OBJECT_COUNT):
+				points, corners, bob_corners = grid_corners(size, seed=i)
+				bob_jobs.append({
+					'name': f"object{i}",
+					'filepath': os.path.join(directory, f"object{i}.bob"),
+					'corners': bob_corners,
+					'camera_region': None,
+					'options': BOB_OPTIONS,
+				})
+				cob_jobs.append({
+					'name': f"object{i}",
+					'filepath': os.path.join(directory, f"object{i}.cob"),
+					'cob_data': meshdata.CobMesh(positions=points, indices=corners.reshape(-1, 3)),
+					'options': COB_OPTIONS,
+				})
+
+			for extension, module, jobs in (('bob', bob, bob_jobs), ('cob', cob, cob_jobs)):
+				def pooled():
+					for _, error in parallel.map_ordered(module.encode_for_export, jobs):
+						assert error is None, error
+
+				serial = common.timeit(lambda: [module.encode_for_export(job) for job in jobs], repeat=1)
+				pooled_time = common.timeit(pooled, repeat=1)
+				print(f"{extension:>6} {2 * size * size:>8} {OBJECT_COUNT:>8} {serial:>11.3f} {pooled_time:>9.3f} {serial / pooled_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,48 @@
+"""
+Time reading and decoding a folder of .bob and .cob files for import one
+after another against `parallel.map_ordered`. The operator column is what
+the import operators do: the pool for large imports, and one after another
+below `parallel.MIN_POOL_BYTES`. Mesh creation is left out, it stays on
+the main thread. The pool only pays off with more than one core.
+
+	blender --background --factory-startup --python benchmarks/parallel_import.py
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common  # noqa: E402
+
+
+FILE_COUNT = 16
+
+
+def main():
+	codec = common.load_module('codec')
+	parallel = common.load_module('parallel')
+
+	print(f"cores: {os.cpu_count()}, workers: {parallel.worker_count(FILE_COUNT)}")
+	print(f"{'format':>6} {'vertices':>10} {'files':>6} {'serial (s)':>11} {'pool (s)':>9} {'operator (s)':>13} {'speedup':>8}")
+	with tempfile.TemporaryDirectory() as directory:
+		for extension, load, make_bytes in (
+			('bob', codec.load_bob, common.make_bob_bytes),
+			('cob', codec.load_cob, common.make_cob_bytes),
+		):
+			for vertex_count in (100, 1_000, 10_000, 100_000, 500_000):
+				paths = []
+				for i in range(FILE_COUNT):
+					path = os.path.join(directory, f"{vertex_count}_{i}.{extension}")
+					with open(path, 'wb') as file:
+						file.write(make_bytes(vertex_count, 2 * vertex_count, seed=i))
+					paths.append(path)
+
+				serial = common.timeit(lambda: [load(path) for path in paths], repeat=3)
+				pooled = common.timeit(lambda: list(parallel.map_ordered(load, paths)), repeat=3)
+				operator = common.timeit(lambda: list(parallel.map_ordered(load, paths, workers=parallel.file_workers(paths))), repeat=3)
+				print(f"{extension:>6} {vertex_count:>10} {FILE_COUNT:>6} {serial:>11.4f} {pooled:>9.4f} {operator:>13.4f} {serial / operator:>7.1f}x")
+
+
+if __name__ == "__main__":
+	main()
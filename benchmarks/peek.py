@@ -0,0 +1,48 @@
+"""
+Time `reader.peek` over a directory of .bob/.cob files, for example the
+game's `ba_data/meshes`. Without an argument a temporary directory of
+synthetic files is scanned instead.
+
+	blender --background --factory-startup --python benchmarks/peek.py -- [directory]
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common  # noqa: E402
+
+
+def scan(reader, directory):
+	paths = [
+		os.path.join(directory, name)
+		for name in sorted(os.listdir(directory))
+		if name.endswith(('.bob', '.cob'))
+	]
+	start = time.perf_counter()
+	vertex_total = 0
+	for path in paths:
+		vertex_total += reader.peek(path)["vertex_count"]
+	elapsed = time.perf_counter() - start
+	print(f"Peeked {len(paths)} files ({vertex_total} vertices) in {elapsed:.3f}s")
+
+
+def main():
+	reader = common.load_module('reader')
+
+	argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+	if argv:
+		scan(reader, argv[0])
+		return
+
+	with tempfile.TemporaryDirectory() as directory:
+		for i in range(1000):
+			with open(os.path.join(directory, f"mesh{i}.bob"), 'wb') as file:
+				file.write(common.make_bob_bytes(5_000, 8_000, seed=i))
+		scan(reader, directory)
+
+
+if __name__ == "__main__":
+	main()
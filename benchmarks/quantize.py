@@ -0,0 +1,83 @@
+"""
+Microbenchmark of the vectorized uv / normal quantization against the
+scalar `quantize.map_range` calls it replaced, at 1M elements, and the
+round trip error. `tests/test_quantize.py` checks that both produce
+identical integers.
+
+	blender --background --factory-startup --python benchmarks/quantize.py
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common  # noqa: E402
+
+
+def scalar_encode_uvs(map_range, uvs):
+	return [(
+		map_range(u, from_start=0, from_end=1, to_start=0, to_end=65535, clamp=True, precision=0),
+		map_range(v, from_start=1, from_end=0, to_start=0, to_end=65535, clamp=True, precision=0),
+	) for u, v in uvs.tolist()]
+
+
+def scalar_encode_normals(map_range, normals):
+	return [tuple(
+		map_range(c, from_start=-1, from_end=1, to_start=-32767, to_end=32767, clamp=True, precision=0)
+		for c in normal
+	) for normal in normals.tolist()]
+
+
+def scalar_decode_uvs(map_range, encoded):
+	return [(
+		map_range(u, from_start=0, from_end=65535, to_start=0, to_end=1, clamp=True, precision=6),
+		map_range(v, from_start=0, from_end=65535, to_start=1, to_end=0, clamp=True, precision=6),
+	) for u, v in encoded.tolist()]
+
+
+def scalar_decode_normals(map_range, encoded):
+	return [tuple(
+		map_range(c, from_start=-32767, from_end=32767, to_start=-1, to_end=1, clamp=True, precision=6)
+		for c in normal
+	) for normal in encoded.tolist()]
+
+
+def main():
+	quantize = common.load_module('quantize')
+	map_range = quantize.map_range
+
+	rng = np.random.default_rng(0)
+	element_count = 1_000_000
+	# slightly out of range values exercise the clamping, and exact halves the tie rounding
+	uvs = rng.uniform(-0.01, 1.01, (element_count // 2, 2)).astype(np.float32)
+	uvs[:1000] = (rng.integers(0, 65535, (1000, 2)) + 0.5) / 65535
+	normals = rng.normal(size=(element_count // 3, 3))
+	normals = (normals / np.linalg.norm(normals, axis=1, keepdims=True)).astype(np.float32)
+
+	encoded_uvs = quantize.encode_uvs(uvs)
+	encoded_normals = quantize.encode_normals(normals)
+
+	print(f"{element_count} elements")
+	print(f"{'step':>16} {'map_range (s)':>14} {'vectorized (s)':>15} {'speedup':>9}")
+	rows = (
+		("encode uvs", lambda: scalar_encode_uvs(map_range, uvs), lambda: quantize.encode_uvs(uvs)),
+		("encode normals", lambda: scalar_encode_normals(map_range, normals), lambda: quantize.encode_normals(normals)),
+		("decode uvs", lambda: scalar_decode_uvs(map_range, encoded_uvs), lambda: quantize.decode_uvs(encoded_uvs)),
+		("decode normals", lambda: scalar_decode_normals(map_range, encoded_normals), lambda: quantize.decode_normals(encoded_normals)),
+	)
+	for step, scalar, vectorized in rows:
+		scalar_time = common.timeit(scalar, repeat=1)
+		vectorized_time = common.timeit(vectorized)
+		print(f"{step:>16} {scalar_time:>14.4f} {vectorized_time:>15.5f} {scalar_time / vectorized_time:>8.1f}x")
+
+	in_range_uvs = np.clip(uvs, 0, 1)
+	uv_error = quantize.uv_error(in_range_uvs)
+	normal_error = quantize.normal_error(normals)
+	print(f"uv round trip error:     max {uv_error['max']:.3e} mean {uv_error['mean']:.3e} (bound {quantize.UV_MAX_ERROR:.3e})")
+	print(f"normal round trip error: max {normal_error['max']:.3e} mean {normal_error['mean']:.3e} (bound {quantize.NORMAL_MAX_ERROR:.3e})")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,75 @@
+"""
+LOD chain generation: simplifier run time, triangle counts and error from
+the full mesh of every level, on uv spheres with a uv seam and on noisy
+terrain grids.
+
+	blender --background --factory-startup --python benchmarks/simplify.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common  # noqa: E402
+
+
+def uv_sphere(rings):
+	"""A uv sphere whose seam at longitude 0 splits the vertices, like an exported mesh."""
+	theta = np.linspace(0, np.pi, rings + 1)
+	phi = np.linspace(0, 2 * np.pi, 2 * rings + 1)
+	t, p = np.meshgrid(theta, phi, indexing='ij')
+	positions = np.stack((np.sin(t) * np.cos(p), np.cos(t), np.sin(t) * np.sin(p)), axis=-1).reshape(-1, 3)
+	uvs = np.stack((p / (2 * np.pi), t / np.pi), axis=-1).reshape(-1, 2)
+	# the pole rows and the seam column share positions, weld them like mesh_to_bob does
+	positions[np.abs(positions) < 1e-9] = 0.0
+	index = np.arange(len(positions)).reshape(rings + 1, 2 * rings + 1)
+	a, b = index[:-1, :-1].ravel(), index[:-1, 1:].ravel()
+	c, d = index[1:, 1:].ravel(), index[1:, :-1].ravel()
+	triangles = np.concatenate((np.stack((a, b, c), axis=1), np.stack((a, c, d), axis=1)))
+	keep = np.linalg.norm(np.cross(positions[triangles[:, 1]] - positions[triangles[:, 0]], positions[triangles[:, 2]] - positions[triangles[:, 0]]), axis=1) > 1e-12
+	return positions, uvs, triangles[keep]
+
+
+def terrain(size, seed=0):
+	rng = np.random.default_rng(seed)
+	grid = np.linspace(-10, 10, size + 1)
+	x, z = np.meshgrid(grid, grid)
+	y = np.sin(x * 0.7) * np.cos(z * 0.5) + rng.normal(0, 0.01, x.shape)
+	positions = np.stack((x.ravel(), y.ravel(), z.ravel()), axis=1)
+	uvs = np.stack((x.ravel(), z.ravel()), axis=1) / 20 + 0.5
+	index = np.arange((size + 1) ** 2).reshape(size + 1, size + 1)
+	a, b = index[:-1, :-1].ravel(), index[:-1, 1:].ravel()
+	c, d = index[1:, 1:].ravel(), index[1:, :-1].ravel()
+	return positions, uvs, np.concatenate((np.stack((a, d, c), axis=1), np.stack((a, c, b), axis=1)))
+
+
+def main():
+	simplify = common.load_module('simplify')
+	meshdata = common.load_module('meshdata')
+
+	print(f"{'mesh':>16} {'target':>12} {'time (s)':>9} {'triangles/s':>12}  levels (faces @ error)")
+	for name, (positions, uvs, triangles) in (
+		('sphere 64', uv_sphere(64)),
+		('sphere 256', uv_sphere(256)),
+		('terrain 128', terrain(128)),
+		('terrain 400', terrain(400)),
+	):
+		bob_mesh = meshdata.BobMesh(
+			positions=positions,
+			uvs=np.clip(uvs * 65535, 0, 65535),
+			normals=np.zeros_like(positions),
+			indices=triangles,
+		)
+		for target, options in (('ratio 0.5', dict(target_ratio=0.5)), ('error 0.01', dict(max_error=0.01))):
+			start = time.perf_counter()
+			levels = simplify.lod_chain(bob_mesh, 3, **options)
+			elapsed = time.perf_counter() - start
+			summary = ", ".join(f"{level.face_count} @ {error:.4f}" for level, error in levels)
+			print(f"{name:>16} {target:>12} {elapsed:>9.2f} {bob_mesh.face_count / elapsed:>12.0f}  {bob_mesh.face_count} -> {summary}")
+
+
+if __name__ == "__main__":
+	main()
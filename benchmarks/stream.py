@@ -0,0 +1,50 @@
+"""
+Compare the peak Python/NumPy memory of `reader.stream_stats` at several
+chunk sizes against decoding the whole file with `codec.deserialize_bob`.
+
+	blender --background --factory-startup --python benchmarks/stream.py
+"""
+
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common  # noqa: E402
+
+
+def measure(func, *args, **kwargs):
+	tracemalloc.start()
+	start = time.perf_counter()
+	func(*args, **kwargs)
+	elapsed = time.perf_counter() - start
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return elapsed, peak
+
+
+def main():
+	codec = common.load_module('codec')
+	reader = common.load_module('reader')
+
+	with tempfile.TemporaryDirectory() as directory:
+		path = os.path.join(directory, 'large.bob')
+		with open(path, 'wb') as file:
+			file.write(common.make_bob_bytes(1_000_000, 2_000_000))
+		print(f"file size: {os.path.getsize(path) / 2**20:.1f} MiB")
+
+		def deserialize():
+			with open(path, 'rb') as file:
+				codec.deserialize_bob(file)
+
+		elapsed, peak = measure(deserialize)
+		print(f"{'deserialize':>24} {elapsed:>8.3f}s  peak {peak / 2**20:>8.2f} MiB")
+		for chunk_size in (4_096, 65_536, 1_048_576):
+			elapsed, peak = measure(reader.stream_stats, path, chunk_size=chunk_size)
+			print(f"{f'stream_stats({chunk_size})':>24} {elapsed:>8.3f}s  peak {peak / 2**20:>8.2f} MiB")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,47 @@
+"""
+Vertex cache optimization on shuffled grid meshes: optimizer run time and
+ACMR/ATVR before and after.
+
+	blender --background --factory-startup --python benchmarks/vcache.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common  # noqa: E402
+
+
+def shuffled_grid(size, seed=0):
+	"""A size x size quad grid split into triangles, in random triangle order."""
+	index = np.arange((size + 1) ** 2).reshape(size + 1, size + 1)
+	a, b = index[:-1, :-1].ravel(), index[:-1, 1:].ravel()
+	c, d = index[1:, 1:].ravel(), index[1:, :-1].ravel()
+	triangles = np.concatenate((np.stack((a, b, c), axis=1), np.stack((a, c, d), axis=1)))
+	return triangles[np.random.default_rng(seed).permutation(len(triangles))], (size + 1) ** 2
+
+
+def main():
+	vcache = common.load_module('vcache')
+	meshdata = common.load_module('meshdata')
+
+	print(f"{'triangles':>10} {'time (s)':>9} {'ACMR before':>12} {'ACMR after':>11} {'ATVR before':>12} {'ATVR after':>11}")
+	for size in (50, 100, 230):
+		indices, vertex_count = shuffled_grid(size)
+		bob_mesh = meshdata.BobMesh(
+			positions=np.zeros((vertex_count, 3)),
+			uvs=np.zeros((vertex_count, 2)),
+			normals=np.zeros((vertex_count, 3)),
+			indices=indices,
+		)
+		start = time.perf_counter()
+		_, stats = vcache.optimize_bob_mesh(bob_mesh)
+		elapsed = time.perf_counter() - start
+		print(f"{len(indices):>10} {elapsed:>9.2f} {stats['acmr_before']:>12.3f} {stats['acmr_after']:>11.3f} {stats['atvr_before']:>12.3f} {stats['atvr_after']:>11.3f}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,74 @@
+"""
+Time the grid key vertex welding used by `mesh_to_bob` at 1k to 1M face
+corners, and compare it against the previous linear scan where that
+finishes in reasonable time.
+
+	blender --background --factory-startup --python benchmarks/weld.py
+"""
+
+import os
+import sys
+import math
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common  # noqa: E402
+
+
+def legacy_weld(positions, normals, uvs):
+	def is_same_vertex(vert1, vert2):
+		return (
+			math.dist(vert1["pos"], vert2["pos"]) < 0.001
+			and math.dist(vert1["norm"], vert2["norm"]) < 0.001
+			and math.dist(vert1["uv"], vert2["uv"]) < 0.001
+		)
+
+	vertices = []
+	indices = []
+	for pos, norm, uv in zip(positions.tolist(), normals.tolist(), uvs.tolist()):
+		current_vertex = {"pos": pos, "norm": norm, "uv": uv}
+		for i, vertex in enumerate(vertices):
+			if is_same_vertex(current_vertex, vertex):
+				indices.append(i)
+				break
+		else:
+			vertices.append(current_vertex)
+			indices.append(len(vertices) - 1)
+	return vertices, indices
+
+
+def make_corners(corner_count, seed=0):
+	"""Corners of a closed mesh, every vertex is shared by about 6 corners."""
+	rng = np.random.default_rng(seed)
+	vertex_count = max(corner_count // 6, 1)
+	positions = rng.uniform(-10, 10, (vertex_count, 3))
+	normals = rng.normal(size=(vertex_count, 3))
+	normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+	uvs = rng.uniform(0, 1, (vertex_count, 2))
+	corners = rng.integers(0, vertex_count, corner_count)
+	return positions[corners], normals[corners], uvs[corners]
+
+
+def main():
+	weld = common.load_module('weld')
+
+	print(f"{'corners':>10} {'vertices':>10} {'weld (s)':>10} {'legacy (s)':>12}")
+	for corner_count in (1_000, 10_000, 100_000, 1_000_000):
+		positions, normals, uvs = make_corners(corner_count)
+
+		first, inverse = weld.weld_vertices(positions, normals, uvs)
+		assert np.allclose(positions[first][inverse], positions, atol=0.001)
+		weld_time = common.timeit(weld.weld_vertices, positions, normals, uvs, repeat=3)
+
+		legacy_time = float('nan')
+		if corner_count <= 10_000:
+			vertices, _ = legacy_weld(positions, normals, uvs)
+			assert len(vertices) == len(first)
+			legacy_time = common.timeit(legacy_weld, positions, normals, uvs, repeat=1)
+
+		print(f"{corner_count:>10} {len(first):>10} {weld_time:>10.4f} {legacy_time:>12.4f}")
+
+
+if __name__ == "__main__":
+	main()
@@ -1,23 +1,30 @@
 import os
-import bpy
 
-from . import operators, ui, bob, cob, leveldefs
+
+"""
+The blender modules are imported when the addon is registered, so the
+format code (`codec.py` and the modules it uses) and the command line
+converter can be imported without blender.
+"""
+
 
 addon_dir = os.path.dirname(__file__)
 
+
+def _modules():
+	from . import operators, ui, bob, cob, leveldefs, export_cache
+	return operators, ui, bob, cob, leveldefs, export_cache
+
+
 def register():
-	operators.register()
-	ui.register()
-	bob.register()
-	cob.register()
-	leveldefs.register()
+	import bpy
+	for module in _modules():
+		module.register()
 	bpy.utils.register_preset_path(addon_dir)
 
 
 def unregister():
-	leveldefs.unregister()
-	cob.unregister()
-	bob.unregister()
-	ui.unregister()
-	operators.unregister()
+	import bpy
+	for module in reversed(_modules()):
+		module.unregister()
 	bpy.utils.unregister_preset_path(addon_dir)
@@ -0,0 +1,37 @@
+import os
+import sys
+import importlib
+import importlib.util
+
+
+"""
+Command line entry point, see `convert.py`.
+
+	python bombsquad-tools --help
+	blender --background --python bombsquad-tools/__main__.py -- --help
+
+This file runs as a plain script, so the addon directory is loaded as a
+package here without running `__init__.py` and its addon registration.
+"""
+
+
+def load_package(name='bombsquad_tools'):
+	if name in sys.modules:
+		return sys.modules[name]
+	directory = os.path.dirname(os.path.abspath(__file__))
+	spec = importlib.util.spec_from_file_location(
+		name,
+		os.path.join(directory, '__init__.py'),
+		submodule_search_locations=[directory],
+	)
+	package = importlib.util.module_from_spec(spec)
+	sys.modules[name] = package
+	return package
+
+
+if __name__ == "__main__":
+	package = load_package()
+	convert = importlib.import_module(f"{package.__name__}.convert")
+	status = convert.main()
+	# pass the status on to the shell, also when running inside blender
+	sys.exit(status)
@@ -1,115 +1,73 @@
 import os
-import struct
+import numpy as np
 import bpy
-import bmesh
 import bpy_extras
-# FIXME: IDK why bpy_extras.image_utils does not work
-from bpy_extras import image_utils
 
-from . import utils
+from . import codec, utils, export_cache, overdraw, parallel, quantize, simplify, vcache, writer
 
 
 """
-.BOB File Structure:
-
-MAGIC 45623 (I)
-meshFormat  (I)
-vertexCount (I)
-faceCount   (I)
-VertexObject x vertexCount (fff HH hhh xx)
-index x faceCount*3 (b / H / I)
-
-struct VertexObjectFull {
-	float position[3];
-	bs_uint16 uv[2]; // normalized to 16 bit unsigned ints 0 - 65535
-	bs_sint16 normal[3]; // normalized to 16 bit signed ints -32768 - 32767
-	bs_uint8 _padding[2];
-};
-
-.
-. Blender 3D Coordinates         BombSquad 3D Coordinates
-.
-.       +Z                               +Y
-.       ^                                ^
-.       | ^ +Y                           |
-.       |/                               |
-.       +-----> +X                       +-----> +X
-.                                       /
-.                                      v +Z
-.
-.
-. Blender UV Coordinates         BombSquad UV Coordinates
-.
-.       +Y [0,1]                         +-----> +X Int[0,65535]
-.       ^                                |
-.       |                                |
-.       |                                v
-.       +-----> +X [0,1]                 +Y Int[0,65535]
-.
+Import and export operators for .bob files.
+The file format and the axis conversion are in `codec.py`.
 """
 
 
-BOB_FILE_ID = 45623
+def blender_to_mesh(blender_data, bob_name):
+	"""Create a mesh from the arrays returned by `codec.bob_to_blender`."""
+	positions, indices, corner_uvs, normals = blender_data
 
-bs_to_bl_matrix = bpy_extras.io_utils.axis_conversion(from_forward='-Z', from_up='Y').to_4x4()
-bl_to_bs_matrix = bpy_extras.io_utils.axis_conversion(to_forward='-Z', to_up='Y').to_4x4()
+	mesh = utils.mesh_from_triangles(bob_name, positions, indices)
+
+	uv_layer = mesh.uv_layers.new()
+	uv_layer.data.foreach_set("uv", corner_uvs)
+
+	mesh.validate()
+
+	# custom normals are ignored on flat shaded faces
+	mesh.polygons.foreach_set("use_smooth", np.ones(len(mesh.polygons), dtype=bool))
+	mesh.normals_split_custom_set_from_vertices(normals)
+	mesh.update()
+
+	return mesh
 
 
 def bob_to_mesh(bob_data, bob_name):
-	verts = [vert["pos"] for vert in bob_data["vertices"]]
-	faces = [face["indices"] for face in bob_data["faces"]]
+	return blender_to_mesh(codec.bob_to_blender(bob_data), bob_name)
 
-	mesh = bpy.data.meshes.new(name=bob_name)
-	mesh.from_pydata(verts, [], faces)
 
-	bm = bmesh.new()
-	bm.from_mesh(mesh)
-	bm.faces.ensure_lookup_table()
-	# bm.verts.ensure_lookup_table()
-	
-	for i, face in enumerate(bm.faces):
-		for vi, vert in enumerate(face.verts):
-			normal = bob_data["vertices"][faces[i][vi]]["norm"]
-			vert.normal = (
-				utils.map_range(normal[0], from_start=-32767, from_end=32767, to_start=-1, to_end=1, clamp=True, precision=6),
-				utils.map_range(normal[1], from_start=-32767, from_end=32767, to_start=-1, to_end=1, clamp=True, precision=6),
-				utils.map_range(normal[2], from_start=-32767, from_end=32767, to_start=-1, to_end=1, clamp=True, precision=6),
-			)
-			# bm.verts[vi].normal = vert.normal
-
-	uv_layer = bm.loops.layers.uv.verify()
-	for i, face in enumerate(bm.faces):
-		for vi, vert in enumerate(face.verts):
-			uv = bob_data["vertices"][faces[i][vi]]["uv"]
-			uv = (
-				utils.map_range(uv[0], from_start=0, from_end=65535, to_start=0, to_end=1, clamp=True, precision=6),
-				utils.map_range(uv[1], from_start=0, from_end=65535, to_start=1, to_end=0, clamp=True, precision=6),
-			)
-			face.loops[vi][uv_layer].uv = uv
-
-	bm.transform(bs_to_bl_matrix)
-
-	bm.to_mesh(mesh)
-	bm.free()
+def extract_corners(mesh):
+	"""
+	Read the triangulated corners of `mesh` as arrays in BombSquad space.
 
-	mesh.validate()
-	mesh.update()
+	Returns `(positions, normals, uvs)` with one row per triangle corner,
+	in `mesh.loop_triangles` order. Everything is read with `foreach_get`
+	and converted with a single axis permutation per attribute.
+	"""
+	mesh.calc_loop_triangles()
 
-	return mesh
+	corner_loops = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+	mesh.loop_triangles.foreach_get("loops", corner_loops)
 
+	loop_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+	mesh.loops.foreach_get("vertex_index", loop_vertices)
 
-def _find_index(lst, ref_item, comparator):
-	for i, item in enumerate(lst):
-		if comparator(ref_item, item):
-			return i
-	return -1
+	vertex_positions = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+	mesh.vertices.foreach_get("co", vertex_positions)
+	vertex_positions = vertex_positions.reshape(-1, 3)
 
+	loop_normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+	mesh.corner_normals.foreach_get("vector", loop_normals)
+	loop_normals = loop_normals.reshape(-1, 3)
 
-def _is_same_vertex(vert1, vert2):
-	is_same_pos = (vert1["pos"] - vert2["pos"]).length < 0.001
-	is_same_norm = (vert1["norm"] - vert2["norm"]).length < 0.001
-	is_same_uv = (vert1["uv"] - vert2["uv"]).length < 0.001
-	return is_same_pos and is_same_norm and is_same_uv
+	loop_uvs = np.zeros((len(mesh.loops), 2), dtype=np.float32)
+	if len(mesh.uv_layers) > 0:
+		mesh.uv_layers[0].data.foreach_get("uv", loop_uvs.reshape(-1))
+
+	corner_positions = codec.blender_to_bombsquad(vertex_positions[loop_vertices[corner_loops]])
+	corner_normals = codec.blender_to_bombsquad(loop_normals[corner_loops])
+	corner_uvs = loop_uvs[corner_loops]
+
+	return corner_positions, corner_normals, corner_uvs
 
 
 def mesh_to_bob(mesh):
@@ -125,138 +83,92 @@ def mesh_to_bob(mesh):
 	To work around this limitation,
 	we create a new vertex whenever we encounter a vertex with different uv coordinates.
 	This is also call "Rip Vertex" or "Split Edge" in blender,
-	but here we implement it manually.
+	but here we implement it manually:
+	every face corner becomes a vertex, and corners with matching
+	position, normal and uv are welded back together afterwards.
 	"""
 
-	vertices = []
-	faces = []
-
-	bm = bmesh.new()
-	bm.from_mesh(mesh)
-	bm.faces.ensure_lookup_table()
-	# bm.verts.ensure_lookup_table()
-
-	bm.transform(bl_to_bs_matrix)
-
-	bmesh.ops.triangulate(bm, faces=bm.faces)
-
-	uv_layer = None
-	if len(bm.loops.layers.uv) > 0:
-		uv_layer = bm.loops.layers.uv[0]
-	for i, face in enumerate(bm.faces):
-		faceverts = []
-		for vi, vert in enumerate(face.verts):
-			uv = face.loops[vi][uv_layer].uv if uv_layer else (0, 0)
-			# orig_vert = bm.verts[vi]
-			current_vertex = {
-				"pos": vert.co,
-				"uv":  uv,
-				"norm": vert.normal,
-			}
-			index = _find_index(vertices, current_vertex, _is_same_vertex)
-			if index == -1:
-				vertices.append(current_vertex)
-				faceverts.append(len(vertices) - 1)
-			else:
-				faceverts.append(index)
-		faces.append({
-			"indices": faceverts
-		})
-
-	bm.free()
-
-	return {
-		"vertices": [{
-			"pos": vertex["pos"],
-			"uv": (
-				utils.map_range(vertex["uv"][0], from_start=0, from_end=1, to_start=0, to_end=65535, clamp=True, precision=0),
-				utils.map_range(vertex["uv"][1], from_start=1, from_end=0, to_start=0, to_end=65535, clamp=True, precision=0),
-			),
-			"norm": (
-				utils.map_range(vertex["norm"][0], from_start=-1, from_end=1, to_start=-32767, to_end=32767, clamp=True, precision=0),
-				utils.map_range(vertex["norm"][1], from_start=-1, from_end=1, to_start=-32767, to_end=32767, clamp=True, precision=0),
-				utils.map_range(vertex["norm"][2], from_start=-1, from_end=1, to_start=-32767, to_end=32767, clamp=True, precision=0),
-			),
-		} for vertex in vertices],
-		"faces": faces,
-	}
-
-
-def serialize(data, file):
-	def writestruct(s, *args):
-		file.write(struct.pack(s, *args))
-
-	vertexCount = len(data["vertices"])
-	faceCount = len(data["faces"])
-	meshFormat = 1 if vertexCount < 65536 else 2
-
-	writestruct('<I', BOB_FILE_ID)
-	writestruct('<I', meshFormat)
-	writestruct('<I', vertexCount)
-	writestruct('<I', faceCount)
-
-	for vert in data["vertices"]:
-		writestruct('<fff', vert["pos"][0], vert["pos"][1], vert["pos"][2])
-		writestruct('<HH', vert["uv"][0], vert["uv"][1])
-		writestruct('<hhh', vert["norm"][0], vert["norm"][1], vert["norm"][2])
-		writestruct('xx')
-
-	for face in data["faces"]:
-		writestruct('<HHH' if meshFormat == 1 else '<III', face["indices"][0], face["indices"][1], face["indices"][2])
-
-	return
-
-
-def deserialize(file):
-	def readstruct(s):
-		tup = struct.unpack(s, file.read(struct.calcsize(s)))
-		return tup[0] if len(tup) == 1 else tup
-
-	assert readstruct("<I") == BOB_FILE_ID
-	meshFormat = readstruct("<I")
-	assert meshFormat in [0, 1, 2]
-
-	vertexCount = readstruct("<I")
-	faceCount = readstruct("<I")
-
-	vertices = []
-	faces = []
-
-	for i in range(vertexCount):
-		pos = readstruct("<fff")
-		uv = readstruct("<HH")
-		norm = readstruct("<hhh")
-		readstruct("xx")
-		vertices.append({
-			"pos": pos,
-			"uv": uv,
-			"norm": norm,
-		})
-
-	for i in range(faceCount):
-		if meshFormat == 0:
-			# MESH_FORMAT_UV16_N8_INDEX8
-			indices = readstruct("<bbb")
-			faces.append({
-				"indices": indices
-			})
-		elif meshFormat == 1:
-			# MESH_FORMAT_UV16_N8_INDEX16
-			indices = readstruct("<HHH")
-			faces.append({
-				"indices": indices
-			})
-		elif meshFormat == 2:
-			# MESH_FORMAT_UV16_N8_INDEX32
-			indices = readstruct("<III")
-			faces.append({
-				"indices": indices
-			})
-
-	return {
-		"vertices": vertices,
-		"faces": faces,
-	}
+	return codec.corners_to_bob(*extract_corners(mesh))
+
+
+def optimize_for_export(name, bob_data, camera_region, options):
+	"""Run the optimization selected in the export `options`. Returns the mesh and the messages for `utils.report_messages`."""
+	messages = []
+	# an empty mesh has no triangle order to optimize, and no bounds to fall back to
+	if bob_data.face_count == 0:
+		return bob_data, messages
+
+	if options['optimize_overdraw']:
+		if camera_region is None:
+			lower = bob_data.positions.min(axis=0)
+			upper = bob_data.positions.max(axis=0)
+			camera_region = (lower + upper) / 2, (upper - lower) / 2
+		bob_data, stats = overdraw.optimize_bob_mesh(bob_data, *camera_region)
+		messages.append((
+			'INFO',
+			f"Optimized overdraw of `{name}` with {stats['clusters']} clusters: overdraw {stats['overdraw_before']:.3f} -> {stats['overdraw_after']:.3f}, ACMR {stats['acmr_before']:.3f} -> {stats['acmr_after']:.3f}",
+			f"`{name}`: overdraw {stats['overdraw_before']:.3f} -> {stats['overdraw_after']:.3f}, ACMR {stats['acmr_before']:.3f} -> {stats['acmr_after']:.3f}",
+		))
+
+	elif options['optimize_vertex_cache']:
+		bob_data, stats = vcache.optimize_bob_mesh(bob_data)
+		messages.append((
+			'INFO',
+			f"Optimized vertex cache of `{name}`: ACMR {stats['acmr_before']:.3f} -> {stats['acmr_after']:.3f}, ATVR {stats['atvr_before']:.3f} -> {stats['atvr_after']:.3f}",
+			f"`{name}`: ACMR {stats['acmr_before']:.3f} -> {stats['acmr_after']:.3f}, ATVR {stats['atvr_before']:.3f} -> {stats['atvr_after']:.3f}",
+		))
+
+	return bob_data, messages
+
+
+def encode_for_export(job):
+	"""
+	Everything of a .bob export after the mesh is read: weld, quantize,
+	generate LODs, optimize and write the files of one object.
+	This does not touch `bpy`, so it can run in a worker thread.
+
+	`job` is made by `EXPORT_MESH_OT_bombsquad_bob.prepare_export`.
+	Returns the messages for `utils.report_messages` and the paths of the written files.
+	"""
+	name, filepath, options = job['name'], job['filepath'], job['options']
+	messages = []
+
+	bob_data = codec.corners_to_bob(*job['corners'])
+	levels = [(filepath, bob_data)]
+
+	_, corner_normals, corner_uvs = job['corners']
+	uv_error = quantize.uv_error(corner_uvs)
+	normal_error = quantize.normal_error(corner_normals)
+	message = f"Quantized `{name}`: uv error max {uv_error['max']:.2e} mean {uv_error['mean']:.2e}, normal error max {normal_error['max']:.2e} mean {normal_error['mean']:.2e}"
+	if uv_error['max'] > quantize.UV_MAX_ERROR:
+		# only uvs outside of [0, 1] are off by more than half a step, they are clamped
+		messages.append(('WARNING', message, f"`{name}` has uvs outside of 0 - 1, they are clamped (error up to {uv_error['max']:.3f})"))
+	else:
+		messages.append(('INFO', message, None))
+
+	if options['lod_count'] > 0:
+		chain = simplify.lod_chain(
+			bob_data,
+			options['lod_count'],
+			target_ratio=options['lod_ratio'] if options['lod_target'] == 'RATIO' else None,
+			max_error=options['lod_error'] if options['lod_target'] == 'ERROR' else None,
+		)
+		root, ext = os.path.splitext(filepath)
+		for level, (lod_data, error) in enumerate(chain, start=1):
+			messages.append(('INFO', f"Generated LOD {level} of `{name}` with {lod_data.face_count} of {bob_data.face_count} faces, at most {error:.4f} from the full mesh", None))
+			levels.append((f"{root}{options['lod_suffix']}{level}{ext}", lod_data))
+		messages.append(('INFO', f"LOD chain of `{name}`: {' -> '.join(str(data.face_count) for _, data in levels)} faces", f"`{name}`: {' -> '.join(str(data.face_count) for _, data in levels)} faces"))
+
+	files = []
+	for level_filepath, level_data in levels:
+		level_data, optimize_messages = optimize_for_export(name, level_data, job['camera_region'], options)
+		messages += optimize_messages
+		level_filepath = os.fsencode(level_filepath)
+		writer.write_bob(level_filepath, level_data)
+		files.append(level_filepath)
+		messages.append(('INFO', f"Exported object `{name}` to `{level_filepath}`", None))
+
+	return messages, files
 
 
 class IMPORT_MESH_OT_bombsquad_bob(bpy.types.Operator, bpy_extras.io_utils.ImportHelper):
@@ -346,9 +258,14 @@ class IMPORT_MESH_OT_bombsquad_bob(bpy.types.Operator, bpy_extras.io_utils.Impor
 			'ba_data_dir': ba_data_dir,
 		}
 
+		# files are read and decoded in a worker pool, meshes are created here in the selected order
 		ret = {'CANCELLED'}
-		for file_path in selected_files:
-			if self.import_bob(context, file_path, collection=collection, execution_context=execution_context, **keywords) == {'FINISHED'}:
+		for file_path, (blender_data, error) in zip(selected_files, parallel.map_ordered(codec.load_bob, selected_files, workers=parallel.file_workers(selected_files))):
+			if error is not None:
+				print(f"{self.__class__.__name__}: [ERROR] Could not decode `{file_path}`: {error!r}")
+				self.report({'WARNING'}, f"The file `{file_path}` was not imported.")
+				continue
+			if self.import_bob(context, file_path, blender_data, collection=collection, execution_context=execution_context, **keywords) == {'FINISHED'}:
 				ret = {'FINISHED'}
 			else:
 				self.report({'WARNING'}, f"The file `{file_path}` was not imported.")
@@ -365,16 +282,12 @@ class IMPORT_MESH_OT_bombsquad_bob(bpy.types.Operator, bpy_extras.io_utils.Impor
 
 		return {'FINISHED'}
 
-	def import_bob(self, context, filepath, collection=None, execution_context=None, **options):
+	def import_bob(self, context, filepath, blender_data, collection=None, execution_context=None, **options):
 		print(f"{self.__class__.__name__}: [INFO] Importing `{filepath}` with options {options} and execution context {execution_context}")
 		filepath = os.fsencode(filepath)
-		
-		bob_data = None
-		with open(filepath, 'rb') as file:
-			bob_data = deserialize(file)
 
 		bob_name = bpy.path.display_name_from_filepath(filepath)
-		mesh = bob_to_mesh(bob_data=bob_data, bob_name=bob_name)
+		mesh = blender_to_mesh(blender_data, bob_name=bob_name)
 
 		if not mesh:
 			return {'CANCELLED'}
@@ -398,6 +311,9 @@ class IMPORT_MESH_OT_bombsquad_bob(bpy.types.Operator, bpy_extras.io_utils.Impor
 		imported_texture_image = None
 		imported_mask_image = None
 		if options['import_matching_textures']:
+			# FIXME: IDK why bpy_extras.image_utils does not work
+			from bpy_extras import image_utils
+
 			assert execution_context is not None
 			assert 'dirname' in execution_context
 			assert 'ba_data_dir' in execution_context
@@ -514,6 +430,65 @@ class EXPORT_MESH_OT_bombsquad_bob(bpy.types.Operator, bpy_extras.io_utils.Expor
 		default=True,
 	)
 
+	optimize_vertex_cache: bpy.props.BoolProperty(
+		name="Optimize Vertex Cache",
+		description="Reorder triangles and vertices so the GPU can reuse transformed vertices. Slower to export, faster to render",
+		default=False,
+	)
+
+	optimize_overdraw: bpy.props.BoolProperty(
+		name="Optimize Overdraw",
+		description="Also sort triangle clusters front to back as seen from the `area_of_interest_bounds` of the scene, so hidden surfaces are shaded less often. Implies Optimize Vertex Cache",
+		default=False,
+	)
+
+	lod_count: bpy.props.IntProperty(
+		name="LOD Levels",
+		description="Number of simplified levels of detail to export next to every mesh",
+		default=0,
+		min=0,
+		max=8,
+	)
+
+	lod_target: bpy.props.EnumProperty(
+		items=(
+			('RATIO', 'Triangle Ratio', "Every level keeps a fixed ratio of the triangles of the previous level"),
+			('ERROR', 'Error Budget', "Every level removes as many triangles as possible while its surface stays within the error budget of the full mesh. The budget doubles with every level"),
+		),
+		default='RATIO',
+		name="LOD Target",
+	)
+
+	lod_ratio: bpy.props.FloatProperty(
+		name="LOD Ratio",
+		description="Ratio of the triangles of the previous level that every level keeps",
+		default=0.5,
+		min=0.01,
+		max=1.0,
+		subtype='FACTOR',
+	)
+
+	lod_error: bpy.props.FloatProperty(
+		name="LOD Error",
+		description="How far the surface of the first level may move from the full mesh, every further level may move twice as far as the one before",
+		default=0.01,
+		min=0.0,
+		precision=4,
+		subtype='DISTANCE',
+	)
+
+	lod_suffix: bpy.props.StringProperty(
+		name="LOD Suffix",
+		description="Added to the file name of every level, followed by the level number",
+		default="_lod",
+	)
+
+	skip_unchanged: bpy.props.BoolProperty(
+		name="Skip Unchanged",
+		description="When exporting a collection, skip objects whose mesh and export options did not change since their last export in this session",
+		default=True,
+	)
+
 	@classmethod
 	def poll(cls, context):
 		return context.active_object is not None
@@ -539,7 +514,13 @@ class EXPORT_MESH_OT_bombsquad_bob(bpy.types.Operator, bpy_extras.io_utils.Expor
 			else:
 				print(f"{self.__class__.__name__}: [INFO] Exporting collection `{collection.name}` with {len(objects)} objects")
 
-			ret = {'CANCELLED'}
+			# meshes are evaluated and read here, everything after that runs in a worker pool
+			# the camera region is part of the settings, moving the area of interest does not touch the objects
+			camera_region = self.camera_region(context) if self.optimize_overdraw else None
+			settings = export_cache.settings_key('bob', dict(keywords, camera_region=camera_region))
+			jobs = []
+			failed = []
+			skipped = 0
 			for obj in objects:
 				if not obj.data:
 					# skip empty
@@ -547,10 +528,48 @@ class EXPORT_MESH_OT_bombsquad_bob(bpy.types.Operator, bpy_extras.io_utils.Expor
 				dirname = os.path.dirname(self.filepath)
 				filename = bpy.path.display_name_to_filepath(obj.name) + '.bob'
 				filepath = os.path.join(dirname, filename)
-				if self.export_bob(context, obj, filepath, **keywords) == {'FINISHED'}:
-					ret = {'FINISHED'}
-				else:
-					self.report({'WARNING'}, f"The file `{path}` was not exported.")
+
+				if self.skip_unchanged and export_cache.is_untouched('bob', obj.session_uid, filepath, settings):
+					print(f"{self.__class__.__name__}: [INFO] Skipping `{obj.name}`, it did not change since the last export.")
+					skipped += 1
+					continue
+
+				try:
+					change = export_cache.change_number(obj.session_uid)
+					job = self.prepare_export(context, obj, filepath, camera_region, **keywords)
+				except Exception as error:
+					failed.append((obj.name, filepath, error))
+					continue
+
+				if self.skip_unchanged:
+					job['content'] = export_cache.content_key(settings, job['corners'])
+					job['change'] = change
+					if export_cache.is_unchanged('bob', obj.session_uid, filepath, job['content']):
+						print(f"{self.__class__.__name__}: [INFO] Skipping `{obj.name}`, its mesh did not change since the last export.")
+						export_cache.update_change('bob', obj.session_uid, change)
+						skipped += 1
+						continue
+				jobs.append(job)
+
+			ret = {'FINISHED'} if skipped else {'CANCELLED'}
+			exported = 0
+			for job, (result, error) in zip(jobs, parallel.map_ordered(encode_for_export, jobs)):
+				if error is not None:
+					failed.append((job['name'], job['filepath'], error))
+					continue
+				messages, files = result
+				utils.report_messages(self, messages)
+				if self.skip_unchanged:
+					export_cache.store('bob', job['uid'], job['filepath'], settings, job['content'], job['change'], files)
+				exported += 1
+				ret = {'FINISHED'}
+
+			for name, filepath, error in failed:
+				print(f"{self.__class__.__name__}: [ERROR] Could not export `{name}`: {error!r}")
+				self.report({'WARNING'}, f"The file `{filepath}` was not exported.")
+
+			print(f"{self.__class__.__name__}: [INFO] Exported {exported} objects, skipped {skipped} unchanged objects.")
+			self.report({'INFO'}, f"Exported {exported} objects, skipped {skipped} unchanged")
 			return ret
 		
 		else:
@@ -567,6 +586,13 @@ class EXPORT_MESH_OT_bombsquad_bob(bpy.types.Operator, bpy_extras.io_utils.Expor
 			return self.export_bob(context, obj, self.filepath, **keywords)
 
 	def export_bob(self, context, obj, filepath, **options):
+		camera_region = self.camera_region(context) if options['optimize_overdraw'] else None
+		messages, _ = encode_for_export(self.prepare_export(context, obj, filepath, camera_region, **options))
+		utils.report_messages(self, messages)
+		return {'FINISHED'}
+
+	def prepare_export(self, context, obj, filepath, camera_region, **options):
+		"""Evaluate `obj` and read its arrays into a job for `encode_for_export`. `camera_region` comes from `camera_region`, None without overdraw optimization."""
 		print(f"{self.__class__.__name__}: [INFO] Exporting object `{obj.name}` to `{filepath}`")
 
 		mesh = utils.obj_to_mesh(
@@ -575,15 +601,29 @@ class EXPORT_MESH_OT_bombsquad_bob(bpy.types.Operator, bpy_extras.io_utils.Expor
 			apply_modifiers=options['apply_modifiers'],
 			apply_object_transformations=options['apply_object_transformations'],
 		)
-		bob_data = mesh_to_bob(mesh)
-
-		filepath = os.fsencode(filepath)
-		with open(filepath, 'wb') as file:
-			serialize(bob_data, file)
-
-		print(f"{self.__class__.__name__}: [INFO] Exported object `{obj.name}` to `{filepath}`")
+		return {
+			'name': obj.name,
+			'uid': obj.session_uid,
+			'filepath': filepath,
+			'corners': extract_corners(mesh),
+			'camera_region': camera_region,
+			'options': options,
+		}
 
-		return {'FINISHED'}
+	def camera_region(self, context):
+		"""
+		Center and half size of the `area_of_interest_bounds` empty in bombsquad coordinates.
+		None if the scene has none, the bounds of the mesh are used instead.
+		"""
+		for obj in context.scene.objects:
+			if obj.type == 'EMPTY' and obj.name.split('.')[0] == 'area_of_interest_bounds':
+				center = codec.blender_to_bombsquad(np.array([obj.matrix_world.to_translation()]))[0]
+				half_size = [abs(n) for n in obj.matrix_world.to_scale().xzy]
+				return tuple(center.tolist()), half_size
+
+		print(f"{self.__class__.__name__}: [WARN] No `area_of_interest_bounds` in the scene. Using the mesh bounds as camera region for overdraw optimization.")
+		self.report({'WARNING'}, f"No `area_of_interest_bounds` in the scene. Using the mesh bounds as camera region for overdraw optimization.")
+		return None
 
 	def draw(self, context):
 		is_file_browser = context.space_data.type == 'FILE_BROWSER'
@@ -611,6 +651,17 @@ class EXPORT_MESH_OT_bombsquad_bob(bpy.types.Operator, bpy_extras.io_utils.Expor
 	def draw_props(self, layout):
 		layout.prop(self, 'apply_object_transformations')
 		layout.prop(self, 'apply_modifiers')
+		layout.prop(self, 'skip_unchanged')
+		layout.prop(self, 'optimize_vertex_cache')
+		layout.prop(self, 'optimize_overdraw')
+		layout.prop(self, 'lod_count')
+		if self.lod_count > 0:
+			layout.prop(self, 'lod_target')
+			if self.lod_target == 'RATIO':
+				layout.prop(self, 'lod_ratio')
+			else:
+				layout.prop(self, 'lod_error')
+			layout.prop(self, 'lod_suffix')
 
 
 # Enables importing files by draggin and dropping into the blender UI
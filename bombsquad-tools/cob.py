@@ -1,44 +1,24 @@
+import math
 import os
-import struct
+import numpy as np
 import bpy
-import bmesh
 import bpy_extras
 
-from . import utils
+from . import codec, collision, export_cache, parallel, utils, writer
+from .meshdata import CobMesh
 
 
 """
-.COB File Structure:
-
-MAGIC 13466 (I)
-vertexCount (I)
-faceCount   (I)
-vertexPos x vertexCount (fff)
-index x faceCount*3 (I)
-normal x faceCount (fff)
+Import and export operators for .cob files.
+The file format and the axis conversion are in `codec.py`.
 """
 
 
-COB_FILE_ID = 13466
+def blender_to_mesh(blender_data, cob_name):
+	"""Create a mesh from the arrays returned by `codec.cob_to_blender`."""
+	positions, indices = blender_data
 
-bs_to_bl_matrix = bpy_extras.io_utils.axis_conversion(from_forward='-Z', from_up='Y').to_4x4()
-bl_to_bs_matrix = bpy_extras.io_utils.axis_conversion(to_forward='-Z', to_up='Y').to_4x4()
-
-
-def cob_to_mesh(cob_data, cob_name):
-	verts = [vert["pos"] for vert in cob_data["vertices"]]
-	faces = [face["indices"] for face in cob_data["faces"]]
-	
-	mesh = bpy.data.meshes.new(name=cob_name)
-	mesh.from_pydata(verts, [], faces)
-
-	bm = bmesh.new()
-	bm.from_mesh(mesh)
-
-	bm.transform(bs_to_bl_matrix)
-
-	bm.to_mesh(mesh)
-	bm.free()
+	mesh = utils.mesh_from_triangles(cob_name, positions, indices)
 
 	mesh.validate()
 	mesh.update()
@@ -46,104 +26,74 @@ def cob_to_mesh(cob_data, cob_name):
 	return mesh
 
 
-def mesh_to_cob(mesh):
-	vertices = []
-	faces = []
-	normals = []
-
-	bm = bmesh.new()
-	bm.from_mesh(mesh)
-	bm.faces.ensure_lookup_table()
-
-	bm.transform(bl_to_bs_matrix)
-
-	bmesh.ops.triangulate(bm, faces=bm.faces)
-
-	for i, vert in enumerate(bm.verts):
-		vertices.append({
-			"pos": vert.co
-		})
-
-	for i, face in enumerate(bm.faces):
-		faceverts = []
-		for vi, vert in enumerate(face.verts):
-			faceverts.append(vert.index)
-		faces.append({
-			"indices": faceverts
-		})
-		normals.append({
-			"dir": face.normal
-		})
-
-	bm.free()
-
-	return {
-		"vertices": vertices,
-		"faces": faces,
-		"normals": normals,
-	}
-
-
-def serialize(data, file):
-	def writestruct(s, *args):
-		file.write(struct.pack(s, *args))
+def cob_to_mesh(cob_data, cob_name):
+	return blender_to_mesh(codec.cob_to_blender(cob_data), cob_name)
 
-	vertexCount = len(data["vertices"])
-	faceCount = len(data["faces"])
 
-	writestruct('<I', COB_FILE_ID)
-	writestruct('<I', vertexCount)
-	writestruct('<I', faceCount)
+def mesh_to_cob(mesh, weld_distance=collision.DEFAULT_WELD_DISTANCE):
+	"""
+	Convert a blender mesh into a cleaned up `CobMesh`, see `collision.clean_collision`.
+	Returns the `CobMesh` and a dict of cleanup stats.
+	"""
+	return collision.clean_collision(extract_triangles(mesh), weld_distance)
 
-	for vert in data["vertices"]:
-		writestruct('<fff', vert["pos"][0], vert["pos"][1], vert["pos"][2])
 
-	for face in data["faces"]:
-		writestruct('<III', face["indices"][0], face["indices"][1], face["indices"][2])
+def extract_triangles(mesh):
+	"""Read the triangulated positions of `mesh` into a `CobMesh` in BombSquad space, without normals."""
+	mesh.calc_loop_triangles()
 
-	for normal in data["normals"]:
-		writestruct('<fff', normal["dir"][0], normal["dir"][1], normal["dir"][2])
+	indices = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+	mesh.loop_triangles.foreach_get("vertices", indices)
+	indices = indices.reshape(-1, 3)
 
-	return
+	positions = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+	mesh.vertices.foreach_get("co", positions)
 
+	positions = codec.blender_to_bombsquad(positions.reshape(-1, 3))
 
-def deserialize(file):
-	def readstruct(s):
-		tup = struct.unpack(s, file.read(struct.calcsize(s)))
-		return tup[0] if len(tup) == 1 else tup
+	return CobMesh(positions=positions, indices=indices)
 
-	assert readstruct("<I") == COB_FILE_ID
 
-	vertexCount = readstruct("<I")
-	faceCount = readstruct("<I")
+def encode_for_export(job):
+	"""
+	Everything of a .cob export after the mesh is read: clean up, simplify
+	and write the file of one object.
+	This does not touch `bpy`, so it can run in a worker thread.
 
-	vertices = []
-	faces = []
-	normals = []
+	`job` is made by `EXPORT_MESH_OT_bombsquad_cob.prepare_export`.
+	Returns the messages for `utils.report_messages` and the paths of the written files.
+	"""
+	name, filepath, options = job['name'], job['filepath'], job['options']
+	messages = []
 
-	for i in range(vertexCount):
-		pos = readstruct("<fff")
-		vertices.append({
-			"pos": pos,
-		})
+	cob_data, stats = collision.clean_collision(job['cob_data'], options['weld_distance'])
+	messages.append((
+		'INFO',
+		f"Cleaned up `{name}`: removed {stats['vertices_removed']} of {stats['vertices_before']} vertices and {stats['faces_removed']} of {stats['faces_before']} faces ({stats['degenerate_removed']} degenerate, {stats['duplicates_removed']} duplicate)",
+		f"`{name}`: removed {stats['vertices_removed']} vertices and {stats['faces_removed']} faces" if stats['vertices_removed'] or stats['faces_removed'] else None,
+	))
 
-	for i in range(faceCount):
-		indices = readstruct("<III")
-		faces.append({
-			"indices": indices
-		})
+	if options['simplify_collision']:
+		cob_data, stats = collision.derive_collision(
+			cob_data,
+			max_triangles=options['collision_budget'] if options['collision_target'] == 'BUDGET' else None,
+			max_error=options['collision_error'] if options['collision_target'] == 'ERROR' else None,
+			min_size=options['collision_min_size'],
+			coplanar_angle=options['collision_coplanar_angle'],
+			flatten_tolerance=options['collision_error'],
+		)
+		reduction = 1 - stats['faces_after'] / max(stats['faces_before'], 1)
+		messages.append((
+			'INFO',
+			f"Simplified collision of `{name}` from {stats['faces_before']} to {stats['faces_after']} faces ({reduction:.1%} fewer), error {stats['error']:.4f}, {stats['parts_dropped']} small parts dropped, {stats['vertices_flattened']} vertices flattened",
+			f"`{name}`: collision {stats['faces_before']} -> {stats['faces_after']} faces ({reduction:.1%} fewer)",
+		))
 
-	for i in range(faceCount):
-		indices = readstruct("<fff")
-		normals.append({
-			"dir": indices
-		})
+	filepath = os.fsencode(filepath)
+	writer.write_cob(filepath, cob_data)
+	messages.append(('INFO', f"Exported object `{name}` to `{filepath}`", None))
 
-	return {
-		"vertices": vertices,
-		"faces": faces,
-		"normals": normals,
-	}
+	return messages, [filepath]
 
 
 class IMPORT_MESH_OT_bombsquad_cob(bpy.types.Operator, bpy_extras.io_utils.ImportHelper):
@@ -199,9 +149,14 @@ class IMPORT_MESH_OT_bombsquad_cob(bpy.types.Operator, bpy_extras.io_utils.Impor
 			context.scene.collection.children.link(collection)
 			context.view_layer.update()
 
+		# files are read and decoded in a worker pool, meshes are created here in the selected order
 		ret = {'CANCELLED'}
-		for file_path in selected_files:
-			if self.import_cob(context, file_path, collection=collection, **keywords) == {'FINISHED'}:
+		for file_path, (blender_data, error) in zip(selected_files, parallel.map_ordered(codec.load_cob, selected_files, workers=parallel.file_workers(selected_files))):
+			if error is not None:
+				print(f"{self.__class__.__name__}: [ERROR] Could not decode `{file_path}`: {error!r}")
+				self.report({'WARNING'}, f"The file `{file_path}` was not imported.")
+				continue
+			if self.import_cob(context, file_path, blender_data, collection=collection, **keywords) == {'FINISHED'}:
 				ret = {'FINISHED'}
 			else:
 				self.report({'WARNING'}, f"The file `{file_path}` was not imported.")
@@ -215,16 +170,12 @@ class IMPORT_MESH_OT_bombsquad_cob(bpy.types.Operator, bpy_extras.io_utils.Impor
 
 		return {'FINISHED'}
 
-	def import_cob(self, context, filepath, collection=None, **options):
+	def import_cob(self, context, filepath, blender_data, collection=None, **options):
 		print(f"{self.__class__.__name__}: [INFO] Importing `{filepath}`")
 		filepath = os.fsencode(filepath)
 
-		cob_data = None
-		with open(filepath, 'rb') as file:
-			cob_data = deserialize(file)
-
 		cob_name = bpy.path.display_name_from_filepath(filepath)
-		mesh = cob_to_mesh(cob_data=cob_data, cob_name=cob_name)
+		mesh = blender_to_mesh(blender_data, cob_name=cob_name)
 
 		if not mesh:
 			return {'CANCELLED'}
@@ -276,6 +227,70 @@ class EXPORT_MESH_OT_bombsquad_cob(bpy.types.Operator, bpy_extras.io_utils.Expor
 		default=True,
 	)
 
+	weld_distance: bpy.props.FloatProperty(
+		name="Weld Distance",
+		description="Vertices closer than this are merged. Degenerate and duplicate faces are always removed",
+		default=collision.DEFAULT_WELD_DISTANCE,
+		min=0.0,
+		precision=5,
+		subtype='DISTANCE',
+	)
+
+	simplify_collision: bpy.props.BoolProperty(
+		name="Simplify Collision",
+		description="Derive a simplified collision mesh from the visual geometry. Dense collision meshes slow down the physics of the game",
+		default=False,
+	)
+
+	collision_target: bpy.props.EnumProperty(
+		items=(
+			('BUDGET', 'Triangle Budget', "Simplify down to a fixed number of triangles"),
+			('ERROR', 'Error Tolerance', "Remove as many triangles as possible while the surface moves less than the error tolerance"),
+		),
+		default='ERROR',
+		name="Collision Target",
+	)
+
+	collision_budget: bpy.props.IntProperty(
+		name="Triangle Budget",
+		description="Number of triangles the collision mesh is simplified to",
+		default=1000,
+		min=1,
+	)
+
+	collision_error: bpy.props.FloatProperty(
+		name="Error Tolerance",
+		description="How far the collision surface may move from the visual mesh. With a triangle budget this only limits the flattening of near coplanar regions",
+		default=0.05,
+		min=0.0,
+		precision=3,
+		subtype='DISTANCE',
+	)
+
+	collision_coplanar_angle: bpy.props.FloatProperty(
+		name="Coplanar Angle",
+		description="Adjacent faces bending less than this are flattened into one plane",
+		default=float(collision.DEFAULT_COPLANAR_ANGLE),
+		min=0.0,
+		max=math.radians(45),
+		subtype='ANGLE',
+	)
+
+	collision_min_size: bpy.props.FloatProperty(
+		name="Minimum Part Size",
+		description="Separate parts smaller than this are left out of the collision mesh",
+		default=0.0,
+		min=0.0,
+		precision=3,
+		subtype='DISTANCE',
+	)
+
+	skip_unchanged: bpy.props.BoolProperty(
+		name="Skip Unchanged",
+		description="When exporting a collection, skip objects whose mesh and export options did not change since their last export in this session",
+		default=True,
+	)
+
 	@classmethod
 	def poll(cls, context):
 		return context.active_object is not None
@@ -302,7 +317,11 @@ class EXPORT_MESH_OT_bombsquad_cob(bpy.types.Operator, bpy_extras.io_utils.Expor
 			else:
 				print(f"{self.__class__.__name__}: [INFO] Exporting collection `{collection.name}` with {len(objects)} objects")
 
-			ret = {'CANCELLED'}
+			# meshes are evaluated and read here, everything after that runs in a worker pool
+			settings = export_cache.settings_key('cob', keywords)
+			jobs = []
+			failed = []
+			skipped = 0
 			for obj in objects:
 				if not obj.data:
 					# skip empty
@@ -310,10 +329,48 @@ class EXPORT_MESH_OT_bombsquad_cob(bpy.types.Operator, bpy_extras.io_utils.Expor
 				dirname = os.path.dirname(self.filepath)
 				filename = bpy.path.display_name_to_filepath(obj.name) + '.cob'
 				filepath = os.path.join(dirname, filename)
-				if self.export_cob(context, obj, filepath, **keywords) == {'FINISHED'}:
-					ret = {'FINISHED'}
-				else:
-					self.report({'WARNING'}, f"The file `{path}` was not exported.")
+
+				if self.skip_unchanged and export_cache.is_untouched('cob', obj.session_uid, filepath, settings):
+					print(f"{self.__class__.__name__}: [INFO] Skipping `{obj.name}`, it did not change since the last export.")
+					skipped += 1
+					continue
+
+				try:
+					change = export_cache.change_number(obj.session_uid)
+					job = self.prepare_export(context, obj, filepath, **keywords)
+				except Exception as error:
+					failed.append((obj.name, filepath, error))
+					continue
+
+				if self.skip_unchanged:
+					job['content'] = export_cache.content_key(settings, (job['cob_data'].positions, job['cob_data'].indices))
+					job['change'] = change
+					if export_cache.is_unchanged('cob', obj.session_uid, filepath, job['content']):
+						print(f"{self.__class__.__name__}: [INFO] Skipping `{obj.name}`, its mesh did not change since the last export.")
+						export_cache.update_change('cob', obj.session_uid, change)
+						skipped += 1
+						continue
+				jobs.append(job)
+
+			ret = {'FINISHED'} if skipped else {'CANCELLED'}
+			exported = 0
+			for job, (result, error) in zip(jobs, parallel.map_ordered(encode_for_export, jobs)):
+				if error is not None:
+					failed.append((job['name'], job['filepath'], error))
+					continue
+				messages, files = result
+				utils.report_messages(self, messages)
+				if self.skip_unchanged:
+					export_cache.store('cob', job['uid'], job['filepath'], settings, job['content'], job['change'], files)
+				exported += 1
+				ret = {'FINISHED'}
+
+			for name, filepath, error in failed:
+				print(f"{self.__class__.__name__}: [ERROR] Could not export `{name}`: {error!r}")
+				self.report({'WARNING'}, f"The file `{filepath}` was not exported.")
+
+			print(f"{self.__class__.__name__}: [INFO] Exported {exported} objects, skipped {skipped} unchanged objects.")
+			self.report({'INFO'}, f"Exported {exported} objects, skipped {skipped} unchanged")
 			return ret
 
 		else:
@@ -330,6 +387,12 @@ class EXPORT_MESH_OT_bombsquad_cob(bpy.types.Operator, bpy_extras.io_utils.Expor
 			return self.export_cob(context, obj, self.filepath, **keywords)
 
 	def export_cob(self, context, obj, filepath, **options):
+		messages, _ = encode_for_export(self.prepare_export(context, obj, filepath, **options))
+		utils.report_messages(self, messages)
+		return {'FINISHED'}
+
+	def prepare_export(self, context, obj, filepath, **options):
+		"""Evaluate `obj` and read its arrays into a job for `encode_for_export`."""
 		print(f"{self.__class__.__name__}: [INFO] Exporting object `{obj.name}` to `{filepath}`")
 
 		mesh = utils.obj_to_mesh(
@@ -338,15 +401,13 @@ class EXPORT_MESH_OT_bombsquad_cob(bpy.types.Operator, bpy_extras.io_utils.Expor
 			apply_modifiers=options['apply_modifiers'],
 			apply_object_transformations=options['apply_object_transformations'],
 		)
-		cob_data = mesh_to_cob(mesh)
-
-		filepath = os.fsencode(filepath)
-		with open(filepath, 'wb') as file:
-			serialize(cob_data, file)
-
-		print(f"{self.__class__.__name__}: [INFO] Exported object `{obj.name}` to `{filepath}`")
-
-		return {'FINISHED'}
+		return {
+			'name': obj.name,
+			'uid': obj.session_uid,
+			'filepath': filepath,
+			'cob_data': extract_triangles(mesh),
+			'options': options,
+		}
 
 	def draw(self, context):
 		is_file_browser = context.space_data.type == 'FILE_BROWSER'
@@ -374,6 +435,16 @@ class EXPORT_MESH_OT_bombsquad_cob(bpy.types.Operator, bpy_extras.io_utils.Expor
 	def draw_props(self, layout):
 		layout.prop(self, 'apply_object_transformations')
 		layout.prop(self, 'apply_modifiers')
+		layout.prop(self, 'skip_unchanged')
+		layout.prop(self, 'weld_distance')
+		layout.prop(self, 'simplify_collision')
+		if self.simplify_collision:
+			layout.prop(self, 'collision_target')
+			if self.collision_target == 'BUDGET':
+				layout.prop(self, 'collision_budget')
+			layout.prop(self, 'collision_error')
+			layout.prop(self, 'collision_coplanar_angle')
+			layout.prop(self, 'collision_min_size')
 
 
 # Enables importing files by dragging and dropping into the blender UI
@@ -433,7 +504,7 @@ class MESH_OT_CONVERT_TO_COB(bpy.types.Operator):
 			apply_modifiers=keywords['apply_modifiers'],
 			apply_object_transformations=keywords['apply_object_transformations'],
 		)
-		cob_data = mesh_to_cob(export_mesh)
+		cob_data, _ = mesh_to_cob(export_mesh)
 		import_mesh = cob_to_mesh(cob_data=cob_data, cob_name=original_obj.name)
 
 		if not import_mesh:
@@ -0,0 +1,234 @@
+import os
+import struct
+import numpy as np
+
+from . import quantize, weld, writer
+from .meshdata import BobMesh, CobMesh
+
+
+"""
+Decoding and encoding .bob and .cob files, without blender.
+
+This module and the modules it imports only need NumPy, so workers,
+the command line converter and scripts can use it outside of blender.
+The operators in `bob.py` and `cob.py` use it for everything but
+reading and creating blender meshes.
+
+.BOB File Structure:
+
+MAGIC 45623 (I)
+meshFormat  (I)
+vertexCount (I)
+faceCount   (I)
+VertexObject x vertexCount (fff HH hhh xx)
+index x faceCount*3 (b / H / I)
+
+struct VertexObjectFull {
+	float position[3];
+	bs_uint16 uv[2]; // normalized to 16 bit unsigned ints 0 - 65535
+	bs_sint16 normal[3]; // normalized to 16 bit signed ints -32768 - 32767
+	bs_uint8 _padding[2];
+};
+
+.COB File Structure:
+
+MAGIC 13466 (I)
+vertexCount (I)
+faceCount   (I)
+vertexPos x vertexCount (fff)
+index x faceCount*3 (I)
+normal x faceCount (fff)
+
+.
+. Blender 3D Coordinates         BombSquad 3D Coordinates
+.
+.       +Z                               +Y
+.       ^                                ^
+.       | ^ +Y                           |
+.       |/                               |
+.       +-----> +X                       +-----> +X
+.                                       /
+.                                      v +Z
+.
+.
+. Blender UV Coordinates         BombSquad UV Coordinates
+.
+.       +Y [0,1]                         +-----> +X Int[0,65535]
+.       ^                                |
+.       |                                |
+.       |                                v
+.       +-----> +X [0,1]                 +Y Int[0,65535]
+.
+"""
+
+
+BOB_FILE_ID = 45623
+
+BOB_HEADER_FORMAT = '<IIII'
+BOB_HEADER_SIZE = struct.calcsize(BOB_HEADER_FORMAT)
+
+# Mirrors VertexObjectFull, 24 bytes per vertex.
+BOB_VERTEX_DTYPE = np.dtype([
+	('pos', '<f4', (3,)),
+	('uv', '<u2', (2,)),
+	('norm', '<i2', (3,)),
+	('_padding', 'V2'),
+])
+
+BOB_INDEX_DTYPES = {
+	0: np.dtype('<u1'),  # MESH_FORMAT_UV16_N8_INDEX8
+	1: np.dtype('<u2'),  # MESH_FORMAT_UV16_N8_INDEX16
+	2: np.dtype('<u4'),  # MESH_FORMAT_UV16_N8_INDEX32
+}
+
+COB_FILE_ID = 13466
+
+COB_HEADER_FORMAT = '<III'
+COB_HEADER_SIZE = struct.calcsize(COB_HEADER_FORMAT)
+
+# The axis conversion of `bpy_extras.io_utils.axis_conversion(from_forward='-Z', from_up='Y')`
+# as an axis permutation: blender (x, y, z) = bombsquad (x, -z, y), and back.
+# It is a pure rotation, so it applies to normals as well.
+bs_to_bl_axes = np.array([0, 2, 1])
+bs_to_bl_signs = np.array([1, -1, 1], dtype=np.float32)
+bl_to_bs_axes = np.argsort(bs_to_bl_axes)
+bl_to_bs_signs = bs_to_bl_signs[bl_to_bs_axes]
+
+
+def bombsquad_to_blender(vectors):
+	"""Convert `(n, 3)` positions or normals from BombSquad to blender axes."""
+	return vectors[:, bs_to_bl_axes] * bs_to_bl_signs
+
+
+def blender_to_bombsquad(vectors):
+	"""Convert `(n, 3)` positions or normals from blender to BombSquad axes."""
+	return vectors[:, bl_to_bs_axes] * bl_to_bs_signs
+
+
+def mesh_format(vertex_count):
+	"""The smallest meshFormat the exporter writes for `vertex_count` vertices."""
+	return 1 if vertex_count < 65536 else 2
+
+
+def deserialize_bob(file):
+	"""
+	Decode a .bob file into a `BobMesh`.
+
+	The vertex block is mapped onto `BOB_VERTEX_DTYPE` and the index block
+	onto the index width selected by meshFormat, one `np.frombuffer` each,
+	instead of unpacking every vertex and face separately.
+	"""
+	magic, meshFormat, vertexCount, faceCount = struct.unpack(BOB_HEADER_FORMAT, file.read(BOB_HEADER_SIZE))
+	assert magic == BOB_FILE_ID
+	assert meshFormat in BOB_INDEX_DTYPES
+
+	vertices = np.frombuffer(
+		file.read(vertexCount * BOB_VERTEX_DTYPE.itemsize),
+		dtype=BOB_VERTEX_DTYPE,
+		count=vertexCount,
+	)
+	indices = np.frombuffer(
+		file.read(faceCount * 3 * BOB_INDEX_DTYPES[meshFormat].itemsize),
+		dtype=BOB_INDEX_DTYPES[meshFormat],
+		count=faceCount * 3,
+	)
+
+	return BobMesh(
+		positions=vertices["pos"],
+		uvs=vertices["uv"],
+		normals=vertices["norm"],
+		indices=indices.reshape(faceCount, 3),
+	)
+
+
+def serialize_bob(data, file):
+	"""
+	Encode a `BobMesh` into a .bob file.
+
+	Vertices are packed into `BOB_VERTEX_DTYPE` blocks and indices into
+	blocks of the meshFormat index width by `writer.BobWriter`,
+	so only one block is held in memory next to the input arrays.
+	"""
+	writer.write_bob(file, data)
+
+
+def deserialize_cob(file, read_normals=True):
+	"""
+	Decode a .cob file into a `CobMesh`.
+
+	The face normals are not used by the importer,
+	pass `read_normals=False` to stop before that block.
+	"""
+	magic, vertexCount, faceCount = struct.unpack(COB_HEADER_FORMAT, file.read(COB_HEADER_SIZE))
+	assert magic == COB_FILE_ID
+
+	positions = np.frombuffer(file.read(vertexCount * 12), dtype='<f4', count=vertexCount * 3)
+	indices = np.frombuffer(file.read(faceCount * 12), dtype='<u4', count=faceCount * 3)
+
+	normals = None
+	if read_normals:
+		normals = np.frombuffer(file.read(faceCount * 12), dtype='<f4', count=faceCount * 3).reshape(faceCount, 3)
+
+	return CobMesh(
+		positions=positions.reshape(vertexCount, 3),
+		indices=indices.reshape(faceCount, 3),
+		normals=normals,
+	)
+
+
+def serialize_cob(data, file):
+	"""
+	Encode a `CobMesh` into a .cob file, block by block through `writer.CobWriter`.
+	"""
+	writer.write_cob(file, data)
+
+
+def bob_to_blender(bob_data):
+	"""
+	Convert a `BobMesh` into blender space arrays:
+	positions, triangle indices, uvs per face corner and normals per vertex.
+	"""
+	indices = bob_data.indices
+	positions = bombsquad_to_blender(bob_data.positions)
+
+	uvs = quantize.decode_uvs(bob_data.uvs)
+	corner_uvs = uvs[indices].astype(np.float32).ravel()
+
+	normals = bombsquad_to_blender(quantize.decode_normals(bob_data.normals)).astype(np.float32)
+
+	return positions, indices, corner_uvs, normals
+
+
+def cob_to_blender(cob_data):
+	"""Blender space positions and triangle indices of a `CobMesh`."""
+	return bombsquad_to_blender(cob_data.positions), cob_data.indices
+
+
+def load_bob(filepath):
+	"""Read and decode a .bob file into the arrays `bob.blender_to_mesh` takes."""
+	with open(os.fsencode(filepath), 'rb') as file:
+		return bob_to_blender(deserialize_bob(file))
+
+
+def load_cob(filepath):
+	"""Read and decode a .cob file into the arrays `cob.blender_to_mesh` takes."""
+	with open(os.fsencode(filepath), 'rb') as file:
+		return cob_to_blender(deserialize_cob(file, read_normals=False))
+
+
+def corners_to_bob(corner_positions, corner_normals, corner_uvs):
+	"""
+	Weld and quantize triangle corners in BombSquad space into a `BobMesh`.
+
+	Every face corner is a vertex at first, since blender stores uvs per
+	face corner and .bob per vertex. Corners with matching position,
+	normal and uv are welded back together.
+	"""
+	first, inverse = weld.weld_vertices(corner_positions, corner_normals, corner_uvs, tolerance=0.001)
+
+	return BobMesh(
+		positions=corner_positions[first],
+		uvs=quantize.encode_uvs(corner_uvs[first]),
+		normals=quantize.encode_normals(corner_normals[first]),
+		indices=inverse.reshape(-1, 3),
+	)
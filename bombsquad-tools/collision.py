@@ -0,0 +1,225 @@
+import numpy as np
+
+from . import simplify
+from .meshdata import CobMesh, triangle_normals
+from .weld import propagate_labels, unique_rows, weld_positions
+
+
+"""
+Deriving collision meshes from the visual geometry.
+
+The physics step tests against every collision triangle, so a collision
+mesh should be much coarser than what is drawn. `derive_collision` takes
+the visual mesh as a `CobMesh` and
+	drops separate parts smaller than a size threshold (bolts, railings, grass),
+	flattens near coplanar regions onto their best fit plane,
+	and simplifies what is left with `simplify.simplify` down to a triangle
+	budget or an error tolerance.
+Flattened regions have no curvature left, so the simplifier merges each
+of them into a few large triangles.
+
+`clean_collision` runs on every exported collision mesh: it welds positions
+closer than a tolerance, removes degenerate and duplicate triangles and
+drops vertices no triangle uses anymore.
+"""
+
+
+DEFAULT_WELD_DISTANCE = 1e-4
+# triangles with a smaller area are degenerate
+DEGENERATE_AREA = 1e-10
+
+DEFAULT_COPLANAR_ANGLE = np.radians(5)
+# rings of neighbours the face normals are averaged over before comparing them,
+# so that noise on a flat floor does not split it into many small regions
+NORMAL_SMOOTHING_PASSES = 3
+
+
+def connected_parts(indices, vertex_count):
+	"""Return the part of every vertex, as the smallest vertex index in that part."""
+	indices = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+	edges = indices[:, [0, 1, 1, 2]].reshape(-1, 2)
+	return propagate_labels(np.arange(vertex_count), edges[:, 0], edges[:, 1])
+
+
+def drop_small_parts(positions, indices, min_size):
+	"""
+	Remove the triangles of separate parts whose bounding box diagonal is below `min_size`.
+	Returns the remaining indices and the number of parts dropped.
+	"""
+	positions = np.asarray(positions, dtype=np.float64)
+	indices = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+	if min_size <= 0 or len(indices) == 0:
+		return indices, 0
+
+	parts = connected_parts(indices, len(positions))
+	used = np.unique(indices)
+	part_ids, part_of_vertex = np.unique(parts[used], return_inverse=True)
+	lower = np.full((len(part_ids), 3), np.inf)
+	upper = np.full((len(part_ids), 3), -np.inf)
+	np.minimum.at(lower, part_of_vertex, positions[used])
+	np.maximum.at(upper, part_of_vertex, positions[used])
+	small = np.linalg.norm(upper - lower, axis=1) < min_size
+
+	dropped = np.isin(parts[indices[:, 0]], part_ids[small])
+	return indices[~dropped], int(np.count_nonzero(small))
+
+
+def _smoothed_normals(indices, weighted_normals, vertex_count, passes=NORMAL_SMOOTHING_PASSES):
+	"""Unit face normals averaged with the faces around them, `passes` rings wide."""
+	corners = indices.ravel()
+	normals = weighted_normals
+	for _ in range(passes):
+		vertex_normals = np.stack([np.bincount(corners, weights=np.repeat(column, 3), minlength=vertex_count) for column in normals.T], axis=1)
+		normals = vertex_normals[indices].sum(axis=1)
+	length = np.linalg.norm(normals, axis=1, keepdims=True)
+	with np.errstate(divide='ignore', invalid='ignore'):
+		return np.where(length > 0, normals / length, 0.0)
+
+
+def flatten_coplanar_regions(positions, indices, max_angle=DEFAULT_COPLANAR_ANGLE, tolerance=np.inf):
+	"""
+	Group adjacent triangles whose smoothed normals differ by less than
+	`max_angle` into regions and move the vertices inside each region onto the best fit
+	plane of the region, if that moves them less than `tolerance`.
+	Vertices on the border between regions stay where they are.
+
+	Returns the new positions and the number of vertices moved.
+	"""
+	positions = np.asarray(positions, dtype=np.float64)
+	indices = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+	if len(indices) == 0:
+		return positions, 0
+
+	triangles = positions[indices]
+	weighted_normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+	areas = np.linalg.norm(weighted_normals, axis=1)
+	normals = _smoothed_normals(indices, weighted_normals, len(positions))
+
+	# pairs of triangles sharing an edge
+	edges = np.sort(indices[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+	faces = np.repeat(np.arange(len(indices)), 3)
+	_, edge_ids = unique_rows(edges)
+	order = np.argsort(edge_ids, kind='stable')
+	same_edge = edge_ids[order][1:] == edge_ids[order][:-1]
+	first, second = faces[order][:-1][same_edge], faces[order][1:][same_edge]
+	coplanar = np.einsum('ij,ij->i', normals[first], normals[second]) >= np.cos(max_angle)
+	regions = propagate_labels(np.arange(len(indices)), first[coplanar], second[coplanar])
+
+	# area weighted plane of every region
+	region_ids, region_of_face = np.unique(regions, return_inverse=True)
+	region_normals = np.stack([np.bincount(region_of_face, weights=column, minlength=len(region_ids)) for column in weighted_normals.T], axis=1)
+	centroids = triangles.mean(axis=1) * areas[:, None]
+	region_centroids = np.stack([np.bincount(region_of_face, weights=column, minlength=len(region_ids)) for column in centroids.T], axis=1)
+	region_areas = np.bincount(region_of_face, weights=areas, minlength=len(region_ids))
+	length = np.linalg.norm(region_normals, axis=1)
+	valid = (length > 0) & (region_areas > 0)
+	region_normals[valid] /= length[valid, None]
+	region_centroids[valid] /= region_areas[valid, None]
+
+	# vertices whose triangles all belong to one region
+	corner_regions = np.repeat(region_of_face, 3)
+	lowest = np.full(len(positions), len(region_ids))
+	highest = np.full(len(positions), -1)
+	np.minimum.at(lowest, indices.ravel(), corner_regions)
+	np.maximum.at(highest, indices.ravel(), corner_regions)
+	inside = np.nonzero((lowest == highest) & valid[np.minimum(lowest, len(region_ids) - 1)])[0]
+
+	region = lowest[inside]
+	distance = np.einsum('ij,ij->i', positions[inside] - region_centroids[region], region_normals[region])
+	close = np.abs(distance) <= tolerance
+	flattened = positions.copy()
+	flattened[inside[close]] -= distance[close, None] * region_normals[region[close]]
+	return flattened, int(np.count_nonzero(close & (distance != 0)))
+
+
+def _rotate_to_lowest(indices):
+	"""Rotate every triangle to start at its lowest index, keeping its winding."""
+	rotation = np.argmin(indices, axis=1)[:, None]
+	return np.take_along_axis(indices, (rotation + np.arange(3)) % 3, axis=1)
+
+
+def clean_collision(cob_mesh, weld_distance=DEFAULT_WELD_DISTANCE):
+	"""
+	Weld positions closer than `weld_distance`, remove degenerate and
+	duplicate triangles and compact the vertex array of a `CobMesh`.
+	Triangles with the same vertices but opposite winding are kept,
+	they make a two sided wall.
+
+	Returns the new `CobMesh` and a dict of stats.
+	"""
+	positions = cob_mesh.positions
+	indices = np.asarray(cob_mesh.indices, dtype=np.int64).reshape(-1, 3)
+	stats = {"vertices_before": cob_mesh.vertex_count, "faces_before": cob_mesh.face_count}
+
+	first, inverse = weld_positions(positions, weld_distance)
+	indices = inverse[indices]
+
+	triangles = positions[first].astype(np.float64)[indices]
+	area = 0.5 * np.linalg.norm(np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]), axis=1)
+	degenerate = (
+		(indices[:, 0] == indices[:, 1])
+		| (indices[:, 1] == indices[:, 2])
+		| (indices[:, 2] == indices[:, 0])
+		| ~(area > DEGENERATE_AREA)
+	)
+	indices = indices[~degenerate]
+	stats["degenerate_removed"] = int(np.count_nonzero(degenerate))
+
+	unique, _ = unique_rows(_rotate_to_lowest(indices))
+	stats["duplicates_removed"] = len(indices) - len(unique)
+	indices = indices[unique]
+
+	used, indices = np.unique(indices, return_inverse=True)
+	positions = positions[first[used]]
+	indices = indices.reshape(-1, 3).astype(cob_mesh.indices.dtype)
+	stats["vertices_removed"] = stats["vertices_before"] - len(positions)
+	stats["faces_removed"] = stats["faces_before"] - len(indices)
+
+	return CobMesh(
+		positions=positions,
+		indices=indices,
+		normals=triangle_normals(positions, indices),
+	), stats
+
+
+def derive_collision(cob_mesh, max_triangles=None, max_error=None, min_size=0.0, coplanar_angle=DEFAULT_COPLANAR_ANGLE, flatten_tolerance=None):
+	"""
+	Derive a simplified collision mesh from a `CobMesh` of the visual geometry.
+
+	Simplification stops at `max_triangles` or when no collapse stays below
+	`max_error`. Near coplanar regions are flattened by at most
+	`flatten_tolerance`, which defaults to `max_error`.
+	Returns the new `CobMesh` and a dict of stats.
+	"""
+	positions = cob_mesh.positions
+	indices = cob_mesh.indices
+	stats = {"faces_before": cob_mesh.face_count}
+
+	# the visual mesh may have split edges, collision only cares about positions
+	first, inverse = unique_rows(positions)
+	positions = positions[first].astype(np.float64)
+	indices = inverse[indices]
+
+	indices, stats["parts_dropped"] = drop_small_parts(positions, indices, min_size)
+
+	if flatten_tolerance is None:
+		flatten_tolerance = 0.0 if max_error is None else max_error
+	positions, stats["vertices_flattened"] = flatten_coplanar_regions(positions, indices, coplanar_angle, flatten_tolerance)
+
+	stats["error"] = 0.0
+	if max_triangles is not None or max_error is not None:
+		target_ratio = None
+		if max_triangles is not None and len(indices):
+			target_ratio = min(max_triangles / len(indices), 1.0)
+		indices, stats["error"] = simplify.simplify(positions, indices, target_ratio=target_ratio, max_error=max_error)
+
+	used, indices = np.unique(indices, return_inverse=True)
+	positions = positions[used]
+	indices = indices.reshape(-1, 3)
+	stats["faces_after"] = len(indices)
+
+	return CobMesh(
+		positions=positions,
+		indices=indices,
+		normals=triangle_normals(positions, indices),
+	), stats
@@ -0,0 +1,186 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+from . import codec, collision, interchange, parallel, quantize, writer
+from .meshdata import BobMesh, CobMesh, vertex_normals
+
+
+"""
+Batch conversion between .bob/.cob and OBJ/glTF from the command line.
+
+	blender --background --python bombsquad-tools/__main__.py -- --to obj maps/ -o converted/
+	python bombsquad-tools --to bob converted/ -o maps/
+
+Inputs are files or directories, directories are searched for every
+file that converts to the target format. Outputs keep the directory
+layout below each input directory. Sources that would be written to the
+same output file, like `foo.bob` and `foo.cob`, are reported before
+anything is converted. Files are converted in a worker pool and a
+throughput summary is printed at the end.
+
+BombSquad meshes are y up, like OBJ and glTF, so coordinates are copied
+as they are. `--up z` converts to and from blender's z up axes instead,
+with the same axis permutation as the import and export operators,
+see `codec.bombsquad_to_blender`.
+"""
+
+
+BOMBSQUAD_EXTENSIONS = ('.bob', '.cob')
+INTERCHANGE_EXTENSIONS = tuple(interchange.READERS)
+
+
+def _to_up(values, up):
+	if values is None or up == 'y':
+		return values
+	return codec.bombsquad_to_blender(values)
+
+
+def _from_up(values, up):
+	if values is None or up == 'y':
+		return values
+	return codec.blender_to_bombsquad(values)
+
+
+def read_bombsquad(path, up):
+	with open(path, 'rb') as file:
+		magic = int.from_bytes(file.read(4), 'little')
+		file.seek(0)
+		if magic == codec.BOB_FILE_ID:
+			bob_data = codec.deserialize_bob(file)
+			return interchange.InterchangeMesh(
+				positions=_to_up(bob_data.positions, up),
+				indices=bob_data.indices,
+				normals=_to_up(quantize.decode_normals(bob_data.normals), up),
+				uvs=quantize.decode_uvs(bob_data.uvs),
+			)
+		cob_data = codec.deserialize_cob(file, read_normals=False)
+		return interchange.InterchangeMesh(positions=_to_up(cob_data.positions, up), indices=cob_data.indices)
+
+
+def write_bob(path, mesh, up):
+	positions = _from_up(mesh.positions, up)
+	normals = _from_up(mesh.normals, up)
+	if normals is None:
+		normals = vertex_normals(positions, mesh.indices)
+	uvs = mesh.uvs if mesh.uvs is not None else np.zeros((mesh.vertex_count, 2))
+	writer.write_bob(os.fsencode(path), BobMesh(
+		positions=positions,
+		uvs=quantize.encode_uvs(uvs),
+		normals=quantize.encode_normals(normals),
+		indices=mesh.indices,
+	))
+
+
+def write_cob(path, mesh, up):
+	cob_data, _ = collision.clean_collision(CobMesh(positions=_from_up(mesh.positions, up), indices=mesh.indices))
+	writer.write_cob(os.fsencode(path), cob_data)
+
+
+def convert_file(task):
+	"""Convert one `(source, target, up)` task. Returns `(vertices, faces, bytes read, bytes written)`."""
+	source, target, up = task
+	source_extension = os.path.splitext(source)[1].lower()
+	target_extension = os.path.splitext(target)[1].lower()
+
+	if source_extension in BOMBSQUAD_EXTENSIONS:
+		mesh = read_bombsquad(source, up)
+		interchange.WRITERS[target_extension](target, mesh)
+	else:
+		mesh = interchange.READERS[source_extension](source)
+		if target_extension == '.bob':
+			write_bob(target, mesh, up)
+		else:
+			write_cob(target, mesh, up)
+
+	return mesh.vertex_count, mesh.face_count, os.path.getsize(source), os.path.getsize(target)
+
+
+def source_extensions(target_extension):
+	return INTERCHANGE_EXTENSIONS if target_extension in BOMBSQUAD_EXTENSIONS else BOMBSQUAD_EXTENSIONS
+
+
+def collect_tasks(inputs, output, target_extension, up, recursive=False):
+	"""List the `(source, target, up)` tasks for all input files and directories."""
+	extensions = source_extensions(target_extension)
+	tasks = []
+	for path in inputs:
+		if os.path.isdir(path):
+			for directory, directories, files in os.walk(path):
+				if not recursive:
+					directories.clear()
+				for name in sorted(files):
+					if os.path.splitext(name)[1].lower() in extensions:
+						relative = os.path.relpath(os.path.join(directory, name), path)
+						tasks.append((os.path.join(directory, name), os.path.join(output, os.path.splitext(relative)[0] + target_extension), up))
+		else:
+			if os.path.splitext(path)[1].lower() not in extensions:
+				raise ValueError(f"`{path}` can not be converted to {target_extension}")
+			name = os.path.splitext(os.path.basename(path))[0]
+			tasks.append((path, os.path.join(output, name + target_extension), up))
+
+	# `foo.bob` and `foo.cob` would both become `foo.obj`, refuse instead of overwriting one with the other
+	sources = {}
+	for source, target, _ in tasks:
+		key = os.path.normcase(os.path.abspath(target))
+		if key in sources:
+			raise ValueError(f"`{sources[key]}` and `{source}` would both be converted to `{target}`")
+		sources[key] = source
+	return tasks
+
+
+def parse_args(argv):
+	parser = argparse.ArgumentParser(
+		prog="bombsquad-tools",
+		description="Convert .bob/.cob meshes to OBJ/glTF and back.",
+	)
+	parser.add_argument('inputs', nargs='+', help="files or directories to convert")
+	parser.add_argument('--to', required=True, choices=('obj', 'gltf', 'glb', 'bob', 'cob'), help="target format")
+	parser.add_argument('-o', '--output', default='.', help="output directory, the current directory by default")
+	parser.add_argument('--up', default='y', choices=('y', 'z'), help="up axis of the OBJ/glTF files, z matches blender (default: y)")
+	parser.add_argument('-r', '--recursive', action='store_true', help="also convert files in subdirectories")
+	parser.add_argument('-j', '--jobs', type=int, default=None, help="number of worker threads, one per core by default")
+	return parser.parse_args(argv)
+
+
+def main(argv=None):
+	if argv is None:
+		argv = sys.argv[1:]
+		# blender passes the arguments of the script after `--`
+		if '--' in sys.argv:
+			argv = sys.argv[sys.argv.index('--') + 1:]
+	args = parse_args(argv)
+
+	target_extension = '.' + args.to
+	try:
+		tasks = collect_tasks(args.inputs, args.output, target_extension, args.up, recursive=args.recursive)
+	except ValueError as error:
+		print(f"[ERROR] {error}", file=sys.stderr)
+		return 2
+	for _, target, _ in tasks:
+		os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+
+	start = time.perf_counter()
+	converted, failed = 0, 0
+	vertices, faces, bytes_read, bytes_written = 0, 0, 0, 0
+	for (source, target, _), (result, error) in zip(tasks, parallel.map_ordered(convert_file, tasks, workers=args.jobs)):
+		if error is not None:
+			failed += 1
+			print(f"[ERROR] {source}: {error!r}", file=sys.stderr)
+			continue
+		converted += 1
+		vertices += result[0]
+		faces += result[1]
+		bytes_read += result[2]
+		bytes_written += result[3]
+		print(f"[INFO] {source} -> {target} ({result[0]} vertices, {result[1]} faces)")
+	elapsed = max(time.perf_counter() - start, 1e-9)
+
+	print(
+		f"Converted {converted} of {len(tasks)} files in {elapsed:.2f}s: "
+		f"{converted / elapsed:.1f} files/s, {vertices / elapsed:,.0f} vertices/s, {faces / elapsed:,.0f} faces/s, "
+		f"read {bytes_read / 2**20 / elapsed:.1f} MiB/s, wrote {bytes_written / 2**20 / elapsed:.1f} MiB/s"
+	)
+	return 1 if failed else 0
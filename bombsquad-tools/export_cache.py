@@ -0,0 +1,130 @@
+import os
+import hashlib
+import itertools
+import tomllib
+import bpy
+
+
+"""
+Skipping unchanged objects in collection exports.
+
+Every export of an object is remembered per format with
+	the file it was exported to,
+	a settings key: the addon version and the export options,
+	a content key: the settings key and the evaluated mesh arrays,
+	every file it wrote, LODs included.
+A depsgraph handler numbers every change of an object. An object that
+did not change since its last export, with the same settings and all
+of its files still in place, is skipped without even evaluating it.
+A changed object is evaluated and skipped if its content key did not change.
+
+Objects are keyed by `session_uid`, so renaming one does not alias
+another. Changes are only reported for objects in the depsgraph, the
+exports of objects that leave it, like in an excluded collection, are
+forgotten. The cache lives for the session, undo and loading a file reset it.
+"""
+
+
+with open(os.path.join(os.path.dirname(__file__), 'blender_manifest.toml'), 'rb') as manifest:
+	ADDON_VERSION = tomllib.load(manifest)['version']
+
+_counter = itertools.count(1)
+# object session_uid -> number of its last change
+_changes = {}
+# (format, object session_uid) -> (filepath, settings key, content key, change number, written files)
+_entries = {}
+
+
+def settings_key(format_name, options):
+	return repr((ADDON_VERSION, format_name, sorted(options.items())))
+
+
+def content_key(settings, arrays):
+	digest = hashlib.blake2b(settings.encode(), digest_size=16)
+	for array in arrays:
+		if array is None:
+			digest.update(b'none')
+			continue
+		digest.update(f"{array.dtype.str}{array.shape}".encode())
+		digest.update(array.tobytes())
+	return digest.hexdigest()
+
+
+def change_number(uid):
+	return _changes.get(uid, 0)
+
+
+def _files_exist(files):
+	return all(os.path.exists(file) for file in files)
+
+
+def is_untouched(format_name, uid, filepath, settings):
+	"""Whether the object is known to be exported like this already, without looking at its data."""
+	entry = _entries.get((format_name, uid))
+	return (
+		entry is not None
+		and entry[0] == filepath
+		and entry[1] == settings
+		and entry[3] == change_number(uid)
+		and _files_exist(entry[4])
+	)
+
+
+def is_unchanged(format_name, uid, filepath, content):
+	"""Whether the object was exported with the same content key already."""
+	entry = _entries.get((format_name, uid))
+	return entry is not None and entry[0] == filepath and entry[2] == content and _files_exist(entry[4])
+
+
+def store(format_name, uid, filepath, settings, content, change, files):
+	"""Remember an export. `change` is the change number of the object when its data was read, `files` every file written."""
+	_entries[(format_name, uid)] = (filepath, settings, content, change, tuple(files))
+
+
+def update_change(format_name, uid, change):
+	"""Remember that an object found unchanged by `is_unchanged` was read at change number `change`."""
+	entry = _entries[(format_name, uid)]
+	_entries[(format_name, uid)] = entry[:3] + (change,) + entry[4:]
+
+
+def clear():
+	_changes.clear()
+	_entries.clear()
+
+
+@bpy.app.handlers.persistent
+def depsgraph_update_post(scene, depsgraph):
+	for update in depsgraph.updates:
+		if isinstance(update.id, bpy.types.Object) and (update.is_updated_geometry or update.is_updated_transform):
+			_changes[update.id.original.session_uid] = next(_counter)
+
+	if _entries:
+		# edits of objects outside of this depsgraph are never reported, do not trust their entries
+		evaluated = {obj.original.session_uid for obj in depsgraph.objects}
+		for key in [key for key in _entries if key[1] not in evaluated]:
+			del _entries[key]
+
+
+@bpy.app.handlers.persistent
+def reset(*args):
+	clear()
+
+
+handlers = (
+	(bpy.app.handlers.depsgraph_update_post, depsgraph_update_post),
+	(bpy.app.handlers.load_post, reset),
+	(bpy.app.handlers.undo_post, reset),
+	(bpy.app.handlers.redo_post, reset),
+)
+
+
+def register():
+	for handler_list, handler in handlers:
+		handler_list.append(handler)
+
+
+def unregister():
+	for handler_list, handler in handlers:
+		if handler in handler_list:
+			handler_list.remove(handler)
+	clear()
@@ -0,0 +1,298 @@
+import os
+import json
+import base64
+import struct
+import numpy as np
+
+from .weld import unique_rows
+
+
+"""
+Reading and writing OBJ and glTF 2.0 meshes for the command line converter.
+
+Meshes are passed around as `InterchangeMesh`: float positions, optional
+per vertex normals and uvs, and triangle indices. Uvs follow the OBJ
+convention with v pointing up, like Blender; glTF stores v pointing down,
+like BombSquad, and is flipped on the way in and out.
+
+OBJ faces with more than 3 corners are split as fans. glTF files are
+written as a single mesh with one primitive, either as `.glb` or as
+`.gltf` with the buffer embedded. When reading glTF, the triangle
+primitives of all meshes are merged and node transforms are ignored.
+"""
+
+
+class InterchangeMesh:
+	__slots__ = ('positions', 'normals', 'uvs', 'indices')
+
+	def __init__(self, positions, indices, normals=None, uvs=None):
+		self.positions = np.ascontiguousarray(positions, dtype=np.float32).reshape(-1, 3)
+		self.indices = np.ascontiguousarray(indices, dtype=np.uint32).reshape(-1, 3)
+		self.normals = None if normals is None else np.ascontiguousarray(normals, dtype=np.float32).reshape(-1, 3)
+		self.uvs = None if uvs is None else np.ascontiguousarray(uvs, dtype=np.float32).reshape(-1, 2)
+
+	@property
+	def vertex_count(self):
+		return len(self.positions)
+
+	@property
+	def face_count(self):
+		return len(self.indices)
+
+	def __repr__(self):
+		return f"{self.__class__.__name__}(vertices={self.vertex_count}, faces={self.face_count})"
+
+
+def _obj_index(token, count):
+	index = int(token)
+	return index - 1 if index > 0 else count + index
+
+
+def read_obj(path):
+	positions, uvs, normals = [], [], []
+	corners = []
+	with open(path, 'r', encoding='utf-8', errors='replace') as file:
+		for line in file:
+			parts = line.split()
+			if not parts:
+				continue
+			kind = parts[0]
+			if kind == 'v':
+				positions.append(parts[1:4])
+			elif kind == 'vt':
+				uvs.append(parts[1:3])
+			elif kind == 'vn':
+				normals.append(parts[1:4])
+			elif kind == 'f':
+				face = []
+				for token in parts[1:]:
+					fields = token.split('/') + ['', '']
+					face.append((
+						_obj_index(fields[0], len(positions)),
+						_obj_index(fields[1], len(uvs)) if fields[1] else -1,
+						_obj_index(fields[2], len(normals)) if fields[2] else -1,
+					))
+				corners += [corner for i in range(1, len(face) - 1) for corner in (face[0], face[i], face[i + 1])]
+
+	positions = np.array(positions, dtype=np.float64).reshape(-1, 3)
+	uvs = np.array(uvs, dtype=np.float64).reshape(-1, 2)
+	normals = np.array(normals, dtype=np.float64).reshape(-1, 3)
+	corners = np.array(corners, dtype=np.int64).reshape(-1, 3)
+
+	# every distinct (position, uv, normal) combination becomes a vertex
+	first, inverse = unique_rows(corners)
+	vertices = corners[first]
+	has_uvs = len(uvs) > 0 and (vertices[:, 1] >= 0).all()
+	has_normals = len(normals) > 0 and (vertices[:, 2] >= 0).all()
+	return InterchangeMesh(
+		positions=positions[vertices[:, 0]],
+		indices=inverse.reshape(-1, 3),
+		normals=normals[vertices[:, 2]] if has_normals else None,
+		uvs=uvs[vertices[:, 1]] if has_uvs else None,
+	)
+
+
+def write_obj(path, mesh):
+	lines = [f"# {mesh.vertex_count} vertices, {mesh.face_count} faces\n"]
+	lines += [f"v {x:.6f} {y:.6f} {z:.6f}\n" for x, y, z in mesh.positions.tolist()]
+	if mesh.uvs is not None:
+		lines += [f"vt {u:.6f} {v:.6f}\n" for u, v in mesh.uvs.tolist()]
+	if mesh.normals is not None:
+		lines += [f"vn {x:.6f} {y:.6f} {z:.6f}\n" for x, y, z in mesh.normals.tolist()]
+
+	if mesh.uvs is not None and mesh.normals is not None:
+		corner = "{0}/{0}/{0}"
+	elif mesh.uvs is not None:
+		corner = "{0}/{0}"
+	elif mesh.normals is not None:
+		corner = "{0}//{0}"
+	else:
+		corner = "{0}"
+	face = f"f {corner.format('{0}')} {corner.format('{1}')} {corner.format('{2}')}\n"
+	lines += [face.format(a, b, c) for a, b, c in (mesh.indices.astype(np.int64) + 1).tolist()]
+
+	with open(path, 'w', encoding='utf-8') as file:
+		file.writelines(lines)
+
+
+GLTF_COMPONENT_TYPES = {
+	5120: np.dtype('<i1'),
+	5121: np.dtype('<u1'),
+	5122: np.dtype('<i2'),
+	5123: np.dtype('<u2'),
+	5125: np.dtype('<u4'),
+	5126: np.dtype('<f4'),
+}
+GLTF_TYPE_WIDTHS = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4}
+GLTF_TRIANGLES = 4
+
+GLB_MAGIC = 0x46546C67
+GLB_JSON_CHUNK = 0x4E4F534A
+GLB_BIN_CHUNK = 0x004E4942
+
+
+def _load_gltf(path):
+	"""Return the glTF json and its buffers as bytes."""
+	with open(path, 'rb') as file:
+		data = file.read()
+
+	binary_chunk = None
+	if len(data) >= 12 and struct.unpack_from('<I', data)[0] == GLB_MAGIC:
+		offset = 12
+		document = None
+		while offset < len(data):
+			length, chunk_type = struct.unpack_from('<II', data, offset)
+			chunk = data[offset + 8:offset + 8 + length]
+			if chunk_type == GLB_JSON_CHUNK:
+				document = json.loads(chunk)
+			elif chunk_type == GLB_BIN_CHUNK:
+				binary_chunk = chunk
+			offset += 8 + length
+	else:
+		document = json.loads(data)
+
+	buffers = []
+	for buffer in document.get('buffers', []):
+		uri = buffer.get('uri')
+		if uri is None:
+			buffers.append(binary_chunk)
+		elif uri.startswith('data:'):
+			buffers.append(base64.b64decode(uri.split(',', 1)[1]))
+		else:
+			with open(os.path.join(os.path.dirname(path), uri), 'rb') as file:
+				buffers.append(file.read())
+	return document, buffers
+
+
+def _read_accessor(document, buffers, index):
+	accessor = document['accessors'][index]
+	if 'sparse' in accessor:
+		raise ValueError("sparse glTF accessors are not supported")
+	dtype = GLTF_COMPONENT_TYPES[accessor['componentType']]
+	width = GLTF_TYPE_WIDTHS[accessor['type']]
+	count = accessor['count']
+	if 'bufferView' not in accessor:
+		return np.zeros((count, width), dtype=dtype)
+
+	view = document['bufferViews'][accessor['bufferView']]
+	buffer = buffers[view['buffer']]
+	offset = view.get('byteOffset', 0) + accessor.get('byteOffset', 0)
+	stride = view.get('byteStride', dtype.itemsize * width)
+	values = np.ndarray((count, width), dtype=dtype, buffer=buffer, offset=offset, strides=(stride, dtype.itemsize)).copy()
+
+	if accessor.get('normalized', False):
+		if dtype.kind == 'u':
+			values = values / np.iinfo(dtype).max
+		else:
+			values = np.maximum(values / np.iinfo(dtype).max, -1.0)
+	return values
+
+
+def read_gltf(path):
+	document, buffers = _load_gltf(path)
+
+	positions, normals, uvs, indices = [], [], [], []
+	vertex_count = 0
+	for mesh in document.get('meshes', []):
+		for primitive in mesh['primitives']:
+			if primitive.get('mode', GLTF_TRIANGLES) != GLTF_TRIANGLES:
+				continue
+			attributes = primitive['attributes']
+			primitive_positions = _read_accessor(document, buffers, attributes['POSITION'])
+			count = len(primitive_positions)
+			positions.append(primitive_positions)
+			normals.append(_read_accessor(document, buffers, attributes['NORMAL']) if 'NORMAL' in attributes else None)
+			uvs.append(_read_accessor(document, buffers, attributes['TEXCOORD_0']) if 'TEXCOORD_0' in attributes else None)
+			if 'indices' in primitive:
+				primitive_indices = _read_accessor(document, buffers, primitive['indices']).astype(np.int64).ravel()
+			else:
+				primitive_indices = np.arange(count)
+			indices.append(primitive_indices + vertex_count)
+			vertex_count += count
+
+	if not positions:
+		raise ValueError(f"`{path}` has no triangle meshes")
+
+	uvs = None if any(uv is None for uv in uvs) else np.concatenate(uvs)
+	if uvs is not None:
+		uvs = uvs * (1, -1) + (0, 1)
+	return InterchangeMesh(
+		positions=np.concatenate(positions),
+		indices=np.concatenate(indices),
+		normals=None if any(normal is None for normal in normals) else np.concatenate(normals),
+		uvs=uvs,
+	)
+
+
+def write_gltf(path, mesh):
+	"""Write a `.glb` or, for any other extension, a `.gltf` with an embedded buffer."""
+	index_dtype = np.dtype('<u2') if mesh.vertex_count < 65536 else np.dtype('<u4')
+	blocks = [
+		('POSITION', mesh.positions, 34962),
+		('NORMAL', mesh.normals, 34962),
+		('TEXCOORD_0', None if mesh.uvs is None else mesh.uvs * (1, -1) + (0, 1), 34962),
+		(None, mesh.indices.astype(index_dtype).ravel(), 34963),
+	]
+
+	document = {
+		'asset': {'version': '2.0', 'generator': 'bombsquad-tools'},
+		'scene': 0,
+		'scenes': [{'nodes': [0]}],
+		'nodes': [{'mesh': 0, 'name': os.path.splitext(os.path.basename(path))[0]}],
+		'meshes': [{'primitives': [{'attributes': {}, 'mode': GLTF_TRIANGLES}]}],
+		'accessors': [],
+		'bufferViews': [],
+	}
+	primitive = document['meshes'][0]['primitives'][0]
+	data = bytearray()
+	for name, values, target in blocks:
+		if values is None:
+			continue
+		values = np.ascontiguousarray(values, dtype=index_dtype if name is None else np.float32)
+		data += b'\0' * (-len(data) % 4)
+		document['bufferViews'].append({'buffer': 0, 'byteOffset': len(data), 'byteLength': values.nbytes, 'target': target})
+		data += values.tobytes()
+
+		accessor = {
+			'bufferView': len(document['bufferViews']) - 1,
+			'componentType': 5126 if name is not None else (5123 if index_dtype.itemsize == 2 else 5125),
+			'count': len(values),
+			'type': {1: 'SCALAR', 2: 'VEC2', 3: 'VEC3'}[values.shape[1] if values.ndim == 2 else 1],
+		}
+		if name == 'POSITION' and len(values):
+			accessor['min'] = values.min(axis=0).tolist()
+			accessor['max'] = values.max(axis=0).tolist()
+		document['accessors'].append(accessor)
+		if name is None:
+			primitive['indices'] = len(document['accessors']) - 1
+		else:
+			primitive['attributes'][name] = len(document['accessors']) - 1
+	data += b'\0' * (-len(data) % 4)
+
+	if path.lower().endswith('.glb'):
+		document['buffers'] = [{'byteLength': len(data)}]
+		text = json.dumps(document, separators=(',', ':')).encode()
+		text += b' ' * (-len(text) % 4)
+		with open(path, 'wb') as file:
+			file.write(struct.pack('<III', GLB_MAGIC, 2, 12 + 8 + len(text) + 8 + len(data)))
+			file.write(struct.pack('<II', len(text), GLB_JSON_CHUNK))
+			file.write(text)
+			file.write(struct.pack('<II', len(data), GLB_BIN_CHUNK))
+			file.write(data)
+	else:
+		document['buffers'] = [{'byteLength': len(data), 'uri': 'data:application/octet-stream;base64,' + base64.b64encode(data).decode()}]
+		with open(path, 'w', encoding='utf-8') as file:
+			json.dump(document, file, separators=(',', ':'))
+
+
+READERS = {
+	'.obj': read_obj,
+	'.gltf': read_gltf,
+	'.glb': read_gltf,
+}
+
+WRITERS = {
+	'.obj': write_obj,
+	'.gltf': write_gltf,
+	'.glb': write_gltf,
+}
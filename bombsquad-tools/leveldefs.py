@@ -4,7 +4,7 @@ import bpy
 import bpy_extras
 from mathutils import Vector
 
-from . import utils
+from . import utils, validate
 
 
 # These matrices are different from the ones used in bob and cob formats
@@ -131,6 +131,20 @@ class EXPORT_SCENE_OT_bombsquad_leveldefs(bpy.types.Operator, bpy_extras.io_util
 		default="",
 	)
 
+	collision_object: bpy.props.StringProperty(
+		name="Collision Mesh",
+		description="Check spawns, flags and powerups against this collision mesh before exporting. Leave empty to skip the check",
+		default="",
+	)
+
+	max_location_height: bpy.props.FloatProperty(
+		name="Maximum Height",
+		description="Locations further above the collision mesh than this are reported as floating",
+		default=validate.DEFAULT_MAX_HEIGHT,
+		min=0.0,
+		subtype='DISTANCE',
+	)
+
 	@classmethod
 	def poll(cls, context):
 		return context.collection is not None and len(context.collection.objects) > 0
@@ -198,6 +212,9 @@ class EXPORT_SCENE_OT_bombsquad_leveldefs(bpy.types.Operator, bpy_extras.io_util
 			self.report({'WARNING'}, f"Collection `{collection.name}` has no location data to export. Is the correct collection selected?")
 			return {'FINISHED'}
 
+		if self.collision_object:
+			self.validate(context, objects)
+
 		data = {}
 		# TODO: add check_existing flag
 		if os.path.exists(filepath):
@@ -213,6 +230,24 @@ class EXPORT_SCENE_OT_bombsquad_leveldefs(bpy.types.Operator, bpy_extras.io_util
 		print(f"{self.__class__.__name__}: [INFO] Finished exporting {filepath}")
 		return {'FINISHED'}
 
+	def validate(self, context, objects):
+		collision_obj = bpy.data.objects.get(self.collision_object)
+		if collision_obj is None or collision_obj.type != 'MESH':
+			self.report({'WARNING'}, f"Collision mesh `{self.collision_object}` not found. Locations were not checked.")
+			return
+
+		tree = validate.collision_tree(collision_obj, context.evaluated_depsgraph_get())
+
+		bounds = next((obj for obj in objects if obj.name.split('.')[0] == 'map_bounds' and obj.type == 'EMPTY'), None)
+		if bounds is None:
+			print(f"{self.__class__.__name__}: [WARNING] No map_bounds in the collection, locations are not checked against it.")
+
+		problems = validate.validate_locations(objects, tree, bounds=bounds, max_height=self.max_location_height)
+		for obj, problem in problems:
+			print(f"{self.__class__.__name__}: [WARNING] Location `{obj.name}` is {problem}.")
+			self.report({'WARNING'}, f"Location `{obj.name}` is {problem}.")
+		print(f"{self.__class__.__name__}: [INFO] Checked locations against `{collision_obj.name}`, {len(problems)} problems found.")
+
 	def draw(self, context):
 		is_file_browser = context.space_data.type == 'FILE_BROWSER'
 		is_collection_exporter = context.space_data.type == 'PROPERTIES'
@@ -237,7 +272,9 @@ class EXPORT_SCENE_OT_bombsquad_leveldefs(bpy.types.Operator, bpy_extras.io_util
 		pass
 
 	def draw_props(self, layout):
-		pass
+		layout.prop_search(self, 'collision_object', bpy.data, 'objects')
+		if self.collision_object:
+			layout.prop(self, 'max_location_height')
 
 
 # Enables importing files by draggin and dropping into the blender UI
@@ -273,8 +310,37 @@ classes = (
 _register, _unregister = bpy.utils.register_classes_factory(classes)
 
 
+@bpy.app.handlers.persistent
+def depsgraph_update_post(scene, depsgraph):
+	cached = validate.cached_trees()
+	if not cached:
+		return
+	changed = {
+		update.id.original.session_uid for update in depsgraph.updates
+		if isinstance(update.id, bpy.types.Object) and (update.is_updated_geometry or update.is_updated_transform)
+	}
+	# edits of objects outside of this depsgraph are never reported
+	evaluated = {obj.original.session_uid for obj in depsgraph.objects}
+	validate.mark_stale(uid for uid in cached if uid in changed or uid not in evaluated)
+
+
+@bpy.app.handlers.persistent
+def reset_validation(*args):
+	validate.clear()
+
+
+handlers = (
+	(bpy.app.handlers.depsgraph_update_post, depsgraph_update_post),
+	(bpy.app.handlers.load_post, reset_validation),
+	(bpy.app.handlers.undo_post, reset_validation),
+	(bpy.app.handlers.redo_post, reset_validation),
+)
+
+
 def register():
 	_register()
+	for handler_list, handler in handlers:
+		handler_list.append(handler)
 	
 	bpy.types.TOPBAR_MT_file_import.append(menu_func_import_leveldefs)
 	bpy.types.TOPBAR_MT_file_export.append(menu_func_export_leveldefs)
@@ -284,6 +350,10 @@ def unregister():
 	bpy.types.TOPBAR_MT_file_export.remove(menu_func_export_leveldefs)
 	bpy.types.TOPBAR_MT_file_import.remove(menu_func_import_leveldefs)
 	
+	for handler_list, handler in handlers:
+		if handler in handler_list:
+			handler_list.remove(handler)
+	validate.clear()
 	_unregister()
 
 
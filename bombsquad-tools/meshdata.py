@@ -0,0 +1,120 @@
+import numpy as np
+
+
+"""
+Array backed mesh containers passed between the decoders, the encoders
+and the Blender conversion functions.
+
+Every attribute is one contiguous typed array, in BombSquad coordinates
+and in the exact value ranges stored in the files:
+
+	BobMesh
+		positions (n, 3) float32
+		uvs       (n, 2) uint16   0 - 65535
+		normals   (n, 3) int16    -32767 - 32767
+		indices   (m, 3) uint8 / uint16 / uint32
+
+	CobMesh
+		positions (n, 3) float32
+		indices   (m, 3) uint32
+		normals   (m, 3) float32, one unit normal per face, or None
+
+A vertex costs 24 bytes in a BobMesh, the same as in the file.
+"""
+
+
+def _array(values, dtype, width):
+	return np.ascontiguousarray(values, dtype=dtype).reshape(-1, width)
+
+
+def _index_array(values):
+	values = np.asarray(values)
+	if values.dtype not in (np.uint8, np.uint16, np.uint32):
+		values = values.astype(np.uint32)
+	return np.ascontiguousarray(values).reshape(-1, 3)
+
+
+class BobMesh:
+	__slots__ = ('positions', 'uvs', 'normals', 'indices')
+
+	def __init__(self, positions, uvs, normals, indices):
+		self.positions = _array(positions, np.float32, 3)
+		self.uvs = _array(uvs, np.uint16, 2)
+		self.normals = _array(normals, np.int16, 3)
+		self.indices = _index_array(indices)
+		assert len(self.positions) == len(self.uvs) == len(self.normals)
+
+	@property
+	def vertex_count(self):
+		return len(self.positions)
+
+	@property
+	def face_count(self):
+		return len(self.indices)
+
+	@property
+	def nbytes(self):
+		return self.positions.nbytes + self.uvs.nbytes + self.normals.nbytes + self.indices.nbytes
+
+	def __repr__(self):
+		return f"{self.__class__.__name__}(vertices={self.vertex_count}, faces={self.face_count})"
+
+
+class CobMesh:
+	__slots__ = ('positions', 'indices', 'normals')
+
+	def __init__(self, positions, indices, normals=None):
+		self.positions = _array(positions, np.float32, 3)
+		self.indices = _array(indices, np.uint32, 3)
+		self.normals = None if normals is None else _array(normals, np.float32, 3)
+		assert self.normals is None or len(self.normals) == len(self.indices)
+
+	@property
+	def vertex_count(self):
+		return len(self.positions)
+
+	@property
+	def face_count(self):
+		return len(self.indices)
+
+	@property
+	def nbytes(self):
+		normals_nbytes = 0 if self.normals is None else self.normals.nbytes
+		return self.positions.nbytes + self.indices.nbytes + normals_nbytes
+
+	def ensure_normals(self):
+		"""Compute the face normals if they were not decoded."""
+		if self.normals is None:
+			self.normals = triangle_normals(self.positions, self.indices)
+		return self.normals
+
+	def __repr__(self):
+		return f"{self.__class__.__name__}(vertices={self.vertex_count}, faces={self.face_count})"
+
+
+def triangle_normals(positions, indices):
+	"""
+	Unit normals of every triangle, computed the same way as bmesh face normals.
+	Degenerate triangles get a zero normal.
+	"""
+	v0, v1, v2 = np.asarray(positions, dtype=np.float64)[np.asarray(indices).T]
+	normals = np.cross(v0 - v1, v1 - v2)
+	lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+	np.divide(normals, lengths, out=normals, where=lengths > 0)
+	return normals.astype(np.float32)
+
+
+def vertex_normals(positions, indices):
+	"""
+	Unit normals of every vertex, the area weighted average of the triangles around it.
+	Vertices without triangles get a zero normal.
+	"""
+	positions = np.asarray(positions, dtype=np.float64)
+	indices = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+	v0, v1, v2 = positions[indices.T]
+	# the cross product is twice the area times the unit normal
+	weighted = np.cross(v1 - v0, v2 - v0)
+	normals = np.stack([np.bincount(indices.ravel(), weights=np.repeat(column, 3), minlength=len(positions)) for column in weighted.T], axis=1)
+	lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+	np.divide(normals, lengths, out=normals, where=lengths > 0)
+	return normals.astype(np.float32)
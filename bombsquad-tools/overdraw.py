@@ -0,0 +1,227 @@
+import numpy as np
+
+from . import vcache
+from .meshdata import BobMesh
+
+
+"""
+Overdraw aware triangle ordering for map meshes.
+
+A map is drawn as one .bob, so the order of its triangles decides how
+often a pixel is shaded and then covered again. Following Sander et al.,
+"Fast Triangle Reordering for Vertex Locality and Reduced Overdraw",
+the vertex cache optimized triangle list is cut into clusters where the
+cache starts over anyway, and whole clusters are sorted front to back as
+seen from the camera region of the map (`area_of_interest_bounds`).
+Reordering clusters instead of triangles keeps most of the vertex cache
+efficiency.
+
+`estimate_overdraw` measures the result without a GPU: triangles are
+rasterized in draw order into a small depth buffer from a few viewpoints
+around the camera region, and overdraw is the number of fragments that
+pass the depth test divided by the number of covered pixels.
+"""
+
+
+MAX_CLUSTER_SIZE = 512
+MIN_CLUSTER_SIZE = 32
+
+ESTIMATE_RESOLUTION = 128
+ESTIMATE_FOV = np.radians(60)
+ESTIMATE_NEAR = 0.1
+ESTIMATE_CHUNK_FRAGMENTS = 1 << 22
+
+
+def cluster_starts(indices, min_cluster_size=MIN_CLUSTER_SIZE, max_cluster_size=MAX_CLUSTER_SIZE):
+	"""
+	Return the first triangle of every cluster.
+	A cluster ends where a triangle misses the cache with all three vertices,
+	or when it reaches `max_cluster_size` triangles.
+	"""
+	misses = vcache.triangle_misses(indices).tolist()
+	starts = [0] if misses else []
+	for triangle, triangle_misses in enumerate(misses):
+		size = triangle - starts[-1]
+		if (triangle_misses == 3 and size >= min_cluster_size) or size >= max_cluster_size:
+			starts.append(triangle)
+	return np.array(starts, dtype=np.int64)
+
+
+def sample_viewpoints(center, half_size):
+	"""
+	A few eye positions around a camera region given in BombSquad coordinates.
+
+	The game camera looks into the map from the +z side and from above,
+	so the eyes are spread along x in front of and above the region,
+	all looking at its center.
+	"""
+	center = np.asarray(center, dtype=np.float64)
+	half_size = np.asarray(half_size, dtype=np.float64)
+	distance = 2 * max(half_size.max(), 1e-3)
+	return [
+		(center + (x * half_size[0], half_size[1] + 0.5 * distance, half_size[2] + distance), center)
+		for x in (-1.0, 0.0, 1.0)
+	]
+
+
+def _view_matrix(eye, target):
+	forward = target - eye
+	forward /= np.linalg.norm(forward)
+	right = np.cross(forward, (0.0, 1.0, 0.0))
+	if np.linalg.norm(right) < 1e-6:
+		right = np.array((1.0, 0.0, 0.0))
+	right /= np.linalg.norm(right)
+	up = np.cross(right, forward)
+	return np.stack((right, up, forward))
+
+
+def view_depths(points, eye, target):
+	"""Distance of every point in front of the eye, along the view direction."""
+	return (np.asarray(points, dtype=np.float64) - eye) @ _view_matrix(eye, target)[2]
+
+
+def sort_clusters(positions, indices, starts, viewpoints):
+	"""Return the triangle order that draws the clusters nearest to the viewpoints first."""
+	triangle_count = len(indices)
+	centroids = np.asarray(positions, dtype=np.float64)[np.asarray(indices)].mean(axis=1)
+	sizes = np.diff(np.append(starts, triangle_count))
+	cluster_ids = np.repeat(np.arange(len(starts)), sizes)
+
+	depth = np.zeros(len(starts))
+	for eye, target in viewpoints:
+		depth += np.bincount(cluster_ids, weights=view_depths(centroids, eye, target), minlength=len(starts)) / sizes
+	cluster_order = np.argsort(depth, kind='stable')
+
+	return np.concatenate([np.arange(starts[c], starts[c] + sizes[c]) for c in cluster_order]) if len(starts) else np.zeros(0, dtype=np.int64)
+
+
+def _project(positions, eye, target, resolution):
+	view = (np.asarray(positions, dtype=np.float64) - eye) @ _view_matrix(eye, target).T
+	depth = view[:, 2]
+	scale = resolution / 2 / np.tan(ESTIMATE_FOV / 2)
+	with np.errstate(divide='ignore', invalid='ignore'):
+		screen = view[:, :2] / depth[:, None] * scale + resolution / 2
+	return screen, depth
+
+
+def _fragments(screen, inverse_depth, resolution):
+	"""Pixel ids and interpolated inverse depth of every fragment, ordered by triangle."""
+	lower = np.clip(np.floor(screen.min(axis=1) - 0.5), 0, resolution).astype(np.int64)
+	upper = np.clip(np.ceil(screen.max(axis=1) - 0.5), -1, resolution - 1).astype(np.int64)
+	widths = np.maximum(upper[:, 0] - lower[:, 0] + 1, 0)
+	heights = np.maximum(upper[:, 1] - lower[:, 1] + 1, 0)
+	counts = widths * heights
+
+	triangles = np.repeat(np.arange(len(screen)), counts)
+	local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+	x = lower[triangles, 0] + local % widths[triangles]
+	y = lower[triangles, 1] + local // widths[triangles]
+
+	p = np.stack((x + 0.5, y + 0.5), axis=1)
+	a, b, c = (screen[triangles, i] for i in range(3))
+
+	def edge(v0, v1, point):
+		return (v1[:, 0] - v0[:, 0]) * (point[:, 1] - v0[:, 1]) - (v1[:, 1] - v0[:, 1]) * (point[:, 0] - v0[:, 0])
+
+	area = edge(a, b, c)
+	w0 = edge(b, c, p) / area
+	w1 = edge(c, a, p) / area
+	w2 = edge(a, b, p) / area
+	inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+
+	d = inverse_depth[triangles]
+	depth = w0 * d[:, 0] + w1 * d[:, 1] + w2 * d[:, 2]
+	return (y * resolution + x)[inside], depth[inside]
+
+
+def _depth_test(depth_buffer, pixels, depth):
+	"""
+	Run the depth test for fragments in draw order, update the buffer and
+	return how many fragments passed.
+	A fragment passes if it is nearer than everything drawn to its pixel before it.
+	"""
+	if len(pixels) == 0:
+		return 0
+	order = np.lexsort((np.arange(len(pixels)), pixels))
+	pixels = pixels[order]
+	depth = depth[order]
+
+	# running maximum per pixel: offset every pixel group above all previous ones
+	group_start = np.concatenate(([True], pixels[1:] != pixels[:-1]))
+	group = np.cumsum(group_start) - 1
+	offset = group * (depth.max() + 1.0)
+	running = np.maximum.accumulate(depth + offset) - offset
+
+	previous = np.empty_like(running)
+	previous[1:] = running[:-1]
+	previous[group_start] = -np.inf
+	previous = np.maximum(previous, depth_buffer[pixels])
+
+	passed = depth > previous
+	np.maximum.at(depth_buffer, pixels, depth)
+	return int(np.count_nonzero(passed))
+
+
+def estimate_overdraw(positions, indices, viewpoints, resolution=ESTIMATE_RESOLUTION):
+	"""
+	Average overdraw (shaded fragments per covered pixel) of drawing the
+	triangles in their current order from each viewpoint, with back face culling.
+	"""
+	positions = np.asarray(positions, dtype=np.float64)
+	indices = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+
+	ratios = []
+	for eye, target in viewpoints:
+		screen, depth = _project(positions, eye, target, resolution)
+		triangle_screen = screen[indices]
+		triangle_depth = depth[indices]
+
+		a, b, c = triangle_screen[:, 0], triangle_screen[:, 1], triangle_screen[:, 2]
+		area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+		# keep front facing triangles entirely in front of the near plane
+		visible = (area > 0) & (triangle_depth.min(axis=1) > ESTIMATE_NEAR) & np.isfinite(area)
+		triangle_screen = triangle_screen[visible]
+		inverse_depth = 1.0 / triangle_depth[visible]
+
+		depth_buffer = np.zeros(resolution * resolution)
+		shaded = 0
+		# rasterize in chunks to bound the fragment arrays, chunks stay in draw order
+		extent = np.ptp(np.clip(triangle_screen, 0, resolution), axis=1) + 1
+		fragment_estimate = np.cumsum(extent[:, 0] * extent[:, 1])
+		chunk_ends = np.searchsorted(fragment_estimate, np.arange(ESTIMATE_CHUNK_FRAGMENTS, fragment_estimate[-1] if len(fragment_estimate) else 0, ESTIMATE_CHUNK_FRAGMENTS))
+		for chunk in np.split(np.arange(len(triangle_screen)), chunk_ends):
+			pixels, fragment_depth = _fragments(triangle_screen[chunk], inverse_depth[chunk], resolution)
+			shaded += _depth_test(depth_buffer, pixels, fragment_depth)
+
+		covered = int(np.count_nonzero(depth_buffer))
+		if covered:
+			ratios.append(shaded / covered)
+
+	return float(np.mean(ratios)) if ratios else 1.0
+
+
+def optimize_bob_mesh(bob_mesh, center, half_size):
+	"""
+	Vertex cache optimize a `BobMesh`, then sort its triangle clusters front to
+	back for the camera region given by `center` and `half_size`.
+	Returns the optimized mesh and a dict of stats.
+	"""
+	viewpoints = sample_viewpoints(center, half_size)
+	overdraw_before = estimate_overdraw(bob_mesh.positions, bob_mesh.indices, viewpoints)
+
+	cache_optimized, stats = vcache.optimize_bob_mesh(bob_mesh)
+	starts = cluster_starts(cache_optimized.indices)
+	triangle_order = sort_clusters(cache_optimized.positions, cache_optimized.indices, starts, viewpoints)
+	vertex_order, indices = vcache.first_use_order(cache_optimized.indices[triangle_order], cache_optimized.vertex_count)
+	optimized = BobMesh(
+		positions=cache_optimized.positions[vertex_order],
+		uvs=cache_optimized.uvs[vertex_order],
+		normals=cache_optimized.normals[vertex_order],
+		indices=indices.astype(cache_optimized.indices.dtype),
+	)
+
+	stats["acmr_after"], stats["atvr_after"] = vcache.cache_stats(optimized.indices)
+	stats["clusters"] = len(starts)
+	stats["overdraw_before"] = overdraw_before
+	stats["overdraw_after"] = estimate_overdraw(optimized.positions, optimized.indices, viewpoints)
+	return optimized, stats
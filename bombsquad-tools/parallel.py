@@ -0,0 +1,67 @@
+import os
+import concurrent.futures
+
+
+"""
+Worker pool for the file import and export operators.
+
+Decoding and encoding .bob and .cob files is NumPy work on whole arrays,
+and NumPy releases the GIL while it copies, converts and writes them, so
+a thread pool spreads that work over the cores. A process pool would
+start a new interpreter per worker that has to import the addon, and
+with it `bpy`, before doing any work, and would copy every array through
+a pipe.
+
+Only code that does not touch `bpy` may run in the pool.
+"""
+
+
+# below this much file data, starting the threads costs about as much as decoding the files
+MIN_POOL_BYTES = 2**20
+
+
+def worker_count(task_count):
+	return max(1, min(task_count, os.cpu_count() or 1))
+
+
+def file_workers(paths):
+	"""
+	Workers for reading `paths` with `map_ordered`: 1 for small imports,
+	which decode in a few milliseconds and only pay the pool overhead,
+	None for the default otherwise.
+	"""
+	total = 0
+	for path in paths:
+		try:
+			total += os.path.getsize(path)
+		except OSError:
+			# reported by the reader when it fails to open the file
+			pass
+	return 1 if total < MIN_POOL_BYTES else None
+
+
+def _call(function, argument):
+	try:
+		return function(argument), None
+	except Exception as error:
+		return None, error
+
+
+def map_ordered(function, arguments, workers=None):
+	"""
+	Run `function` on every argument in a thread pool of `workers` threads,
+	one per core by default.
+
+	Yields `(result, error)` in the order of `arguments`, as soon as the next
+	one is done, so the caller can consume results while later ones are
+	still running. `error` is the exception raised by that call, or None.
+	"""
+	arguments = list(arguments)
+	workers = worker_count(len(arguments)) if workers is None else max(1, min(workers, len(arguments)))
+	if workers == 1:
+		for argument in arguments:
+			yield _call(function, argument)
+		return
+
+	with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+		yield from executor.map(_call, [function] * len(arguments), arguments)
@@ -0,0 +1,86 @@
+import numpy as np
+
+
+"""
+Array in / array out conversion between Blender floats and the integer
+encodings stored in .bob files.
+
+	uv      [0, 1]   <->  uint16 [0, 65535], v is flipped
+	normal  [-1, 1]  <->  int16  [-32767, 32767]
+
+The arithmetic is the same as `map_range` with the arguments the
+importer and exporter used to pass to it, evaluated in float64 in the
+same order, with the same round-half-to-even and the same clamping.
+Encoding therefore produces identical integers. Decoding rounds to 6
+decimals like `map_range(..., precision=6)`.
+
+For inputs inside the encodable range a round trip is off by at most
+half a quantization step plus the 6 decimal rounding of the decoder,
+see UV_MAX_ERROR and NORMAL_MAX_ERROR.
+"""
+
+
+UV_STEPS = 65535
+NORMAL_STEPS = 32767
+
+UV_MAX_ERROR = 0.5 / UV_STEPS + 0.5e-6
+NORMAL_MAX_ERROR = 0.5 / NORMAL_STEPS + 0.5e-6
+
+
+def map_range(value, from_start=0, from_end=1, to_start=0, to_end=127, clamp=False, precision=6):
+	"""The scalar mapping the importer and exporter used before, kept as the reference for the arrays below."""
+	mapped_value = to_start + (to_end - to_start) * (value - from_start) / (from_end - from_start)
+	mapped_value = round(mapped_value, precision)
+	if precision == 0:
+		mapped_value = int(mapped_value)
+	if clamp:
+		if to_start < to_end:
+			mapped_value = max(min(mapped_value, to_end), to_start)
+		else:
+			mapped_value = max(min(mapped_value, to_start), to_end)
+	return mapped_value
+
+
+def encode_uvs(uvs):
+	uvs = np.asarray(uvs, dtype=np.float64).reshape(-1, 2)
+	encoded = np.empty(uvs.shape, dtype=np.float64)
+	encoded[:, 0] = UV_STEPS * uvs[:, 0]
+	encoded[:, 1] = (UV_STEPS * (uvs[:, 1] - 1)) / -1
+	return np.clip(np.round(encoded), 0, UV_STEPS).astype(np.uint16)
+
+
+def decode_uvs(encoded):
+	encoded = np.asarray(encoded, dtype=np.float64).reshape(-1, 2)
+	uvs = np.empty(encoded.shape, dtype=np.float64)
+	uvs[:, 0] = encoded[:, 0] / UV_STEPS
+	uvs[:, 1] = 1 + (-encoded[:, 1]) / UV_STEPS
+	return np.clip(np.round(uvs, 6), 0, 1)
+
+
+def encode_normals(normals):
+	normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+	encoded = -NORMAL_STEPS + (2 * NORMAL_STEPS * (normals + 1)) / 2
+	return np.clip(np.round(encoded), -NORMAL_STEPS, NORMAL_STEPS).astype(np.int16)
+
+
+def decode_normals(encoded):
+	encoded = np.asarray(encoded, dtype=np.float64).reshape(-1, 3)
+	normals = -1 + (2 * (encoded + NORMAL_STEPS)) / (2 * NORMAL_STEPS)
+	return np.clip(np.round(normals, 6), -1, 1)
+
+
+def _error_stats(values, decoded):
+	error = np.abs(np.asarray(values, dtype=np.float64).reshape(decoded.shape) - decoded)
+	if error.size == 0:
+		return {"max": 0.0, "mean": 0.0}
+	return {"max": float(error.max()), "mean": float(error.mean())}
+
+
+def uv_error(uvs):
+	"""Max and mean absolute round trip error of a uv array."""
+	return _error_stats(uvs, decode_uvs(encode_uvs(uvs)))
+
+
+def normal_error(normals):
+	"""Max and mean absolute round trip error of a normal array."""
+	return _error_stats(normals, decode_normals(encode_normals(normals)))
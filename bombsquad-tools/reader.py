@@ -0,0 +1,283 @@
+import mmap
+import struct
+import functools
+import numpy as np
+
+from .codec import BOB_FILE_ID, BOB_HEADER_FORMAT, BOB_HEADER_SIZE, BOB_VERTEX_DTYPE, BOB_INDEX_DTYPES
+from .codec import COB_FILE_ID, COB_HEADER_FORMAT, COB_HEADER_SIZE
+from .meshdata import BobMesh, CobMesh
+
+
+"""
+Memory mapped readers for .bob and .cob files.
+
+Only the header is parsed when a file is opened.
+The vertex and index blocks are exposed as read-only NumPy views
+directly on top of the mapping, so nothing is copied or decoded
+until an array is actually used.
+
+	with BobFile(path) as bob_file:
+		print(bob_file.vertex_count, bob_file.positions.max(axis=0))
+
+	peek(path)  # header stats and bounding box of a .bob or .cob file
+"""
+
+
+class _MappedFile:
+	def __init__(self, path, header_format, header_size):
+		self.path = path
+		with open(path, 'rb') as file:
+			header = file.read(header_size)
+			if len(header) < header_size:
+				raise ValueError(f"`{path}` is too small to contain a header")
+			# mmap refuses empty files, but a header-only file is still valid
+			self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+		self.header = struct.unpack(header_format, header)
+
+	def _check_size(self, expected_size):
+		if len(self._mmap) < expected_size:
+			raise ValueError(f"`{self.path}` is truncated: expected {expected_size} bytes, found {len(self._mmap)}")
+
+	def _view(self, dtype, count, offset):
+		return np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+
+	def close(self):
+		# drop cached views first, the mapping can not be closed while they are alive
+		for name in list(self.__dict__):
+			if isinstance(self.__dict__[name], np.ndarray):
+				del self.__dict__[name]
+		try:
+			self._mmap.close()
+		except BufferError:
+			# the caller still holds a view, the mapping is released once it is garbage collected
+			pass
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+
+class BobFile(_MappedFile):
+	def __init__(self, path):
+		super().__init__(path, BOB_HEADER_FORMAT, BOB_HEADER_SIZE)
+		magic, self.mesh_format, self.vertex_count, self.face_count = self.header
+		if magic != BOB_FILE_ID:
+			raise ValueError(f"`{path}` is not a .bob file")
+		if self.mesh_format not in BOB_INDEX_DTYPES:
+			raise ValueError(f"`{path}` has unknown meshFormat {self.mesh_format}")
+
+		self.index_dtype = BOB_INDEX_DTYPES[self.mesh_format]
+		self._indices_offset = BOB_HEADER_SIZE + self.vertex_count * BOB_VERTEX_DTYPE.itemsize
+		self._check_size(self._indices_offset + self.face_count * 3 * self.index_dtype.itemsize)
+
+	@functools.cached_property
+	def vertices(self):
+		return self._view(BOB_VERTEX_DTYPE, self.vertex_count, BOB_HEADER_SIZE)
+
+	@functools.cached_property
+	def positions(self):
+		return self.vertices["pos"]
+
+	@functools.cached_property
+	def uvs(self):
+		return self.vertices["uv"]
+
+	@functools.cached_property
+	def normals(self):
+		return self.vertices["norm"]
+
+	@functools.cached_property
+	def indices(self):
+		return self._view(self.index_dtype, self.face_count * 3, self._indices_offset).reshape(self.face_count, 3)
+
+	def load(self):
+		"""Copy the mapped data into a `BobMesh` that outlives the file."""
+		return BobMesh(self.positions, self.uvs, self.normals, self.indices.copy())
+
+
+class CobFile(_MappedFile):
+	def __init__(self, path):
+		super().__init__(path, COB_HEADER_FORMAT, COB_HEADER_SIZE)
+		magic, self.vertex_count, self.face_count = self.header
+		if magic != COB_FILE_ID:
+			raise ValueError(f"`{path}` is not a .cob file")
+
+		self.mesh_format = None
+		self._indices_offset = COB_HEADER_SIZE + self.vertex_count * 12
+		self._normals_offset = self._indices_offset + self.face_count * 12
+		self._check_size(self._normals_offset + self.face_count * 12)
+
+	@functools.cached_property
+	def positions(self):
+		return self._view('<f4', self.vertex_count * 3, COB_HEADER_SIZE).reshape(self.vertex_count, 3)
+
+	@functools.cached_property
+	def indices(self):
+		return self._view('<u4', self.face_count * 3, self._indices_offset).reshape(self.face_count, 3)
+
+	@functools.cached_property
+	def normals(self):
+		return self._view('<f4', self.face_count * 3, self._normals_offset).reshape(self.face_count, 3)
+
+	def load(self, read_normals=True):
+		"""Copy the mapped data into a `CobMesh` that outlives the file."""
+		return CobMesh(self.positions.copy(), self.indices.copy(), self.normals.copy() if read_normals else None)
+
+
+def open_mesh_file(path):
+	"""Open a .bob or .cob file, the format is detected from the magic number."""
+	with open(path, 'rb') as file:
+		magic = file.read(4)
+	if len(magic) == 4 and struct.unpack('<I', magic)[0] == COB_FILE_ID:
+		return CobFile(path)
+	return BobFile(path)
+
+
+def peek(path):
+	"""
+	Return header stats and the position bounding box of a .bob or .cob file
+	without decoding anything but the position block.
+	"""
+	with open_mesh_file(path) as mesh_file:
+		bounds = None
+		if mesh_file.vertex_count > 0:
+			positions = mesh_file.positions
+			bounds = (
+				tuple(positions.min(axis=0).tolist()),
+				tuple(positions.max(axis=0).tolist()),
+			)
+			del positions
+
+		return {
+			"format": 'cob' if isinstance(mesh_file, CobFile) else 'bob',
+			"mesh_format": mesh_file.mesh_format,
+			"vertex_count": mesh_file.vertex_count,
+			"face_count": mesh_file.face_count,
+			"bounds": bounds,
+		}
+
+
+"""
+Streaming readers.
+
+These read a file front to back in blocks of at most `chunk_size` elements,
+reusing one buffer per block type, so peak memory stays proportional to
+the chunk size no matter how large the file is.
+Consumers must copy a block if they need it after the next iteration.
+
+	for kind, block in iter_bob_chunks(file):
+		if kind == 'vertices':
+			...  # BOB_VERTEX_DTYPE records
+		elif kind == 'indices':
+			...  # (k, 3) triangle indices
+"""
+
+
+DEFAULT_CHUNK_SIZE = 65536
+
+
+def _iter_blocks(file, dtype, count, chunk_size, width=1):
+	dtype = np.dtype(dtype)
+	buffer = np.empty(min(count, chunk_size) * width, dtype=dtype)
+	raw = buffer.view(np.uint8)
+	for start in range(0, count, chunk_size):
+		size = min(chunk_size, count - start) * width
+		read = file.readinto(memoryview(raw[:size * dtype.itemsize]))
+		if read != size * dtype.itemsize:
+			raise ValueError(f"File is truncated: expected {count} elements, the block starting at element {start} is incomplete")
+		block = buffer[:size]
+		yield block.reshape(-1, width) if width > 1 else block
+
+
+def iter_bob_chunks(file, chunk_size=DEFAULT_CHUNK_SIZE):
+	"""
+	Yield `('header', dict)`, then `('vertices', records)` blocks,
+	then `('indices', (k, 3) array)` blocks of a .bob file.
+	"""
+	magic, mesh_format, vertex_count, face_count = struct.unpack(BOB_HEADER_FORMAT, file.read(BOB_HEADER_SIZE))
+	if magic != BOB_FILE_ID:
+		raise ValueError("Not a .bob file")
+	if mesh_format not in BOB_INDEX_DTYPES:
+		raise ValueError(f"Unknown meshFormat {mesh_format}")
+
+	yield 'header', {
+		"format": 'bob',
+		"mesh_format": mesh_format,
+		"vertex_count": vertex_count,
+		"face_count": face_count,
+	}
+	for block in _iter_blocks(file, BOB_VERTEX_DTYPE, vertex_count, chunk_size):
+		yield 'vertices', block
+	for block in _iter_blocks(file, BOB_INDEX_DTYPES[mesh_format], face_count, chunk_size, width=3):
+		yield 'indices', block
+
+
+def iter_cob_chunks(file, chunk_size=DEFAULT_CHUNK_SIZE, read_normals=True):
+	"""
+	Yield `('header', dict)`, then `('positions', (k, 3) array)` blocks,
+	`('indices', (k, 3) array)` blocks and `('normals', (k, 3) array)` blocks
+	of a .cob file.
+	"""
+	magic, vertex_count, face_count = struct.unpack(COB_HEADER_FORMAT, file.read(COB_HEADER_SIZE))
+	if magic != COB_FILE_ID:
+		raise ValueError("Not a .cob file")
+
+	yield 'header', {
+		"format": 'cob',
+		"mesh_format": None,
+		"vertex_count": vertex_count,
+		"face_count": face_count,
+	}
+	for block in _iter_blocks(file, '<f4', vertex_count, chunk_size, width=3):
+		yield 'positions', block
+	for block in _iter_blocks(file, '<u4', face_count, chunk_size, width=3):
+		yield 'indices', block
+	if read_normals:
+		for block in _iter_blocks(file, '<f4', face_count, chunk_size, width=3):
+			yield 'normals', block
+
+
+def iter_mesh_chunks(file, chunk_size=DEFAULT_CHUNK_SIZE):
+	"""Stream a .bob or .cob file, .bob vertex records are reduced to their positions."""
+	magic = struct.unpack('<I', file.read(4))[0]
+	file.seek(-4, 1)
+	if magic == COB_FILE_ID:
+		yield from iter_cob_chunks(file, chunk_size=chunk_size, read_normals=False)
+		return
+	for kind, block in iter_bob_chunks(file, chunk_size=chunk_size):
+		if kind == 'vertices':
+			yield 'positions', block["pos"]
+		else:
+			yield kind, block
+
+
+def stream_stats(path, chunk_size=DEFAULT_CHUNK_SIZE):
+	"""
+	Compute header stats, the position bounding box and basic validation
+	counts of a .bob or .cob file in bounded memory.
+	"""
+	stats = None
+	lower = np.full(3, np.inf)
+	upper = np.full(3, -np.inf)
+	out_of_range = 0
+	degenerate = 0
+
+	with open(path, 'rb') as file:
+		for kind, block in iter_mesh_chunks(file, chunk_size=chunk_size):
+			if kind == 'header':
+				stats = block
+			elif kind == 'positions':
+				lower = np.minimum(lower, block.min(axis=0))
+				upper = np.maximum(upper, block.max(axis=0))
+			elif kind == 'indices':
+				out_of_range += int(np.count_nonzero((block >= stats["vertex_count"]).any(axis=1)))
+				degenerate += int(np.count_nonzero(
+					(block[:, 0] == block[:, 1]) | (block[:, 1] == block[:, 2]) | (block[:, 2] == block[:, 0])
+				))
+
+	stats["bounds"] = (tuple(lower.tolist()), tuple(upper.tolist())) if stats["vertex_count"] > 0 else None
+	stats["out_of_range_faces"] = out_of_range
+	stats["degenerate_faces"] = degenerate
+	return stats
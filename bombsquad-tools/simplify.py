@@ -0,0 +1,349 @@
+import numpy as np
+
+from . import vcache
+from .meshdata import BobMesh
+from .weld import unique_rows
+
+
+"""
+Quadric error mesh simplification.
+
+Every position accumulates the planes of its triangles (Garland and
+Heckbert, "Surface Simplification Using Quadric Error Metrics") and edges
+are collapsed onto one of their end points, so no new vertices or
+attributes are ever made up. Instead of one collapse at a time from a
+priority queue, every pass picks the cheapest collapse around each
+vertex, keeps those that are the cheapest in their neighbourhood (so no
+two of them touch the same triangle) and applies them all at once with
+array operations.
+
+UV seams and normal splits are kept intact: a position with more than
+one vertex, or on an open border, may only slide along its seam or border
+and every one of its vertices must have a matching vertex on the other
+end of the edge. Extra planes perpendicular to the seam and border edges
+keep them from drifting.
+
+The error of a collapse is the square root of the summed squared
+distances to the accumulated planes, in BombSquad units. It is an upper
+bound of how far the surface moved.
+"""
+
+
+MAX_PASSES = 200
+INDEPENDENT_SET_ROUNDS = 4
+# a collapse may turn a triangle by at most acos(0.25), about 75 degrees,
+# and no triangle may end up turned further than that from where it started
+FLIP_MIN_COSINE = 0.25
+# a sliver (twice the area over the squared longest edge, 0.87 for an equilateral
+# triangle) may turn by at most acos(0.95), about 18 degrees
+SLIVER_MAX_QUALITY = 0.02
+SLIVER_MIN_COSINE = 0.95
+# below this the normal of a triangle is only rounding noise
+DEGENERATE_QUALITY = 1e-6
+
+
+def _plane_quadrics(normals, points):
+	"""Packed quadrics `(a², ab, ac, ad, b², bc, bd, c², cd, d²)` of planes through `points`."""
+	a, b, c = normals.T
+	d = -np.einsum('ij,ij->i', normals, points)
+	return np.stack((a * a, a * b, a * c, a * d, b * b, b * c, b * d, c * c, c * d, d * d), axis=1)
+
+
+def _evaluate(quadrics, points):
+	q = quadrics.T
+	x, y, z = points.T
+	error = (
+		q[0] * x * x + 2 * q[1] * x * y + 2 * q[2] * x * z + 2 * q[3] * x
+		+ q[4] * y * y + 2 * q[5] * y * z + 2 * q[6] * y
+		+ q[7] * z * z + 2 * q[8] * z
+		+ q[9]
+	)
+	return np.maximum(error, 0.0)
+
+
+def _accumulate(ids, values, count):
+	return np.stack([np.bincount(ids, weights=column, minlength=count) for column in values.T], axis=1)
+
+
+def _unit(vectors):
+	length = np.linalg.norm(vectors, axis=1, keepdims=True)
+	with np.errstate(divide='ignore', invalid='ignore'):
+		return np.where(length > 0, vectors / length, 0.0)
+
+
+def _face_normals(points):
+	return np.cross(points[:, 1] - points[:, 0], points[:, 2] - points[:, 0])
+
+
+def _quality(points, normals):
+	longest = np.max([np.einsum('ij,ij->i', edge, edge) for edge in (
+		points[:, 1] - points[:, 0],
+		points[:, 2] - points[:, 1],
+		points[:, 0] - points[:, 2],
+	)], axis=0)
+	with np.errstate(divide='ignore', invalid='ignore'):
+		return np.where(longest > 0, np.linalg.norm(normals, axis=1) / longest, 0.0)
+
+
+def _half_edges(indices):
+	"""Directed edges `(from, to)` of every triangle and the triangle they belong to."""
+	edges = indices[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+	return edges, np.repeat(np.arange(len(indices)), 3)
+
+
+def _boundary_half_edges(indices):
+	"""Mask of half edges that no other triangle shares, which are open borders and seams."""
+	edges, _ = _half_edges(indices)
+	_, inverse = unique_rows(np.sort(edges, axis=1))
+	return np.bincount(inverse)[inverse] == 1
+
+
+def _initial_quadrics(position_ids, indices, points, position_count):
+	edges, faces = _half_edges(indices)
+	triangles = points[indices]
+	normals = _unit(_face_normals(triangles))
+
+	quadrics = _accumulate(position_ids[indices].ravel(), np.repeat(_plane_quadrics(normals, triangles[:, 0]), 3, axis=0), position_count)
+
+	# planes through every border and seam edge, perpendicular to its triangle
+	boundary = _boundary_half_edges(indices)
+	edges, faces = edges[boundary], faces[boundary]
+	start, end = points[edges[:, 0]], points[edges[:, 1]]
+	constraint = _plane_quadrics(_unit(np.cross(end - start, normals[faces])), start)
+	quadrics += _accumulate(position_ids[edges].ravel(), np.repeat(constraint, 2, axis=0), position_count)
+	return quadrics
+
+
+def _boundary_edges(position_ids, indices, position_count):
+	"""Return the packed keys of border and seam edges between positions, and the positions that are locked."""
+	edges, _ = _half_edges(indices)
+	edges = np.sort(position_ids[edges[_boundary_half_edges(indices)]], axis=1)
+	edges = edges[unique_rows(edges)[0]]
+
+	# a position where seams or borders meet or end can not move at all
+	degree = np.bincount(edges.ravel(), minlength=position_count)
+	locked = (degree != 0) & (degree != 2)
+	keys = np.concatenate((edges[:, 0] * position_count + edges[:, 1], edges[:, 1] * position_count + edges[:, 0]))
+	return np.sort(keys), degree != 0, locked
+
+
+def _canonical_triangles(indices):
+	"""Rotate every triangle so it starts with its smallest index, keeping the winding."""
+	shift = np.argmin(indices, axis=1)
+	rows = np.arange(len(indices))[:, None]
+	return indices[rows, (shift[:, None] + np.arange(3)) % 3]
+
+
+def _unique_pairs(first, second, count):
+	"""`np.unique` of integer pairs below `count`, packed into one int64 key each."""
+	return np.unique(first * count + second, return_index=True, return_inverse=True)[1:]
+
+
+def _collapse_candidates(indices, position_ids, constrained, locked, boundary_keys, position_count):
+	"""
+	Return `(u, v, from, to)`: the position collapses `u -> v` that keep
+	seams intact, and for every vertex `from` at `u` its vertex `to` at `v`.
+	"""
+	vertex_count = len(position_ids)
+	edges, _ = _half_edges(indices)
+	pairs = np.concatenate((edges, edges[:, ::-1]))
+	pairs = pairs[_unique_pairs(pairs[:, 0], pairs[:, 1], vertex_count)[0]]
+	pairs = pairs[position_ids[pairs[:, 0]] != position_ids[pairs[:, 1]]]
+
+	# every vertex must move to exactly one vertex at the target position
+	first, inverse = _unique_pairs(pairs[:, 0], position_ids[pairs[:, 1]], position_count)
+	unique_target = np.bincount(inverse) == 1
+	pairs = pairs[first]
+
+	u = position_ids[pairs[:, 0]]
+	v = position_ids[pairs[:, 1]]
+	first, inverse = _unique_pairs(u, v, position_count)
+	vertices_at = np.bincount(position_ids[np.unique(indices)], minlength=position_count)
+	moved = np.bincount(inverse)
+	ambiguous = np.bincount(inverse, weights=~unique_target) > 0
+	valid = (moved == vertices_at[u[first]]) & ~ambiguous
+
+	# seam and border positions only slide along their seam or border
+	cu, cv = u[first], v[first]
+	keys = cu * position_count + cv
+	along_boundary = np.zeros(len(keys), dtype=bool)
+	if len(boundary_keys):
+		found = np.minimum(np.searchsorted(boundary_keys, keys), len(boundary_keys) - 1)
+		along_boundary = boundary_keys[found] == keys
+	valid &= ~locked[cu] & (~constrained[cu] | along_boundary)
+
+	collapse = valid[inverse]
+	return cu[valid], cv[valid], pairs[collapse, 0], pairs[collapse, 1]
+
+
+def _independent_set(candidates, cost, triangles, position_count):
+	"""
+	Greedily pick cheap collapses so that no two of them share a triangle.
+	Every round takes the candidates that come first in all of their
+	triangles, then drops the candidates that share a triangle with them.
+	Costs within a factor of sqrt(2) count as equal and are ordered
+	randomly, which breaks up long chains of slowly rising costs.
+	"""
+	unset = np.iinfo(np.int64).max
+	with np.errstate(divide='ignore'):
+		bucket = np.floor(2 * np.log2(cost[candidates]))
+	tie_break = np.random.default_rng(len(candidates)).permutation(len(candidates))
+	rank = np.full(position_count, unset)
+	rank[candidates[np.lexsort((tie_break, bucket))]] = np.arange(len(candidates))
+	selected = []
+	for _ in range(INDEPENDENT_SET_ROUNDS):
+		ring = np.full(position_count, unset)
+		np.minimum.at(ring, triangles.ravel(), np.repeat(rank[triangles].min(axis=1), 3))
+		picked = candidates[rank[candidates] == ring[candidates]]
+		if len(picked) == 0:
+			break
+		selected.append(picked)
+
+		is_picked = np.zeros(position_count, dtype=bool)
+		is_picked[picked] = True
+		touched = np.zeros(position_count, dtype=bool)
+		touched[triangles[is_picked[triangles].any(axis=1)]] = True
+		rank[touched] = unset
+		candidates = candidates[~touched[candidates]]
+	selected = np.concatenate(selected) if selected else np.zeros(0, dtype=np.int64)
+	return selected[np.argsort(cost[selected], kind='stable')]
+
+
+def simplify(positions, indices, target_ratio=None, max_error=None):
+	"""
+	Simplify a triangle list over `positions` by collapsing edges until at most
+	`target_ratio` of the triangles are left or no collapse stays below `max_error`.
+	Vertices that share a position but are separate vertices (uv seams,
+	normal splits) are treated as a seam and preserved.
+
+	Returns the new `(m, 3)` indices into the same vertex arrays, and the
+	largest error of any collapse.
+	"""
+	points = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+	indices = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+	target_count = 0 if target_ratio is None else int(len(indices) * target_ratio)
+	max_cost = np.inf if max_error is None else max_error * max_error
+
+	position_first, position_ids = unique_rows(np.ascontiguousarray(points))
+	position_count = len(position_first)
+	position_points = points[position_first]
+
+	quadrics = _initial_quadrics(position_ids, indices, points, position_count)
+	_, constrained, locked = _boundary_edges(position_ids, indices, position_count)
+	reference_normals = _unit(_face_normals(position_points[position_ids[indices]]))
+
+	error = 0.0
+	for _ in range(MAX_PASSES):
+		if len(indices) <= target_count:
+			break
+
+		# collapses along a seam or border make new seam and border edges
+		boundary_keys, _, _ = _boundary_edges(position_ids, indices, position_count)
+		u, v, vertex_from, vertex_to = _collapse_candidates(indices, position_ids, constrained, locked, boundary_keys, position_count)
+		cost = _evaluate(quadrics[u] + quadrics[v], position_points[v])
+
+		# the cheapest collapse of every position
+		order = np.lexsort((cost, u))
+		best = order[np.concatenate(([True], u[order][1:] != u[order][:-1]))] if len(order) else order
+		best = best[cost[best] <= max_cost]
+		target = np.full(position_count, -1)
+		target[u[best]] = v[best]
+		best_cost = np.full(position_count, np.inf)
+		best_cost[u[best]] = cost[best]
+
+		# reject collapses that would flip or fold a triangle, checked against its current and its
+		# original normal, or that would turn it into a sliver
+		triangles = position_ids[indices]
+		corner_target = target[triangles]
+		corner = np.nonzero(corner_target.ravel() >= 0)[0]
+		face, slot = corner // 3, corner % 3
+		moved_to = corner_target.ravel()[corner]
+		collapsed = (triangles[face] == moved_to[:, None]).any(axis=1)
+		before = position_points[triangles[face]]
+		after = before.copy()
+		after[np.arange(len(face)), slot] = position_points[moved_to]
+		before_normals = _face_normals(before)
+		after_normals = _face_normals(after)
+		after_quality = _quality(after, after_normals)
+		after_normals = _unit(after_normals)
+		turn = np.einsum('ij,ij->i', _unit(before_normals), after_normals)
+		flips = (
+			(turn < FLIP_MIN_COSINE)
+			| ((after_quality < SLIVER_MAX_QUALITY) & (turn < SLIVER_MIN_COSINE))
+			| ((after_quality < DEGENERATE_QUALITY) & (_quality(before, before_normals) >= DEGENERATE_QUALITY))
+			| (np.einsum('ij,ij->i', reference_normals[face], after_normals) < FLIP_MIN_COSINE)
+		)
+		flipped = np.bincount(triangles.ravel()[corner], weights=flips & ~collapsed, minlength=position_count) > 0
+		# and collapses that would erase a small separate part altogether
+		vanished = np.bincount(triangles.ravel()[corner], weights=~collapsed, minlength=position_count) == 0
+		best_cost[flipped | vanished] = np.inf
+
+		candidates = np.nonzero(np.isfinite(best_cost))[0]
+		if len(candidates) == 0:
+			break
+		if target_count > 0:
+			# only the cheaper half of the collapses each pass, so the cheap ones are done
+			# before the target is reached. With just an error budget all of them are fine.
+			candidates = candidates[best_cost[candidates] <= np.median(best_cost[candidates])]
+		selected = _independent_set(candidates, best_cost, triangles, position_count)
+
+		# do not overshoot the target triangle count
+		removed = np.bincount(triangles.ravel()[corner], weights=collapsed, minlength=position_count)[selected]
+		enough = np.searchsorted(np.cumsum(removed), len(indices) - target_count)
+		selected = selected[:enough + 1]
+		if len(selected) == 0:
+			break
+
+		is_selected = np.zeros(position_count, dtype=bool)
+		is_selected[selected] = True
+		remap = np.arange(len(points))
+		moves = is_selected[position_ids[vertex_from]] & (position_ids[vertex_to] == target[position_ids[vertex_from]])
+		remap[vertex_from[moves]] = vertex_to[moves]
+		np.add.at(quadrics, target[selected], quadrics[selected])
+		error = max(error, float(best_cost[selected].max()))
+
+		indices = remap[indices]
+		triangles = position_ids[indices]
+		keep = (triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) & (triangles[:, 2] != triangles[:, 0])
+		indices = _canonical_triangles(indices[keep])
+		reference_normals = reference_normals[keep]
+		unique = np.sort(unique_rows(indices)[0])
+		indices = indices[unique]
+		reference_normals = reference_normals[unique]
+
+	return indices, float(np.sqrt(error))
+
+
+def simplify_bob_mesh(bob_mesh, target_ratio=None, max_error=None):
+	"""Simplify a `BobMesh` with `simplify` and drop the vertices that are no longer used."""
+	indices, error = simplify(bob_mesh.positions, bob_mesh.indices, target_ratio=target_ratio, max_error=max_error)
+	vertex_order, indices = vcache.first_use_order(indices, bob_mesh.vertex_count)
+	# unused vertices are sorted to the end
+	vertex_order = vertex_order[:len(np.unique(indices))]
+	return BobMesh(
+		positions=bob_mesh.positions[vertex_order],
+		uvs=bob_mesh.uvs[vertex_order],
+		normals=bob_mesh.normals[vertex_order],
+		indices=indices,
+	), error
+
+
+def lod_chain(bob_mesh, count, target_ratio=None, max_error=None):
+	"""
+	Return `count` levels of detail as a list of `(BobMesh, error)`, each one
+	simplified from the previous level. Each level keeps `target_ratio` of the
+	triangles of the previous one, and level `n` may move up to
+	`max_error * 2 ** (n - 1)` from the full mesh.
+
+	The error of a level is measured against the level it is simplified
+	from, so the error from the full mesh is bounded by their sum. That sum
+	is returned, and each level only gets the rest of its budget.
+	"""
+	levels = []
+	total_error = 0.0
+	for level in range(1, count + 1):
+		level_error = None if max_error is None else max_error * 2 ** (level - 1) - total_error
+		bob_mesh, error = simplify_bob_mesh(bob_mesh, target_ratio=target_ratio, max_error=level_error)
+		total_error += error
+		levels.append((bob_mesh, total_error))
+	return levels
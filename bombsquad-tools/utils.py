@@ -1,17 +1,35 @@
 import os
+import numpy as np
 import bpy
 
-def map_range(value, from_start=0, from_end=1, to_start=0, to_end=127, clamp=False, precision=6):
-	mapped_value = to_start + (to_end - to_start) * (value - from_start) / (from_end - from_start)
-	mapped_value = round(mapped_value, precision)
-	if precision == 0:
-		mapped_value = int(mapped_value)
-	if clamp:
-		if to_start < to_end:
-			mapped_value = max(min(mapped_value, to_end), to_start)
-		else:
-			mapped_value = max(min(mapped_value, to_start), to_end)
-	return mapped_value
+def mesh_from_triangles(name, positions, indices):
+	"""
+	Create a mesh from a (n, 3) position array and a (m, 3) triangle index array
+	by sizing it up front and filling it with `foreach_set`.
+	"""
+	indices = np.ascontiguousarray(indices, dtype=np.int32).reshape(-1, 3)
+
+	mesh = bpy.data.meshes.new(name=name)
+	mesh.vertices.add(len(positions))
+	mesh.vertices.foreach_set("co", np.ascontiguousarray(positions, dtype=np.float32).ravel())
+	mesh.loops.add(indices.size)
+	mesh.loops.foreach_set("vertex_index", indices.ravel())
+	mesh.polygons.add(len(indices))
+	mesh.polygons.foreach_set("loop_start", np.arange(0, indices.size, 3, dtype=np.int32))
+	mesh.update(calc_edges=True)
+
+	return mesh
+
+
+def report_messages(operator, messages):
+	"""
+	Print and report `(level, message, report)` tuples collected off the main thread.
+	`report` is the short text shown in the status bar, or None to only print.
+	"""
+	for level, message, report in messages:
+		print(f"{operator.__class__.__name__}: [{level}] {message}")
+		if report is not None:
+			operator.report({level}, report)
 
 
 def obj_to_mesh(obj, context, apply_modifiers, apply_object_transformations):
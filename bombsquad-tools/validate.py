@@ -0,0 +1,120 @@
+import hashlib
+import numpy as np
+from mathutils import Vector
+from mathutils.bvhtree import BVHTree
+
+
+"""
+Validation of map locations against the collision mesh.
+
+Players, flags and powerups are dropped at their locations and fall onto
+the collision mesh, so a location has to sit a little above walkable
+collision. For every location a ray is cast down through a BVH of the
+collision mesh:
+	no ground below, or ground further down than the maximum height, is floating,
+	hitting the back of a face means the location is under the surface or inside a solid, so buried.
+Collision above a location is not checked, a platform over a spawn is
+fine whichever way its faces point.
+Locations outside `map_bounds` are despawned by the game right away.
+
+Building the BVH is the slow part, so trees are cached per object. The
+depsgraph handler in `leveldefs.py` marks a tree as stale when its object
+changes or is not in the depsgraph, only then the evaluated geometry is
+read and hashed again, and the tree rebuilt if it differs. Undo and
+loading a file clear the cache.
+"""
+
+
+VALIDATED_LOCATIONS = ('spawn', 'ffa_spawn', 'flag', 'flag_default', 'powerup_spawn')
+
+DEFAULT_MAX_HEIGHT = 2.0
+# locations may sink this far into the ground
+SURFACE_TOLERANCE = 0.01
+
+# object session_uid -> (geometry digest, tree, whether no update was reported since)
+_tree_cache = {}
+
+
+def collision_tree(obj, depsgraph):
+	"""
+	BVH of the evaluated triangles of `obj` in world space.
+	The tree is reused while the geometry has not changed.
+	"""
+	cached = _tree_cache.get(obj.session_uid)
+	if cached is not None and cached[2]:
+		return cached[1]
+
+	evaluated = obj.evaluated_get(depsgraph)
+	mesh = evaluated.to_mesh()
+	try:
+		mesh.calc_loop_triangles()
+		positions = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+		mesh.vertices.foreach_get("co", positions)
+		triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+		mesh.loop_triangles.foreach_get("vertices", triangles)
+	finally:
+		evaluated.to_mesh_clear()
+
+	matrix = np.array(obj.matrix_world, dtype=np.float32)
+	positions = positions.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+
+	digest = hashlib.blake2b(positions.tobytes() + triangles.tobytes(), digest_size=16).digest()
+	if cached is not None and cached[0] == digest:
+		tree = cached[1]
+	else:
+		tree = BVHTree.FromPolygons(positions.tolist(), triangles.reshape(-1, 3).tolist(), all_triangles=True)
+	_tree_cache[obj.session_uid] = (digest, tree, True)
+	return tree
+
+
+def inside_bounds(bounds, point):
+	"""Whether `point` is inside the cube drawn by the `map_bounds` empty `bounds`."""
+	local = bounds.matrix_world.inverted() @ point
+	return all(abs(n) <= bounds.empty_display_size for n in local)
+
+
+def validate_locations(objects, tree, bounds=None, max_height=DEFAULT_MAX_HEIGHT):
+	"""
+	Check location empties against a collision BVH and optionally a `map_bounds` empty.
+	Returns a list of `(obj, problem)` for the locations that fail.
+	"""
+	up = Vector((0.0, 0.0, 1.0))
+	down = -up
+
+	problems = []
+	for obj in objects:
+		if obj.name.split('.')[0] not in VALIDATED_LOCATIONS:
+			continue
+
+		point = obj.matrix_world.to_translation()
+		origin = point + up * SURFACE_TOLERANCE
+
+		if bounds is not None and not inside_bounds(bounds, point):
+			problems.append((obj, "outside map_bounds"))
+
+		ground, ground_normal, _, ground_distance = tree.ray_cast(origin, down)
+
+		if ground is not None and ground_normal.dot(down) > 0:
+			problems.append((obj, "buried under or inside the collision mesh"))
+		elif ground is None:
+			problems.append((obj, "no collision below"))
+		elif ground_distance - SURFACE_TOLERANCE > max_height:
+			problems.append((obj, f"floating {ground_distance - SURFACE_TOLERANCE:.2f} above the collision mesh"))
+
+	return problems
+
+
+def clear():
+	_tree_cache.clear()
+
+
+def cached_trees():
+	"""Session uids of the objects with a cached tree."""
+	return set(_tree_cache)
+
+
+def mark_stale(uids):
+	"""Read the geometry of these objects again on their next `collision_tree`, the tree is kept if it did not change."""
+	for uid in uids:
+		digest, tree, _ = _tree_cache[uid]
+		_tree_cache[uid] = (digest, tree, False)
@@ -0,0 +1,155 @@
+import math
+import numpy as np
+
+
+"""
+Vertex welding by sorting packed grid keys.
+
+Every attribute is snapped to a grid whose cell diagonal equals the
+tolerance, so two corners that share a key are always closer than the
+tolerance in every attribute. The keys of all corners are packed into one
+row each and deduplicated with a single sort, which makes welding
+O(n log n) instead of comparing every corner with every unique vertex.
+
+Corners that are within the tolerance but fall on different sides of a
+cell boundary are kept apart. That only costs a duplicate vertex,
+it never merges vertices that should stay split.
+"""
+
+
+def _grid_keys(values, tolerance):
+	values = np.asarray(values, dtype=np.float64)
+	# spell out the width, -1 can not be inferred for zero rows
+	values = values.reshape(len(values), int(np.prod(values.shape[1:])))
+	cell_size = tolerance / math.sqrt(values.shape[1])
+	return np.floor(values / cell_size).astype(np.int64)
+
+
+def unique_rows(keys):
+	"""
+	Deduplicate the rows of a 2D integer array.
+
+	Returns `(first, inverse)` where `first` holds the index of the first
+	occurrence of every unique row, in first-seen order,
+	and `keys[first][inverse] == keys`.
+	"""
+	keys = np.ascontiguousarray(keys)
+	if len(keys) == 0:
+		return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+	packed = keys.view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1]))).ravel()
+	_, first, inverse = np.unique(packed, return_index=True, return_inverse=True)
+
+	# np.unique orders rows by their bytes, renumber them by first use instead
+	order = np.argsort(first, kind='stable')
+	rank = np.empty_like(order)
+	rank[order] = np.arange(len(order))
+
+	return first[order], rank[inverse.ravel()]
+
+
+def weld_vertices(positions, normals, uvs, tolerance=0.001):
+	"""
+	Merge face corners whose position, normal and uv are all within `tolerance`.
+
+	Returns `(first, inverse)` as described in `unique_rows`:
+	`positions[first]` are the welded vertices and `inverse` maps every
+	corner to its welded vertex.
+	"""
+	keys = np.concatenate((
+		_grid_keys(positions, tolerance),
+		_grid_keys(normals, tolerance),
+		_grid_keys(uvs, tolerance),
+	), axis=1)
+	return unique_rows(keys)
+
+
+def propagate_labels(labels, first, second):
+	"""Connected components of the graph with edges `first[i] - second[i]`, as the smallest member of each."""
+	while True:
+		updated = labels.copy()
+		np.minimum.at(updated, first, labels[second])
+		np.minimum.at(updated, second, labels[first])
+		# pointer jumping, every label is a member of the same component
+		while True:
+			jumped = updated[updated]
+			if np.array_equal(jumped, updated):
+				break
+			updated = jumped
+		if np.array_equal(updated, labels):
+			return labels
+		labels = updated
+
+
+# large primes from Teschner et al., "Optimized Spatial Hashing for Collision Detection of Deformable Objects"
+SPATIAL_HASH_PRIMES = np.array([73856093, 19349663, 83492791], dtype=np.int64)
+
+# the cell itself and half of the 26 cells around it, the other half finds the same pairs from the other side
+NEIGHBOUR_OFFSETS = np.stack(np.meshgrid((-1, 0, 1), (-1, 0, 1), (-1, 0, 1), indexing='ij'), axis=-1).reshape(-1, 3)[13:]
+
+
+def _spatial_hash(cells):
+	return np.bitwise_xor.reduce(cells * SPATIAL_HASH_PRIMES, axis=1)
+
+
+def weld_positions(positions, tolerance):
+	"""
+	Merge positions closer than `tolerance`, also across grid cell boundaries.
+
+	Positions are bucketed into a spatial hash of `tolerance` sized cells,
+	and pairs closer than `tolerance` are searched in neighbouring cells.
+	Chains of close positions are merged into one, at the lowest numbered
+	position of the chain.
+	Returns `(first, inverse)` as described in `unique_rows`.
+	"""
+	positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+	count = len(positions)
+	if count == 0 or tolerance <= 0:
+		return unique_rows(np.ascontiguousarray(positions))
+
+	cells = np.floor(positions / tolerance).astype(np.int64)
+	cell_first, cell_of_position = unique_rows(cells)
+	occupied = cells[cell_first]
+	cell_sizes = np.bincount(cell_of_position, minlength=len(occupied))
+	cell_starts = np.cumsum(cell_sizes) - cell_sizes
+	position_order = np.argsort(cell_of_position, kind='stable')
+
+	hashes = _spatial_hash(occupied)
+	hash_order = np.argsort(hashes)
+	table = hashes[hash_order]
+
+	first_close, second_close = [], []
+	for offset in NEIGHBOUR_OFFSETS:
+		neighbour_cells = occupied + offset
+		neighbour_hashes = _spatial_hash(neighbour_cells)
+		# sorted needles keep the search cache friendly
+		needle_order = np.argsort(neighbour_hashes)
+		lower = np.searchsorted(table, neighbour_hashes[needle_order], side='left')
+		upper = np.searchsorted(table, neighbour_hashes[needle_order], side='right')
+		matches = upper - lower
+		cells_with_match = needle_order[np.repeat(np.arange(len(needle_order)), matches)]
+		matched = hash_order[np.repeat(lower - np.cumsum(matches) + matches, matches) + np.arange(matches.sum())]
+		# different cells with the same hash
+		same_cell = (occupied[matched] == neighbour_cells[cells_with_match]).all(axis=1)
+		if not same_cell.any():
+			continue
+		neighbour = np.full(len(occupied), -1)
+		neighbour[cells_with_match[same_cell]] = matched[same_cell]
+
+		queries = np.nonzero(neighbour[cell_of_position] >= 0)[0]
+		neighbour = neighbour[cell_of_position[queries]]
+		counts = cell_sizes[neighbour]
+		candidates = position_order[np.repeat(cell_starts[neighbour] - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())]
+		queries = np.repeat(queries, counts)
+		difference = positions[queries] - positions[candidates]
+		close = np.einsum('ij,ij->i', difference, difference) <= tolerance * tolerance
+		if not offset.any():
+			close &= queries > candidates
+		first_close.append(queries[close])
+		second_close.append(candidates[close])
+
+	representative = propagate_labels(np.arange(count), np.concatenate(first_close), np.concatenate(second_close))
+
+	# the representative is the first position of its group, so sorting keeps first-seen order
+	first, inverse = np.unique(representative, return_inverse=True)
+	return first, inverse.ravel()
@@ -0,0 +1,186 @@
+import os
+import struct
+import secrets
+import numpy as np
+
+from . import codec
+
+
+"""
+Streaming writers for .bob and .cob files.
+
+The header counts are given up front, then the blocks are written
+incrementally in file order, so the caller never needs the whole mesh
+in memory at once.
+
+	with BobWriter(path, vertex_count, face_count) as bob_writer:
+		for positions, uvs, normals in vertex_blocks:
+			bob_writer.write_vertices(positions, uvs, normals)
+		for indices in index_blocks:
+			bob_writer.write_indices(indices)
+
+When a path is given, the data goes to a temporary file next to it which
+is renamed into place only if every block was written, so a failed export
+never leaves a half written file behind.
+A file object is written to directly.
+"""
+
+
+DEFAULT_CHUNK_SIZE = 65536
+
+_TEMP_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+
+
+def _create_temp(path):
+	"""
+	Create a new temporary file next to `path`, open for writing.
+
+	Unlike `tempfile.mkstemp`, which always uses mode 0600, the file is
+	created with 0666 so the kernel applies the umask like `open(path, 'wb')`.
+	"""
+	prefix = os.path.join(os.path.dirname(os.path.abspath(path)), '.' + os.path.basename(path) + '.')
+	while True:
+		temp_path = prefix + secrets.token_hex(4) + '.tmp'
+		try:
+			return os.open(temp_path, _TEMP_FLAGS, 0o666), temp_path
+		except FileExistsError:
+			continue
+
+
+class _StreamWriter:
+	def __init__(self, file, expected):
+		self._expected = expected
+		self._counts = [0] * len(expected)
+		self._stage = 0
+		self._path = None
+		self._temp_path = None
+		if isinstance(file, (str, bytes, os.PathLike)):
+			self._path = os.fsdecode(file)
+			fd, self._temp_path = _create_temp(self._path)
+			self.file = os.fdopen(fd, 'wb')
+		else:
+			self.file = file
+
+	def _advance(self, stage, count):
+		"""Check that blocks arrive in file order and match the header counts."""
+		if stage < self._stage:
+			raise ValueError(f"{self.__class__.__name__}: blocks must be written in file order")
+		for previous in range(self._stage, stage):
+			self._check_block(previous)
+		self._stage = stage
+		if self._counts[stage] + count > self._expected[stage]:
+			raise ValueError(f"{self.__class__.__name__}: more elements than announced in the header")
+		self._counts[stage] += count
+
+	def _check_block(self, stage):
+		if self._counts[stage] != self._expected[stage]:
+			raise ValueError(f"{self.__class__.__name__}: expected {self._expected[stage]} elements in block {stage}, got {self._counts[stage]}")
+
+	def close(self, discard=False):
+		if not discard:
+			for stage in range(len(self._expected)):
+				self._check_block(stage)
+		if self._temp_path is None:
+			return
+		self.file.close()
+		if discard:
+			os.remove(self._temp_path)
+		else:
+			# keep the mode of the file that is replaced, like a plain write would
+			try:
+				os.chmod(self._temp_path, os.stat(self._path).st_mode & 0o7777)
+			except FileNotFoundError:
+				pass
+			os.replace(self._temp_path, self._path)
+		self._temp_path = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc, tb):
+		if exc_type is not None:
+			self.close(discard=True)
+		else:
+			try:
+				self.close()
+			except Exception:
+				self.close(discard=True)
+				raise
+
+
+class BobWriter(_StreamWriter):
+	def __init__(self, file, vertex_count, face_count):
+		super().__init__(file, (vertex_count, face_count))
+		self.vertex_count = vertex_count
+		self.face_count = face_count
+		try:
+			self.mesh_format = codec.mesh_format(vertex_count)
+			self._index_dtype = codec.BOB_INDEX_DTYPES[self.mesh_format]
+			self.file.write(struct.pack(codec.BOB_HEADER_FORMAT, codec.BOB_FILE_ID, self.mesh_format, vertex_count, face_count))
+		except Exception:
+			# __exit__ does not run when __init__ raises, remove the temporary file here
+			self.close(discard=True)
+			raise
+
+	def write_vertices(self, positions, uvs, normals):
+		self._advance(0, len(positions))
+		vertices = np.zeros(len(positions), dtype=codec.BOB_VERTEX_DTYPE)
+		vertices["pos"] = positions
+		vertices["uv"] = uvs
+		vertices["norm"] = normals
+		self.file.write(vertices.tobytes())
+
+	def write_indices(self, indices):
+		self._advance(1, len(indices))
+		self.file.write(np.asarray(indices).astype(self._index_dtype, copy=False).tobytes())
+
+
+class CobWriter(_StreamWriter):
+	def __init__(self, file, vertex_count, face_count):
+		super().__init__(file, (vertex_count, face_count, face_count))
+		self.vertex_count = vertex_count
+		self.face_count = face_count
+		try:
+			self.file.write(struct.pack(codec.COB_HEADER_FORMAT, codec.COB_FILE_ID, vertex_count, face_count))
+		except Exception:
+			self.close(discard=True)
+			raise
+
+	def write_positions(self, positions):
+		self._advance(0, len(positions))
+		self.file.write(np.ascontiguousarray(positions, dtype='<f4').tobytes())
+
+	def write_indices(self, indices):
+		self._advance(1, len(indices))
+		self.file.write(np.ascontiguousarray(indices, dtype='<u4').tobytes())
+
+	def write_normals(self, normals):
+		self._advance(2, len(normals))
+		self.file.write(np.ascontiguousarray(normals, dtype='<f4').tobytes())
+
+
+def _chunks(array, chunk_size):
+	for start in range(0, len(array), chunk_size):
+		yield array[start:start + chunk_size]
+
+
+def write_bob(file, bob_mesh, chunk_size=DEFAULT_CHUNK_SIZE):
+	"""Write a `BobMesh` block by block."""
+	with BobWriter(file, bob_mesh.vertex_count, bob_mesh.face_count) as bob_writer:
+		for start in range(0, bob_mesh.vertex_count, chunk_size):
+			stop = start + chunk_size
+			bob_writer.write_vertices(bob_mesh.positions[start:stop], bob_mesh.uvs[start:stop], bob_mesh.normals[start:stop])
+		for indices in _chunks(bob_mesh.indices, chunk_size):
+			bob_writer.write_indices(indices)
+
+
+def write_cob(file, cob_mesh, chunk_size=DEFAULT_CHUNK_SIZE):
+	"""Write a `CobMesh` block by block, computing face normals if they are missing."""
+	normals = cob_mesh.ensure_normals()
+	with CobWriter(file, cob_mesh.vertex_count, cob_mesh.face_count) as cob_writer:
+		for positions in _chunks(cob_mesh.positions, chunk_size):
+			cob_writer.write_positions(positions)
+		for indices in _chunks(cob_mesh.indices, chunk_size):
+			cob_writer.write_indices(indices)
+		for normals in _chunks(normals, chunk_size):
+			cob_writer.write_normals(normals)
@@ -0,0 +1,14 @@
+import os
+import sys
+
+
+"""
+The tests check the bpy-free modules of the addon with plain python and
+NumPy. They reuse the helpers and the legacy reference implementations
+of the benchmark scripts.
+
+	make test
+"""
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'benchmarks'))
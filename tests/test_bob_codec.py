@@ -0,0 +1,51 @@
+import io
+import struct
+
+import numpy as np
+import pytest
+
+import common
+import bob_deserialize
+import bob_serialize
+
+
+codec = common.load_module('codec')
+
+
+def encode(serializer, data):
+	file = io.BytesIO()
+	serializer(data, file)
+	return file.getvalue()
+
+
+@pytest.mark.parametrize('vertex_count, face_count, mesh_format', ((250, 500, 0), (1_000, 2_000, 1), (70_000, 1_000, 2)))
+def test_deserialize_matches_legacy(vertex_count, face_count, mesh_format):
+	payload = common.make_bob_bytes(vertex_count, face_count, mesh_format=mesh_format)
+	legacy = bob_deserialize.legacy_deserialize(io.BytesIO(payload))
+	data = codec.deserialize_bob(io.BytesIO(payload))
+
+	assert np.array_equal(data.positions, np.array([v["pos"] for v in legacy["vertices"]], dtype=np.float32))
+	assert np.array_equal(data.uvs, np.array([v["uv"] for v in legacy["vertices"]]))
+	assert np.array_equal(data.normals, np.array([v["norm"] for v in legacy["vertices"]]))
+	assert np.array_equal(data.indices, np.array([f["indices"] for f in legacy["faces"]]))
+
+
+@pytest.mark.parametrize('vertex_count, face_count', ((1_000, 2_000), (65_535, 1_000), (70_000, 1_000)))
+def test_serialize_round_trip(vertex_count, face_count):
+	payload = common.make_bob_bytes(vertex_count, face_count)
+	data = codec.deserialize_bob(io.BytesIO(payload))
+
+	encoded = encode(codec.serialize_bob, data)
+	assert encoded == payload
+	assert encoded == encode(bob_serialize.legacy_serialize, data)
+
+
+def test_empty_mesh_is_header_only():
+	empty = np.zeros((0, 3), dtype=np.float32)
+	data = codec.corners_to_bob(empty, empty, np.zeros((0, 2), dtype=np.float32))
+	assert data.vertex_count == 0 and data.face_count == 0
+
+	encoded = encode(codec.serialize_bob, data)
+	assert encoded == struct.pack('<IIII', codec.BOB_FILE_ID, 1, 0, 0)
+	assert encoded == encode(bob_serialize.legacy_serialize, data)
+	assert codec.deserialize_bob(io.BytesIO(encoded)).face_count == 0
@@ -0,0 +1,44 @@
+import io
+
+import numpy as np
+import pytest
+
+import common
+import cob_codec
+
+
+codec = common.load_module('codec')
+
+
+def encode(serializer, data):
+	file = io.BytesIO()
+	serializer(data, file)
+	return file.getvalue()
+
+
+@pytest.mark.parametrize('vertex_count, face_count', ((0, 0), (1_000, 2_000), (50_000, 100_000)))
+def test_deserialize_matches_legacy(vertex_count, face_count):
+	payload = common.make_cob_bytes(vertex_count, face_count)
+	legacy = cob_codec.legacy_deserialize(io.BytesIO(payload))
+	data = codec.deserialize_cob(io.BytesIO(payload))
+
+	assert np.array_equal(data.positions, np.array([v["pos"] for v in legacy["vertices"]], dtype=np.float32).reshape(-1, 3))
+	assert np.array_equal(data.indices, np.array([f["indices"] for f in legacy["faces"]]).reshape(-1, 3))
+	assert np.array_equal(data.normals, np.array([n["dir"] for n in legacy["normals"]], dtype=np.float32).reshape(-1, 3))
+
+
+def test_deserialize_without_normals():
+	payload = common.make_cob_bytes(100, 200)
+	data = codec.deserialize_cob(io.BytesIO(payload), read_normals=False)
+	assert data.normals is None
+	assert np.array_equal(data.indices, codec.deserialize_cob(io.BytesIO(payload)).indices)
+
+
+@pytest.mark.parametrize('vertex_count, face_count', ((0, 0), (1_000, 2_000), (50_000, 100_000)))
+def test_serialize_round_trip(vertex_count, face_count):
+	payload = common.make_cob_bytes(vertex_count, face_count)
+	data = codec.deserialize_cob(io.BytesIO(payload))
+
+	encoded = encode(codec.serialize_cob, data)
+	assert encoded == payload
+	assert encoded == encode(cob_codec.legacy_serialize, data)
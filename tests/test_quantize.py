@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+import common
+import quantize as quantize_benchmark
+
+
+quantize = common.load_module('quantize')
+
+
+@pytest.fixture
+def uvs():
+	rng = np.random.default_rng(0)
+	# slightly out of range values exercise the clamping, and exact halves the tie rounding
+	uvs = rng.uniform(-0.01, 1.01, (10_000, 2)).astype(np.float32)
+	uvs[:1000] = (rng.integers(0, 65535, (1000, 2)) + 0.5) / 65535
+	return uvs
+
+
+@pytest.fixture
+def normals():
+	normals = np.random.default_rng(0).normal(size=(10_000, 3))
+	return (normals / np.linalg.norm(normals, axis=1, keepdims=True)).astype(np.float32)
+
+
+def test_uvs_match_map_range(uvs):
+	encoded = quantize.encode_uvs(uvs)
+	assert np.array_equal(encoded, np.array(quantize_benchmark.scalar_encode_uvs(quantize.map_range, uvs)))
+	assert np.allclose(quantize.decode_uvs(encoded), quantize_benchmark.scalar_decode_uvs(quantize.map_range, encoded), rtol=0, atol=1e-12)
+
+
+def test_normals_match_map_range(normals):
+	encoded = quantize.encode_normals(normals)
+	assert np.array_equal(encoded, np.array(quantize_benchmark.scalar_encode_normals(quantize.map_range, normals)))
+	assert np.allclose(quantize.decode_normals(encoded), quantize_benchmark.scalar_decode_normals(quantize.map_range, encoded), rtol=0, atol=1e-12)
+
+
+def test_round_trip_error(uvs, normals):
+	assert quantize.uv_error(np.clip(uvs, 0, 1))["max"] <= quantize.UV_MAX_ERROR
+	assert quantize.normal_error(normals)["max"] <= quantize.NORMAL_MAX_ERROR
+	# clamped uvs are reported, not hidden
+	assert quantize.uv_error(uvs)["max"] > quantize.UV_MAX_ERROR
+
+
+def test_error_of_empty_arrays():
+	assert quantize.uv_error(np.zeros((0, 2))) == {"max": 0.0, "mean": 0.0}
+	assert quantize.normal_error(np.zeros((0, 3))) == {"max": 0.0, "mean": 0.0}
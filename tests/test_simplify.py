@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import common
+import simplify as simplify_benchmark
+
+
+simplify = common.load_module('simplify')
+meshdata = common.load_module('meshdata')
+
+
+@pytest.fixture
+def sphere():
+	positions, uvs, triangles = simplify_benchmark.uv_sphere(24)
+	return meshdata.BobMesh(
+		positions=positions,
+		uvs=np.clip(uvs * 65535, 0, 65535),
+		normals=np.zeros_like(positions),
+		indices=triangles,
+	)
+
+
+def test_lod_chain_error_is_measured_from_the_full_mesh(sphere):
+	levels = simplify.lod_chain(sphere, 3, max_error=0.01)
+	errors = [error for _, error in levels]
+	assert errors == sorted(errors)
+	for level, error in enumerate(errors, start=1):
+		assert error <= 0.01 * 2 ** (level - 1) + 1e-9
+
+
+def test_lod_chain_ratio(sphere):
+	levels = simplify.lod_chain(sphere, 2, target_ratio=0.5)
+	face_counts = [sphere.face_count] + [level.face_count for level, _ in levels]
+	for previous, current in zip(face_counts, face_counts[1:]):
+		assert current <= previous * 0.5 + 1
+	# the second level is simplified from the first, its error from the full mesh includes the error of the first
+	_, step_error = simplify.simplify_bob_mesh(levels[0][0], target_ratio=0.5)
+	assert levels[1][1] == pytest.approx(levels[0][1] + step_error)
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+import pytest
+
+import common
+
+
+mathutils = pytest.importorskip('mathutils', reason="validate needs blender's mathutils")
+from mathutils.bvhtree import BVHTree  # noqa: E402
+
+validate = common.load_module('validate')
+
+
+def quad(z, size, up=True):
+	"""Two triangles at height `z`, facing up or down."""
+	corners = [(-size, -size, z), (size, -size, z), (size, size, z), (-size, size, z)]
+	triangles = [(0, 1, 2), (0, 2, 3)]
+	if not up:
+		triangles = [tuple(reversed(triangle)) for triangle in triangles]
+	return corners, triangles
+
+
+def tree(*quads):
+	positions, triangles = [], []
+	for corners, faces in quads:
+		triangles += [tuple(len(positions) + i for i in face) for face in faces]
+		positions += corners
+	return BVHTree.FromPolygons(positions, triangles, all_triangles=True)
+
+
+def location(name, z):
+	return SimpleNamespace(name=name, matrix_world=mathutils.Matrix.Translation((0.0, 0.0, z)))
+
+
+def test_spawn_on_the_ground():
+	assert validate.validate_locations([location('spawn', 0.1)], tree(quad(0, 5))) == []
+
+
+def test_spawn_below_a_platform():
+	# a one sided platform above the spawn faces up, the ray from the spawn hits its back
+	collision = tree(quad(0, 5), quad(1, 2, up=True))
+	assert validate.validate_locations([location('spawn', 0.1), location('flag.001', 0.5)], collision) == []
+
+
+def test_buried_spawn():
+	spawn = location('spawn', -0.5)
+	assert validate.validate_locations([spawn], tree(quad(-1, 5, up=False), quad(0, 5))) == [(spawn, "buried under or inside the collision mesh")]
+
+
+def test_floating_and_missing_ground():
+	high, outside = location('powerup_spawn', 3), SimpleNamespace(name='spawn', matrix_world=mathutils.Matrix.Translation((10.0, 0.0, 0.1)))
+	problems = validate.validate_locations([high, outside, location('camera', 10)], tree(quad(0, 5)))
+	assert [(obj, problem.split()[0]) for obj, problem in problems] == [(high, "floating"), (outside, "no")]